@@ -0,0 +1,29 @@
+"""
+Shared pytest fixtures.
+
+`resources` is one started `Resources` for the whole test session, so tests that
+need the embedding model, tokenizer or vector store load each of them at most
+once. Its embedding cache, dedup index and Chroma directory live in a temporary
+directory, so no test touches the real index.
+"""
+
+import pytest
+from config import Config
+from resources import Resources
+
+
+@pytest.fixture(scope="session")
+def session_config(tmp_path_factory):
+    root = tmp_path_factory.mktemp("resources")
+    config = Config()
+    config.chromadb_path = root / "chroma"
+    config.embedding_cache_dir = root / "embeddings"
+    config.dedup_index_file = root / "chunk_index.json"
+    config.timestamp_file = root / "manifest.json"
+    return config
+
+
+@pytest.fixture(scope="session")
+def resources(session_config):
+    with Resources(session_config) as shared:
+        yield shared
@@ -0,0 +1,36 @@
+"""
+Test Script: test_chunker.py
+Description: Tests `chunk_content_with_metadata` for document-order chunks, offsets and lazy generation.
+
+Run Instructions:
+    pytest test_chunker.py
+
+Reset Instructions:
+    No reset is necessary as the test operates only on strings.
+"""
+
+from chunker import chunk_content_with_metadata
+
+
+def test_chunks_carry_offsets_in_document_order():
+    content = "Intro text.\n```python\nprint('hi')\n```\nMiddle text.\n```\nmore code\n```\nEnd."
+    chunks = list(chunk_content_with_metadata(content, {"title": "T"}, chunk_size=100))
+
+    assert [chunk["type"] for chunk in chunks] == ["text", "code", "text", "code", "text"], "Chunks are out of order!"
+    for chunk in chunks:
+        assert content[chunk["start"]:chunk["end"]] == chunk["chunk"], f"Offsets do not match chunk: {chunk}"
+        assert chunk["metadata"] == {"title": "T"}, "Metadata was not attached!"
+
+
+def test_text_windows_overlap_without_trailing_duplicates():
+    content = "abcdefghij" * 10
+    chunks = list(chunk_content_with_metadata(content, {}, chunk_size=40, overlap=10))
+
+    assert [(chunk["start"], chunk["end"]) for chunk in chunks] == [(0, 40), (30, 70), (60, 100)], "Bad windows!"
+
+
+def test_chunks_are_generated_lazily():
+    content = "Some text. " * 1000
+    generator = chunk_content_with_metadata(content, {}, chunk_size=50)
+    first = next(generator)
+    assert first["start"] == 0 and first["type"] == "text", "First chunk was not yielded immediately!"
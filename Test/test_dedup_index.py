@@ -0,0 +1,151 @@
+"""
+Test Script: test_dedup_index.py
+Description: Tests the `ChunkDedupIndex` class for storing identical chunks once and tracking their source files.
+
+Run Instructions:
+    pytest test_dedup_index.py
+
+Reset Instructions:
+    No reset is necessary as the test writes only to pytest's temporary directory.
+"""
+
+import asyncio
+import resources as resources_module
+from dedup_index import ChunkDedupIndex
+from llm_client import LLMClient
+from resources import Resources
+
+
+def make_chunk(text, file_path, start=0, chunk_type="code"):
+    return {"chunk": text, "type": chunk_type, "metadata": {"file_path": file_path, "start": start, "end": start + len(text)}}
+
+
+def test_identical_chunks_are_stored_once(tmp_path):
+    index = ChunkDedupIndex(tmp_path / "index.json")
+    assert index.add("a.md#1", make_chunk("print('hi')", "a.md")), "First copy was not stored!"
+    index.confirm(["a.md#1"])
+    assert not index.add("b.md#1", make_chunk("print('hi')  \n", "b.md", 40)), "Whitespace-only difference was stored again!"
+    assert index.add("b.md#2", make_chunk("print('hi')", "b.md", chunk_type="text")), "A different chunk type was deduplicated!"
+    assert index.add("a.md#1", make_chunk("print('hi')", "a.md")), "A retried owner was not stored again!"
+
+    doc_ids, metadatas = index.pending_updates()
+    assert doc_ids == ["a.md#1"] and metadatas[0]["source_files"] == "a.md\nb.md", f"Unexpected updates: {metadatas}"
+    assert index.pending_updates() == ([], []), "Updates were reported twice!"
+
+
+def test_row_is_deleted_with_its_last_source(tmp_path):
+    index = ChunkDedupIndex(tmp_path / "index.json")
+    index.add("a.md#1", make_chunk("shared", "a.md"))
+    index.confirm(["a.md#1"])
+    index.add("b.md#1", make_chunk("shared", "b.md", 7))
+    index.pending_updates()
+
+    # The owner goes away: the row stays and now describes the remaining source
+    assert index.release(["a.md#1"]) == [], "A row with remaining sources was deleted!"
+    doc_ids, metadatas = index.pending_updates()
+    assert doc_ids == ["a.md#1"] and metadatas[0]["file_path"] == "b.md" and metadatas[0]["start"] == 7
+    assert index.move("b.md#1", 9, 15), "The new primary was not reported as moved!"
+
+    assert index.release(["b.md#1", "unknown"]) == ["a.md#1", "unknown"], "Orphaned row was not deleted!"
+    assert index.entries == {} and index.source_count() == 0
+
+
+def test_index_round_trip(tmp_path):
+    index = ChunkDedupIndex(tmp_path / "index.json")
+    index.add("a.md#1", make_chunk("shared", "a.md"))
+    index.add("b.md#1", make_chunk("shared", "b.md"))
+    index.add("d.md#1", make_chunk("unwritten", "d.md"))
+    index.confirm(["a.md#1"])
+    index.save()
+
+    reloaded = ChunkDedupIndex(tmp_path / "index.json")
+    assert not reloaded.add("c.md#1", make_chunk("shared", "c.md")), "Saved content was not recognized!"
+    assert reloaded.release(["a.md#1", "b.md#1"]) == [] and reloaded.release(["c.md#1"]) == ["a.md#1"]
+    assert reloaded.add("e.md#1", make_chunk("unwritten", "e.md")), "An unwritten row was saved!"
+
+
+def test_sources_wait_for_the_row_and_drop_with_it(tmp_path):
+    index = ChunkDedupIndex(tmp_path / "index.json")
+    recorded = []
+    index.add("a.md#1", make_chunk("shared", "a.md"))
+    index.add("b.md#1", make_chunk("shared", "b.md"))
+    index.when_written(["b.md#1"], lambda: recorded.append("b.md"))
+    assert recorded == [], "A source was recorded before its row was written!"
+    index.confirm(["a.md#1"])
+    assert recorded == ["b.md"], "Waiting source was not recorded once the row was written!"
+
+    # The owner's embedding fails: the row is dropped and its sources are never recorded
+    index.add("c.md#1", make_chunk("other", "c.md"))
+    index.add("d.md#1", make_chunk("other", "d.md"))
+    index.when_written(["d.md#1"], lambda: recorded.append("d.md"))
+    assert index.discard(["c.md#1"]) == []
+    index.when_written(["d.md#1"], lambda: recorded.append("d.md"))
+    assert recorded == ["b.md"] and index.source_count() == 2, "A source of a discarded row was recorded!"
+    assert index.add("d.md#1", make_chunk("other", "d.md")), "Discarded content was not embedded again!"
+
+
+class ReplaceCollection:
+    """Stand-in collection whose `update` replaces a row's whole metadata, like Chroma's."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get(self, ids, include):
+        found = [doc_id for doc_id in ids if doc_id in self.rows]
+        return {"ids": found, "metadatas": [dict(self.rows[doc_id]) for doc_id in found]}
+
+    def update(self, ids, metadatas):
+        for doc_id, metadata in zip(ids, metadatas):
+            self.rows[doc_id] = metadata
+
+
+def test_source_updates_keep_stored_metadata(session_config, monkeypatch):
+    stored = {"file_path": "a.md", "start": 0, "end": 11, "chunk_type": "code", "tags": "python", "title": "A"}
+    collection = ReplaceCollection({"a.md#1": dict(stored)})
+    monkeypatch.setattr(resources_module, "get_chroma_collection", lambda config: collection)
+    index = ChunkDedupIndex(session_config.dedup_index_file.with_name("replace.json"))
+    index.add("a.md#1", make_chunk("print('hi')", "a.md"))
+    index.confirm(["a.md#1"])
+    index.add("b.md#1", make_chunk("print('hi')", "b.md", 40))
+
+    with Resources(session_config) as shared:
+        client = LLMClient(session_config, shared)
+        asyncio.run(client.update_metadata(*index.pending_updates()))
+        row = collection.rows["a.md#1"]
+        assert row["source_files"] == "a.md\nb.md", "Source files were not stored!"
+        assert {key: row[key] for key in stored} == stored, f"Update dropped stored metadata: {row}"
+
+        # A moved primary gets new offsets and keeps its source files
+        asyncio.run(client.update_metadata(["a.md#1"], [{"file_path": "a.md", "start": 5, "end": 16}]))
+        assert collection.rows["a.md#1"]["start"] == 5 and collection.rows["a.md#1"]["source_files"] == "a.md\nb.md"
+
+
+class WritableReplaceCollection(ReplaceCollection):
+    """Replace-semantics collection that also records the batched writes."""
+
+    def __init__(self, rows):
+        super().__init__(rows)
+        self.writes = []
+
+    def upsert(self, ids, documents, metadatas, embeddings):
+        self.writes.append(list(ids))
+        self.rows.update(zip(ids, metadatas))
+
+    add = upsert
+
+
+def test_updates_flush_only_when_their_rows_are_buffered(session_config, monkeypatch):
+    collection = WritableReplaceCollection({"a.md#1": {"file_path": "a.md", "start": 0, "end": 11}})
+    monkeypatch.setattr(resources_module, "get_chroma_collection", lambda config: collection)
+
+    async def run(client):
+        await client.writer.add("b.md#1", "doc", {"file_path": "b.md", "start": 0, "end": 3}, [0.0])
+        await client.update_metadata(["a.md#1"], [{"start": 5, "end": 16}])
+        assert collection.writes == [] and collection.rows["a.md#1"]["start"] == 5, "Unrelated buffered rows were flushed!"
+
+        await client.update_metadata(["b.md#1"], [{"start": 2, "end": 5}])
+        assert collection.writes == [["b.md#1"]], "Buffered row was not written before its update!"
+        assert collection.rows["b.md#1"] == {"file_path": "b.md", "start": 2, "end": 5}
+
+    with Resources(session_config) as shared:
+        asyncio.run(run(LLMClient(session_config, shared)))
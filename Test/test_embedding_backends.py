@@ -0,0 +1,159 @@
+"""
+Test Script: test_embedding_backends.py
+Description: Tests backend selection, concurrent loading, the process-pool encode path, ONNX output pooling
+    and the cosine parity check of `embedding_backends`.
+
+Run Instructions:
+    pytest test_embedding_backends.py
+
+Reset Instructions:
+    No reset is necessary as the test does not create any files.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pytest
+import embedding_backends
+from embedding_backends import (
+    OnnxRuntimeBackend, OpenVINOBackend, ProcessPoolBackend, QuantizedTorchBackend, cache_variant, cosine_drift,
+    create_backend
+)
+
+
+def test_create_backend_selects_cpu_backends(tmp_path):
+    assert isinstance(create_backend("quantized", "model", "cuda"), QuantizedTorchBackend)
+    assert create_backend("quantized", "model", "cuda").device == "cpu", "Quantized backend must run on the CPU!"
+    assert type(create_backend("onnx", "model", "cpu", export_dir=tmp_path)) is OnnxRuntimeBackend
+    assert isinstance(create_backend("openvino", "model", "cpu", export_dir=tmp_path), OpenVINOBackend)
+    with pytest.raises(ValueError):
+        create_backend("tpu", "model", "cpu")
+
+
+def test_cache_variants_separate_backends_with_different_vectors():
+    assert cache_variant("process") == cache_variant("local"), "Identical fp32 backends should share the cache!"
+    variants = {cache_variant(name) for name in ("local", "quantized", "onnx", "openvino")}
+    assert len(variants) == 4, f"Backends share a cache variant: {variants}"
+
+
+def test_concurrent_loads_start_one_worker_pool(monkeypatch):
+    started = []
+
+    class SlowExecutor:
+        def __init__(self, **kwargs):
+            time.sleep(0.05)
+            started.append(self)
+
+        def shutdown(self, wait=True):
+            pass
+
+    monkeypatch.setattr(embedding_backends, "ProcessPoolExecutor", SlowExecutor)
+    backend = ProcessPoolBackend("model", num_workers=2)
+    threads = [threading.Thread(target=backend.load) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(started) == 1, "Concurrent loads started more than one worker pool!"
+    assert backend._executor is started[0]
+    backend.close()
+
+
+class StubWorkerModel:
+    """Stand-in for a worker's SentenceTransformer: embeds "n" as [n, -n], slowest for the first slice."""
+
+    def encode(self, texts, batch_size, convert_to_numpy=True, show_progress_bar=False):
+        if "bad" in texts:
+            raise RuntimeError("worker failed")
+        time.sleep(0.05 if texts[0] == "0" else 0)
+        return np.array([[float(text), -float(text)] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def in_process_pool(monkeypatch):
+    """A ProcessPoolBackend whose workers are threads of this process, and the shared-memory blocks they create."""
+    blocks = []
+
+    def recording_encode(texts, batch_size):
+        result = original_encode(texts, batch_size)
+        blocks.append(result[0])
+        return result
+
+    original_encode = embedding_backends._encode_in_worker
+    monkeypatch.setattr(embedding_backends, "_worker_model", StubWorkerModel())
+    monkeypatch.setattr(embedding_backends, "_encode_in_worker", recording_encode)
+    backend = ProcessPoolBackend("model", num_workers=3)
+    backend._executor = ThreadPoolExecutor(max_workers=3)
+    yield backend, blocks
+    backend.close()
+
+
+def assert_unlinked(names):
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_process_pool_reassembles_slices_in_input_order(in_process_pool):
+    backend, blocks = in_process_pool
+    embeddings = backend.encode([str(n) for n in range(7)], batch_size=2)
+
+    assert np.array_equal(embeddings[:, 0], np.arange(7)), f"Slices were reassembled out of order: {embeddings}"
+    assert embeddings.shape == (7, 2) and embeddings.dtype == np.float32
+    assert len(blocks) == 3, "Texts were not split into one slice per worker!"
+    assert_unlinked(blocks)
+
+
+def test_process_pool_unlinks_shared_memory_when_a_worker_fails(in_process_pool):
+    backend, blocks = in_process_pool
+    with pytest.raises(RuntimeError, match="worker failed"):
+        backend.encode(["0", "1", "2", "bad", "4", "5"], batch_size=2)
+
+    assert len(blocks) == 2, "The successful slices did not finish before the error was raised!"
+    assert_unlinked(blocks)
+
+
+def test_process_pool_hands_shared_memory_over_to_the_parent(in_process_pool, monkeypatch):
+    backend, blocks = in_process_pool
+    tracked = {}
+    monkeypatch.setattr(resource_tracker, "register", lambda name, rtype: tracked.update({name: tracked.get(name, 0) + 1}))
+    monkeypatch.setattr(resource_tracker, "unregister", lambda name, rtype: tracked.update({name: tracked.get(name, 0) - 1}))
+    backend.encode([str(n) for n in range(6)], batch_size=2)
+
+    assert len(tracked) == 3 and not any(tracked.values()), f"Shared-memory blocks were left tracked: {tracked}"
+    assert_unlinked(blocks)
+
+
+def test_process_pool_empty_input(in_process_pool):
+    backend, blocks = in_process_pool
+    embeddings = backend.encode([], batch_size=2)
+
+    assert embeddings.shape == (0, 0) and embeddings.dtype == np.float32
+    assert blocks == [], "Empty input was sent to a worker!"
+
+
+def test_onnx_backend_pools_like_sentence_transformers(tmp_path):
+    backend = OnnxRuntimeBackend("model", tmp_path)
+    hidden = np.array([[[1.0, 0.0], [3.0, 4.0], [9.0, 9.0]]], dtype=np.float32)
+    backend._run = lambda inputs: hidden
+    features = {"input_ids": np.array([[101, 7, 0]]), "attention_mask": np.array([[1, 1, 0]])}
+
+    backend.settings = {"input_names": ["input_ids", "attention_mask"], "pooling": "mean", "normalize": False}
+    assert np.allclose(backend._embed(features), [[2.0, 2.0]]), "Padding was included in mean pooling!"
+
+    backend.settings = {"input_names": ["input_ids", "attention_mask"], "pooling": "cls", "normalize": True}
+    assert np.allclose(backend._embed(features), [[1.0, 0.0]])
+
+
+def test_cosine_drift():
+    reference = np.array([[1.0, 0.0], [0.0, 2.0]])
+    assert cosine_drift(reference, reference * 3)["min_cosine"] == pytest.approx(1.0)
+
+    drift = cosine_drift(reference, np.array([[1.0, 0.0], [1.0, 1.0]]))
+    assert drift["min_cosine"] == pytest.approx(np.sqrt(0.5)) and drift["max_drift"] == pytest.approx(1 - np.sqrt(0.5))
+    with pytest.raises(ValueError):
+        cosine_drift(reference, reference[:1])
@@ -0,0 +1,62 @@
+"""
+Test Script: test_embedding_batcher.py
+Description: Tests the `EmbeddingBatcher` class for collecting concurrent requests into batched encode calls.
+
+Run Instructions:
+    pytest test_embedding_batcher.py
+
+Reset Instructions:
+    No reset is necessary as the test uses an in-memory stand-in for the embedding model.
+"""
+
+import asyncio
+from embedding_batcher import EmbeddingBatcher
+
+
+class RecordingModel:
+    """Stand-in model that records batch sizes and returns one row per input."""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate_embeddings(self, texts, metadatas):
+        self.calls.append(len(texts))
+        return [[float(len(text)), float(metadata["n"])] for text, metadata in zip(texts, metadatas)]
+
+
+def test_concurrent_requests_share_one_batch():
+    model = RecordingModel()
+    batcher = EmbeddingBatcher(model, max_batch_size=8, max_latency_ms=50)
+
+    async def run():
+        return await asyncio.gather(*(batcher.embed("x" * n, {"n": n}) for n in range(8)))
+
+    rows = asyncio.run(run())
+    assert model.calls == [8], "Concurrent requests were not encoded in a single batch!"
+    assert rows == [[float(n), float(n)] for n in range(8)], "Rows were not returned to their callers!"
+
+
+def test_latency_bound_flushes_partial_batch():
+    model = RecordingModel()
+    batcher = EmbeddingBatcher(model, max_batch_size=100, max_latency_ms=1)
+
+    async def run():
+        return await batcher.embed_many(["a", "bb", "ccc"], [{"n": 1}, {"n": 2}, {"n": 3}])
+
+    rows = asyncio.run(run())
+    assert model.calls == [3], "Partial batch was not flushed after the latency bound!"
+    assert [row[0] for row in rows] == [1.0, 2.0, 3.0], "Rows are out of order!"
+
+
+def test_encode_error_reaches_every_caller():
+    class FailingModel:
+        def generate_embeddings(self, texts, metadatas):
+            raise RuntimeError("encoder failed")
+
+    batcher = EmbeddingBatcher(FailingModel(), max_batch_size=2, max_latency_ms=1)
+
+    async def run():
+        return await asyncio.gather(batcher.embed("a", {}), batcher.embed("b", {}), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results), "Encode errors were not propagated!"
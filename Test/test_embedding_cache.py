@@ -0,0 +1,67 @@
+"""
+Test Script: test_embedding_cache.py
+Description: Tests the `EmbeddingCache` class for hits, misses, LRU eviction and persistence.
+
+Run Instructions:
+    pytest test_embedding_cache.py
+
+Reset Instructions:
+    No reset is necessary as the test writes only to pytest's temporary directory.
+"""
+
+import numpy as np
+from embedding_cache import EmbeddingCache
+
+
+def test_hits_and_misses(tmp_path):
+    cache = EmbeddingCache(tmp_path, "test-model", max_entries=4)
+    assert cache.get("hello world") is None, "Empty cache returned a vector!"
+
+    cache.put("hello world", np.array([1.0, 2.0]))
+    assert np.allclose(cache.get("hello   world"), [1.0, 2.0]), "Normalized lookup missed!"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1, "Counters are wrong!"
+
+
+def test_lru_eviction(tmp_path):
+    cache = EmbeddingCache(tmp_path, "test-model", max_entries=2)
+    cache.put("a", np.array([1.0]))
+    cache.put("b", np.array([2.0]))
+    cache.get("a")  # "b" is now least recently used
+    cache.put("c", np.array([3.0]))
+
+    assert cache.get("b") is None, "Least recently used entry was not evicted!"
+    assert np.allclose(cache.get("a"), [1.0]), "Recently used entry was evicted!"
+    assert np.allclose(cache.get("c"), [3.0]), "New entry was not stored!"
+
+
+def test_persistence(tmp_path):
+    cache = EmbeddingCache(tmp_path, "test-model", max_entries=4)
+    cache.put("note", np.array([0.5, 0.25]))
+    cache.save()
+
+    reopened = EmbeddingCache(tmp_path, "test-model", max_entries=4)
+    assert np.allclose(reopened.get("note"), [0.5, 0.25]), "Cached vector was not persisted!"
+    assert EmbeddingCache(tmp_path, "other-model", max_entries=4).get("note") is None, "Cache leaked across models!"
+
+
+def test_backend_variants_do_not_share_vectors(tmp_path):
+    cache = EmbeddingCache(tmp_path, "test-model", max_entries=4, variant="local")
+    cache.put("note", np.array([0.5, 0.25]))
+    cache.save()
+
+    quantized = EmbeddingCache(tmp_path, "test-model", max_entries=4, variant="quantized")
+    assert quantized.get("note") is None, "Cache leaked across backends!"
+    assert quantized.key("note") != cache.key("note"), "Variant is not part of the key!"
+    assert cache.cache_dir != quantized.cache_dir, "Variants share a cache directory!"
+
+
+def test_slot_reused_after_save_is_a_miss(tmp_path):
+    cache = EmbeddingCache(tmp_path, "test-model", max_entries=2)
+    cache.put("a", np.array([1.0]))
+    cache.put("b", np.array([2.0]))
+    cache.save()
+    cache.put("c", np.array([3.0]))  # Reuses the slot of "a"; the saved index still points "a" at it
+
+    reopened = EmbeddingCache(tmp_path, "test-model", max_entries=2)
+    assert reopened.get("a") is None, "Stale index entry returned the vector of another input!"
+    assert np.allclose(reopened.get("b"), [2.0]), "Untouched entry was lost!"
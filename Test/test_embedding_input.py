@@ -0,0 +1,66 @@
+"""
+Test Script: test_embedding_input.py
+Description: Tests the `EmbeddingInputTemplate` class for selecting metadata fields and capping them at a token budget.
+
+Run Instructions:
+    pytest test_embedding_input.py
+
+Reset Instructions:
+    No reset is necessary as the test does not create any files.
+"""
+
+import re
+from embedding_input import EmbeddingInputTemplate
+
+
+class WordTokenizer:
+    """Stand-in fast tokenizer with one token per word."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False):
+        self.calls += 1
+        spans = [match.span() for match in re.finditer(r"\S+", text)]
+        result = {"input_ids": [len(text[start:end]) for start, end in spans]}
+        if return_offsets_mapping:
+            result["offset_mapping"] = spans
+        return result
+
+
+METADATA = {"title": "Trip", "tags": ["travel", "plans"], "file_path": "/vault/trip.md",
+            "timestamp": "2024-01-01T00:00:00", "length": 1200, "start": 0, "end": 40}
+
+
+def test_only_selected_fields_are_encoded():
+    template = EmbeddingInputTemplate(["title", "tags"], max_prefix_tokens=0)
+    assert template.build("Pack light.", METADATA) == "title: Trip\ntags: travel, plans\nPack light."
+    assert template.build("Pack light.", {"file_path": "/vault/x.md"}) == "Pack light.", "Unset fields were encoded!"
+
+    # Stored-only metadata does not change the encoder input or the chunk identity
+    moved = {**METADATA, "file_path": "/vault/other.md", "timestamp": "later", "start": 99}
+    assert template.build("Pack light.", moved) == template.build("Pack light.", METADATA)
+    assert template.identity("Pack light.", moved) == template.identity("Pack light.", METADATA)
+
+
+def test_prefix_is_cut_to_token_budget():
+    tokenizer = WordTokenizer()
+    template = EmbeddingInputTemplate(["title", "tags"], max_prefix_tokens=4, tokenizer_loader=lambda: tokenizer)
+    metadata = {"title": "A long title with many words", "tags": ["x"]}
+    assert template.prefix(metadata) == "title: A long title\n", f"Unexpected prefix: {template.prefix(metadata)!r}"
+    assert template.prefix_token_ids(metadata) == [6, 1, 4, 5]
+    calls = tokenizer.calls
+    for _ in range(3):
+        template.build("chunk", metadata)
+    assert tokenizer.calls == calls, "Repeated prefixes were tokenized again!"
+
+    # Short prefixes never need the tokenizer
+    short = EmbeddingInputTemplate(["title"], max_prefix_tokens=32)
+    assert short.build("text", {"title": "Hi"}) == "title: Hi\ntext"
+
+
+def test_all_fields_template_keeps_previous_format():
+    template = EmbeddingInputTemplate(["*"], max_prefix_tokens=0)
+    context = template.build("Pack light.", METADATA)
+    assert context.startswith("Metadata: {") and context.endswith("}\nContent: Pack light.")
+    assert "file_path" in context and "timestamp" not in context and "length" not in context
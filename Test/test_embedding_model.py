@@ -0,0 +1,75 @@
+"""
+Test Script: test_embedding_model.py
+Description: Tests length-sorted encoding in `EmbeddingModel`, restoring input order and counting token padding.
+
+Run Instructions:
+    pytest test_embedding_model.py
+
+Reset Instructions:
+    No reset is necessary as the test does not create any files.
+"""
+
+import numpy as np
+from embedding_model import EmbeddingModel, padded_length
+
+
+class LengthBackend:
+    """Stand-in backend embedding each input as its length and recording the order it saw."""
+
+    def __init__(self):
+        self.seen = []
+
+    def encode(self, texts, batch_size):
+        self.seen.extend(texts)
+        return np.array([[float(len(text))] for text in texts])
+
+
+class TokenLengthBackend(LengthBackend):
+    """Stand-in backend that also accepts token ids and keeps at most 5 of them per sequence."""
+
+    def token_budget(self):
+        return 5
+
+    def encode_token_ids(self, token_ids, batch_size):
+        return self.encode(token_ids, batch_size)
+
+
+def make_model(sort_by_length):
+    model = EmbeddingModel("test-model", device="cpu", batch_size=2, input_fields=[], sort_by_length=sort_by_length)
+    model.backend = LengthBackend()
+    return model
+
+
+def test_inputs_are_encoded_by_length_and_returned_in_order():
+    texts = ["a", "abcdef", "ab", "abcde"]
+    model = make_model(sort_by_length=True)
+    embeddings = model.generate_embeddings(texts, [{}] * len(texts))
+
+    assert model.backend.seen == ["abcdef", "abcde", "ab", "a"], "Inputs were not encoded longest first!"
+    assert embeddings[:, 0].tolist() == [1.0, 6.0, 2.0, 5.0], "Rows were not scattered back to input order!"
+
+    assert model.padding == {"real": 0, "padded": 0, "padded_unsorted": 0}, "Characters were counted as tokens!"
+    assert model.padding_efficiency() is None, "Unmeasured padding was reported!"
+
+
+def test_padding_is_counted_in_tokens_capped_at_the_model_maximum():
+    model = make_model(sort_by_length=True)
+    model.backend = TokenLengthBackend()
+    token_ids = [[1], [1] * 8, [1] * 2, [1] * 4]
+    model.generate_embeddings(["a", "b", "c", "d"], [{}] * 4, token_ids=token_ids)
+
+    assert [len(ids) for ids in model.backend.seen] == [8, 4, 2, 1], "Inputs were not encoded longest first!"
+    # Lengths capped at 5 are [1, 5, 2, 4]: sorted batches pad (5+5) + (2+2) = 14, arrival order (5+5) + (4+4) = 18
+    assert model.padding == {"real": 12, "padded": 14, "padded_unsorted": 18}
+    assert model.padding_efficiency() == {"efficiency": 0.8571, "unsorted_efficiency": 0.6667}
+
+
+def test_sorting_can_be_disabled():
+    model = make_model(sort_by_length=False)
+    model.generate_embeddings(["a", "abc"], [{}, {}])
+    assert model.backend.seen == ["a", "abc"], "Inputs were reordered with sorting disabled!"
+
+
+def test_padded_length():
+    assert padded_length([3, 1, 2], 2) == 3 * 2 + 2 * 1
+    assert padded_length([], 4) == 0
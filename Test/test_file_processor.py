@@ -6,31 +6,22 @@ Run Instructions:
     pytest test_file_processor.py
 
 Reset Instructions:
-    No reset is necessary as the test removes the temporary file (`test_file.md`) after completion.
+    No reset is necessary as the test writes only to pytest's temporary directory.
 """
 
 import asyncio
-from pathlib import Path
-from config import Config
 from file_handler import FileHandler
 from file_processor import FileProcessor
 
-async def test_file_processor():
-    config = Config()
-    processor = FileProcessor(config)
-    test_file = Path("test_file.md")
+def test_file_processor(resources, tmp_path):
+    processor = FileProcessor(resources.config, resources)
+    test_file = tmp_path / "test_file.md"
     test_content = "# Test Metadata\nThis is the body of the test file."
 
     # Create a test file
     FileHandler.write_file(test_file, test_content)
 
     # Process the file
-    if processor.should_process_file(test_file):
-        result = await processor.validate_and_process_file(test_file)
-        assert result["success"], f"Processing failed: {result.get('error', 'Unknown error')}"
-    else:
-        assert False, f"File {test_file} should have been valid for processing."
-
-    # Cleanup
-    test_file.unlink()
-    assert not test_file.exists(), "Test file was not removed!"
+    assert processor.should_process_file(test_file), f"File {test_file} should have been valid for processing."
+    result = asyncio.run(processor.validate_and_process_file(test_file))
+    assert result["success"], f"Processing failed: {result.get('error', 'Unknown error')}"
@@ -9,20 +9,16 @@ Reset Instructions:
     Ensure any test embeddings are removed from ChromaDB after running the tests.
 """
 
-from config import Config
+import asyncio
 from llm_client import LLMClient
 
-def test_llm_client():
-    config = Config()
-    llm_client = LLMClient(config)
+def test_llm_client(resources):
+    llm_client = LLMClient(resources.config, resources)
 
     # Test embedding generation
     test_text = "This is a test sentence."
-    embedding = llm_client.generate_embedding(test_text)
-    assert embedding is not None, "Embedding generation failed!"
+    embedding = asyncio.run(llm_client.generate_embedding(test_text, {}))
+    assert embedding is not None and len(embedding) > 0, "Embedding generation failed!"
 
     # Test connection
-    try:
-        llm_client._check_connection()
-    except Exception as e:
-        assert False, f"LLM connection test failed: {e}"
+    assert llm_client.vector_store is resources.vector_store, "LLM client is not connected to the shared vector store!"
@@ -1,63 +1,77 @@
-# Create test_main.py with detailed instructions and test cases
-
-test_main_content = """
-\"\"\"
+"""
 Test Script: test_main.py
-Description: Tests the orchestration and integration logic in `main.py`.
+Description: Tests that `main.py` starts without loading the model stack and that `process_files` warms the model up while the vault is scanned.
 
 Run Instructions:
     pytest test_main.py
 
-Preparation Instructions:
-    - Ensure all modules (`main.py`, `DirectoryScanner`, `FileProcessor`, etc.) are updated and functional.
-    - Mock any external dependencies such as GitHub or database connections to avoid impacting production systems.
-
 Reset Instructions:
-    - Remove any test artifacts (e.g., test files or directories) created during the test.
-\"\"\"
+    No reset is necessary as the test writes only to pytest's temporary directory.
+"""
 
 import asyncio
-from pathlib import Path
-from unittest.mock import patch, AsyncMock
+import os
+import subprocess
+import sys
+import threading
+import main
+from config import Config
 
-@patch("main.ensure_repository_synced")
-@patch("main.DirectoryScanner.scan", return_value=[Path("test_file.md")])
-@patch("main.FileProcessor.validate_and_process_file", return_value={"success": True})
-def test_main_workflow(mock_process, mock_scan, mock_sync):
-    from main import process_files, Config
 
-    # Create test configuration
-    config = Config.load_default()
+class UnchangedProcessor:
+    """Stand-in processor for a vault whose files are all up to date."""
 
-    # Run the main process function
-    asyncio.run(process_files(config))
+    def __init__(self, config, resources):
+        self.resources = resources
 
-    # Verify repository sync was called
-    mock_sync.assert_called_once()
+    def should_process_file(self, file_path):
+        return False
 
-    # Verify scanning was performed
-    mock_scan.assert_called_once()
+    async def delete_chunks(self, chunk_ids):
+        pass
 
-    # Verify file processing was called
-    mock_process.assert_called_once_with(Path("test_file.md"))
+    async def flush(self):
+        pass
 
-def test_main_error_handling():
-    from main import process_files, Config
 
-    # Simulate failure in processing
-    with patch("main.FileProcessor.validate_and_process_file", return_value={"success": False, "error": "Test Error"}):
-        config = Config.load_default()
+def test_import_does_not_load_model_stack():
+    code = ("import sys, main; "
+            "print(','.join(m for m in ('torch', 'sentence_transformers', 'transformers', 'chromadb') if m in sys.modules))")
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "", f"Importing main loaded: {output.strip()}"
 
-        # Run the main process and expect it to handle errors gracefully
-        try:
-            asyncio.run(process_files(config))
-        except Exception as e:
-            assert False, f"Error handling failed: {e}"
-"""
 
-# Save the test_main.py script to a file for download
-test_main_path = "/mnt/data/test_main.py"
-with open(test_main_path, "w") as file:
-    file.write(test_main_content)
+def test_process_files_warms_up_in_background(tmp_path, monkeypatch):
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "note.md").write_text("# Note\n", encoding="utf-8")
+    config = Config()
+    config.vault_directory = vault
+    config.timestamp_file = tmp_path / "manifest.json"
+    config.metrics_file = ""
+    config.embedding_cache_enabled = False
+    config.dedup_index_file = tmp_path / "chunk_index.json"
+    config.embedding_warmup = True
+    warmed_in = []
+    monkeypatch.setattr(main, "FileProcessor", UnchangedProcessor)
+    monkeypatch.setattr(main.Resources, "warm", lambda self: warmed_in.append(threading.current_thread()))
+    shutdowns = []
+    shutdown = main.Resources.shutdown
+    monkeypatch.setattr(main.Resources, "shutdown", lambda self: (shutdowns.append(bool(warmed_in)), shutdown(self)))
+
+    asyncio.run(main.process_files(config))
+
+    assert warmed_in, "The model was not warmed up!"
+    assert warmed_in[0] is not threading.main_thread(), "Warm-up blocked the event loop thread!"
+    assert shutdowns == [True], "Resources were shut down before the warm-up finished or not at all!"
+
+
+def test_warm_up_is_optional():
+    config = Config()
+    config.embedding_warmup = "false"
+
+    async def run():
+        return main.start_warmup(config, None)
 
-test_main_path
+    assert asyncio.run(run()) is None
@@ -0,0 +1,54 @@
+"""
+Test Script: test_manifest.py
+Description: Tests the `NoteManifest` class for change detection and persistence between runs.
+
+Run Instructions:
+    pytest test_manifest.py
+
+Reset Instructions:
+    No reset is necessary as the test writes only to pytest's temporary directory.
+"""
+
+from pathlib import Path
+from manifest import NoteManifest
+
+
+def test_manifest_round_trip(tmp_path):
+    manifest_path = tmp_path / "note_timestamps.json"
+    manifest = NoteManifest(manifest_path)
+    manifest.record(Path("a.md"), 1.0, 10, "hash-a", ["a.md_1", "a.md_2"])
+    manifest.save()
+
+    reloaded = NoteManifest(manifest_path)
+    assert reloaded.chunk_ids(Path("a.md")) == ["a.md_1", "a.md_2"], "Chunk ids were not persisted!"
+    assert reloaded.is_unchanged(Path("a.md"), 1.0, 10), "Unchanged file was reported as changed!"
+    assert reloaded.chunk_offsets(Path("a.md")) == {}, "Offsets were invented for an entry without them!"
+
+
+def test_chunk_offsets_round_trip(tmp_path):
+    manifest_path = tmp_path / "note_timestamps.json"
+    manifest = NoteManifest(manifest_path)
+    manifest.record(Path("a.md"), 1.0, 10, "hash-a", ["a.md#x", "a.md#y"], [(0, 5), (7, 10)])
+    manifest.save()
+
+    offsets = NoteManifest(manifest_path).chunk_offsets(Path("a.md"))
+    assert offsets == {"a.md#x": (0, 5), "a.md#y": (7, 10)}, f"Offsets were not persisted: {offsets}"
+
+
+def test_change_detection():
+    manifest = NoteManifest(Path("does-not-exist.json"))
+    manifest.record(Path("a.md"), 1.0, 10, "hash-a", ["a.md_1"])
+
+    assert not manifest.is_unchanged(Path("a.md"), 2.0, 12), "Modified file was reported as unchanged!"
+    assert manifest.is_unchanged(Path("a.md"), 2.0, 10, "hash-a"), "Touched file with same hash was re-indexed!"
+    assert not manifest.is_unchanged(Path("b.md"), 1.0, 10), "Unknown file was reported as unchanged!"
+
+
+def test_removed_files():
+    manifest = NoteManifest(Path("does-not-exist.json"))
+    manifest.record(Path("a.md"), 1.0, 10, "hash-a", ["a.md_1"])
+    manifest.record(Path("b.md"), 1.0, 10, "hash-b", ["b.md_1"])
+
+    assert manifest.removed_files({"a.md"}) == ["b.md"], "Removed file was not detected!"
+    assert manifest.remove(Path("b.md")) == ["b.md_1"], "Chunk ids of removed file were not returned!"
+    assert manifest.removed_files({"a.md"}) == [], "Removed file is still tracked!"
@@ -0,0 +1,67 @@
+"""
+Test Script: test_markdown_chunker.py
+Description: Tests `chunk_markdown` for block detection, heading paths, greedy packing and word-boundary splits.
+
+Run Instructions:
+    pytest test_markdown_chunker.py
+
+Reset Instructions:
+    No reset is necessary as the test operates only on strings.
+"""
+
+from markdown_chunker import chunk_markdown, iter_blocks
+
+NOTE = """# Project
+Intro paragraph
+spanning two lines.
+
+## Tasks
+- first item
+  continued
+- second item
+
+| a | b |
+|---|---|
+| 1 | 2 |
+
+> quoted
+> text
+
+```python
+# not a heading
+print(1)
+```
+
+### Details
+Closing words.
+"""
+
+
+def test_blocks_are_detected_in_one_pass():
+    kinds = [kind for kind, _, _, _ in iter_blocks(NOTE)]
+    assert kinds == [
+        "heading", "paragraph", "heading", "list", "list", "table", "quote", "code", "heading", "paragraph"
+    ], f"Unexpected blocks: {kinds}"
+
+
+def test_chunks_carry_heading_paths_and_offsets():
+    chunks = list(chunk_markdown(NOTE, {"title": "T"}, chunk_size=1000))
+
+    assert [chunk["type"] for chunk in chunks] == ["text", "text", "code", "text"], "Chunks are out of order!"
+    assert [chunk["metadata"]["heading_path"] for chunk in chunks] == [
+        "Project", "Project > Tasks", "Project > Tasks", "Project > Tasks > Details"
+    ], "Heading paths are wrong!"
+    for chunk in chunks:
+        assert NOTE[chunk["start"]:chunk["end"]] == chunk["chunk"], f"Offsets do not match chunk: {chunk}"
+        assert chunk["metadata"]["title"] == "T", "File metadata was not kept!"
+    assert "# not a heading" in chunks[2]["chunk"], "Code comment was treated as a heading!"
+
+
+def test_blocks_are_packed_greedily_and_long_blocks_split_on_words():
+    content = "# H\n" + "\n\n".join(["short paragraph"] * 4) + "\n\n" + "word " * 40
+    chunks = list(chunk_markdown(content, {}, chunk_size=50))
+
+    for chunk in chunks:
+        assert len(chunk["chunk"]) <= 50, f"Chunk exceeds the size budget: {chunk['chunk']!r}"
+        assert not chunk["chunk"].startswith("ord"), "Split in the middle of a word!"
+    assert chunks[0]["chunk"].startswith("# H\nshort paragraph\n\nshort paragraph"), "Blocks were not packed!"
@@ -0,0 +1,57 @@
+"""
+Test Script: test_metrics.py
+Description: Tests the `Metrics` registry for counters, timers, exports and the disabled no-op mode.
+
+Run Instructions:
+    pytest test_metrics.py
+
+Reset Instructions:
+    No reset is necessary as the test writes only to pytest's temporary directory.
+"""
+
+import json
+
+from metrics import Metrics
+
+
+def test_disabled_registry_records_nothing():
+    metrics = Metrics(enabled=False)
+    metrics.inc("chunks", 3)
+    with metrics.timer("encode"):
+        pass
+
+    assert metrics.to_dict() == {"counters": {}, "histograms": {}}, "Disabled registry recorded values!"
+    assert metrics.timer("a") is metrics.timer("b"), "Disabled timers should be a shared no-op!"
+
+
+def test_counters_timers_and_table():
+    metrics = Metrics(enabled=True)
+    metrics.inc("chunks", 3)
+    metrics.inc("chunks")
+    for _ in range(2):
+        with metrics.timer("encode"):
+            pass
+    metrics.observe("read", 0.002)
+
+    snapshot = metrics.to_dict()
+    assert snapshot["counters"] == {"chunks": 4}, f"Counter was not accumulated: {snapshot}"
+    assert snapshot["histograms"]["encode"]["count"] == 2, "Timer did not record both blocks!"
+    assert snapshot["histograms"]["read"]["max"] == 0.002, "Observed value was not kept!"
+    table = metrics.format_table()
+    assert "encode" in table and "chunks" in table, f"Summary table is missing metrics:\n{table}"
+
+
+def test_json_and_prometheus_export(tmp_path):
+    metrics = Metrics(enabled=True)
+    metrics.inc("vector_store.rows", 5)
+    metrics.observe("vector_store.write", 0.003)
+
+    metrics.write(tmp_path / "metrics.json", "json")
+    assert json.loads((tmp_path / "metrics.json").read_text())["counters"]["vector_store.rows"] == 5
+
+    metrics.write(tmp_path / "metrics.prom", "prometheus")
+    text = (tmp_path / "metrics.prom").read_text()
+    assert "mybrain_vector_store_rows_total 5" in text, f"Counter missing from Prometheus text:\n{text}"
+    assert 'mybrain_vector_store_write_seconds_bucket{le="0.005"} 1' in text, "Histogram buckets are wrong!"
+    assert 'mybrain_vector_store_write_seconds_bucket{le="+Inf"} 1' in text, "Missing +Inf bucket!"
+    assert "mybrain_vector_store_write_seconds_count 1" in text, "Missing histogram count!"
@@ -0,0 +1,31 @@
+"""
+Test Script: test_note_record.py
+Description: Tests the `NoteRecord` class for single-read loading of notes and their frontmatter.
+
+Run Instructions:
+    pytest test_note_record.py
+
+Reset Instructions:
+    No reset is necessary as the test writes only to pytest's temporary directory.
+"""
+
+import hashlib
+from note_record import NoteRecord
+
+
+def test_load_note_record(tmp_path):
+    note = tmp_path / "note.md"
+    raw = "---\ntitle: Test Note\n---\nThe body."
+    note.write_text(raw, encoding="utf-8")
+
+    record = NoteRecord.load(note)
+    assert record.has_frontmatter and record.frontmatter == {"title": "Test Note"}, "Frontmatter was not parsed!"
+    assert record.body == "The body." and record.content == raw, "Content was not decoded correctly!"
+    assert record.size == len(raw.encode("utf-8")), "Size does not match the bytes read!"
+    assert record.content_hash == hashlib.sha256(raw.encode("utf-8")).hexdigest(), "Content hash is wrong!"
+
+    metadata = record.metadata()
+    assert metadata["title"] == "Test Note" and metadata["length"] == len("The body."), "Metadata was not built!"
+
+    record.release_data()
+    assert record.data == b"" and record.content_hash, "Hash was lost when releasing the raw bytes!"
@@ -0,0 +1,272 @@
+"""
+Test Script: test_pipeline.py
+Description: Tests the `IngestPipeline` class for staged processing, skipping unchanged files and removing deleted notes.
+
+Run Instructions:
+    pytest test_pipeline.py
+
+Reset Instructions:
+    No reset is necessary as the test writes only to pytest's temporary directory.
+"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from dedup_index import ChunkDedupIndex
+from file_processor import FileProcessor
+from manifest import NoteManifest
+from pipeline import IngestPipeline
+
+
+class ListScanner:
+    """Stand-in scanner streaming a fixed list of files."""
+
+    def __init__(self, files):
+        self.files = files
+
+    async def iter_files(self, max_workers=8):
+        for file_path in self.files:
+            yield file_path
+
+
+class RecordingClient:
+    """Stand-in LLM client recording stored and deleted ids."""
+
+    def __init__(self):
+        self.stored = []
+        self.deleted = []
+        self.updated = []
+
+    async def generate_embeddings(self, texts, metadatas):
+        return [[float(len(text))] for text in texts]
+
+    async def store_embeddings(self, doc_ids, documents, metadatas, embeddings, on_written=None):
+        self.stored.extend(doc_ids)
+        on_written()
+
+    async def update_metadata(self, doc_ids, metadatas):
+        self.updated.extend(doc_ids)
+
+
+class StubProcessor:
+    """Stand-in processor splitting each file into one chunk per line."""
+
+    def __init__(self):
+        self.llm_client = RecordingClient()
+        self.flushed = False
+
+    def should_process_file(self, file_path):
+        return file_path.suffix == ".md"
+
+    def prepare_chunks(self, record):
+        lines = record.content.splitlines()
+        return [(f"{record.path}_{n}", {"chunk": line, "metadata": {}}) for n, line in enumerate(lines, 1)]
+
+    def deduplicate(self, chunks):
+        return chunks
+
+    def confirm_chunks(self, chunk_ids, on_stored):
+        on_stored()
+
+    async def discard_chunks(self, chunk_ids):
+        pass
+
+    async def update_chunks(self, chunks):
+        await self.llm_client.update_metadata([chunk_id for chunk_id, _ in chunks], [data["metadata"] for _, data in chunks])
+
+    async def delete_chunks(self, chunk_ids):
+        self.llm_client.deleted.extend(chunk_ids)
+
+    async def flush(self):
+        self.flushed = True
+
+
+class HashingProcessor(StubProcessor):
+    """Stand-in processor with content-derived chunk ids and offsets, like `FileProcessor`."""
+
+    def prepare_chunks(self, record):
+        chunks, position = [], 0
+        for line in record.content.splitlines():
+            start = record.content.index(line, position)
+            position = start + len(line)
+            chunks.append((f"{record.path}#{line}", {"chunk": line, "metadata": {"start": start, "end": position}}))
+        return chunks
+
+
+def make_config():
+    return SimpleNamespace(
+        pipeline_queue_size=2, pipeline_read_workers=2, pipeline_chunk_workers=1,
+        pipeline_embed_workers=2, pipeline_store_workers=1, pipeline_log_interval=60, scan_workers=1
+    )
+
+
+def test_pipeline_indexes_and_skips_unchanged(tmp_path):
+    files = []
+    for i in range(5):
+        note = tmp_path / f"note{i}.md"
+        note.write_text(f"line one {i}\nline two {i}")
+        files.append(note)
+    (tmp_path / "image.png").write_text("skip")
+    manifest = NoteManifest(tmp_path / "manifest.json")
+
+    processor = StubProcessor()
+    summary = asyncio.run(IngestPipeline(make_config(), ListScanner(files + [tmp_path / "image.png"]), processor, manifest).run())
+    assert summary["indexed"] == 5 and summary["unchanged"] == 0, f"Unexpected first run: {summary}"
+    assert len(processor.llm_client.stored) == 10 and processor.flushed, "Chunks were not stored and flushed!"
+
+    # Second run: nothing changed, one note removed
+    processor = StubProcessor()
+    summary = asyncio.run(IngestPipeline(make_config(), ListScanner(files[1:]), processor, NoteManifest(tmp_path / "manifest.json")).run())
+    assert summary == {"indexed": 0, "unchanged": 4, "failed": 0, "removed": 1}, f"Unexpected second run: {summary}"
+    assert processor.llm_client.deleted == [f"{files[0]}_1", f"{files[0]}_2"], "Removed note's chunks were not deleted!"
+
+
+def test_pipeline_keeps_notes_under_unscanned_directories(tmp_path):
+    (tmp_path / "locked").mkdir()
+    notes = [tmp_path / "locked" / "a.md", tmp_path / "locked-old.md"]
+    for note in notes:
+        note.write_text("line")
+    asyncio.run(IngestPipeline(make_config(), ListScanner(notes), StubProcessor(), NoteManifest(tmp_path / "m.json")).run())
+
+    # The "locked" directory could not be listed; only the note outside it is gone
+    scanner = ListScanner([])
+    scanner.failed_directories = [str(tmp_path / "locked")]
+    summary = asyncio.run(IngestPipeline(make_config(), scanner, StubProcessor(), NoteManifest(tmp_path / "m.json")).run())
+    assert summary["removed"] == 1, f"Notes under an unscanned directory were removed: {summary}"
+    assert str(notes[0]) in NoteManifest(tmp_path / "m.json").entries
+
+
+class FailingWriteClient(RecordingClient):
+    """Stand-in LLM client whose vector-store writes never succeed."""
+
+    async def store_embeddings(self, doc_ids, documents, metadatas, embeddings, on_written=None):
+        self.stored.extend(doc_ids)
+
+
+class FailingFlushProcessor(StubProcessor):
+    """Stand-in processor whose final flush fails like an unavailable vector store."""
+
+    def __init__(self):
+        super().__init__()
+        self.llm_client = FailingWriteClient()
+
+    async def flush(self):
+        raise OSError("vector store unavailable")
+
+
+def test_pipeline_records_files_only_after_their_rows_are_written(tmp_path):
+    note = tmp_path / "note.md"
+    note.write_text("alpha")
+    with pytest.raises(OSError):
+        asyncio.run(IngestPipeline(make_config(), ListScanner([note]), FailingFlushProcessor(), NoteManifest(tmp_path / "m.json")).run())
+    assert str(note) not in NoteManifest(tmp_path / "m.json").entries, "A file whose rows were lost was recorded!"
+
+
+def test_pipeline_reports_failures(tmp_path):
+    corrupt = tmp_path / "corrupt.md"
+    corrupt.write_bytes(b"\xff\xfe")
+    pipeline = IngestPipeline(make_config(), ListScanner([corrupt]), StubProcessor(), NoteManifest(tmp_path / "m.json"))
+    summary = asyncio.run(pipeline.run())
+    assert summary["failed"] == 1 and summary["indexed"] == 0, f"Failure was not reported: {summary}"
+    assert pipeline.first_file_seconds is not None, "Time to the first scanned file was not recorded!"
+
+
+def test_pipeline_embeds_only_changed_chunks(tmp_path):
+    note = tmp_path / "note.md"
+    note.write_text("alpha\nbeta\ngamma")
+    asyncio.run(IngestPipeline(make_config(), ListScanner([note]), HashingProcessor(), NoteManifest(tmp_path / "m.json")).run())
+
+    # Insert a paragraph at the top and drop the last one
+    note.write_text("intro\nalpha\nbeta\n")
+    processor = HashingProcessor()
+    summary = asyncio.run(IngestPipeline(make_config(), ListScanner([note]), processor, NoteManifest(tmp_path / "m.json")).run())
+
+    client = processor.llm_client
+    assert summary["indexed"] == 1, f"Changed note was not indexed: {summary}"
+    assert client.stored == [f"{note}#intro"], f"Unchanged chunks were re-embedded: {client.stored}"
+    assert client.deleted == [f"{note}#gamma"], f"Vanished chunk was not deleted: {client.deleted}"
+    assert sorted(client.updated) == [f"{note}#alpha", f"{note}#beta"], "Moved chunks were not refreshed!"
+    assert NoteManifest(tmp_path / "m.json").chunk_ids(note) == [f"{note}#intro", f"{note}#alpha", f"{note}#beta"]
+
+
+class FailingEncodeClient(RecordingClient):
+    """Stand-in LLM client whose encoder is down."""
+
+    async def generate_embeddings(self, texts, metadatas):
+        raise RuntimeError("encoder unavailable")
+
+
+def test_pipeline_keeps_old_vectors_until_the_new_rows_are_written(tmp_path):
+    note = tmp_path / "note.md"
+    note.write_text("alpha\nbeta")
+    asyncio.run(IngestPipeline(make_config(), ListScanner([note]), HashingProcessor(), NoteManifest(tmp_path / "m.json")).run())
+    note.write_text("alpha\ngamma")
+
+    for client in (FailingEncodeClient(), FailingWriteClient()):
+        processor = HashingProcessor()
+        processor.llm_client = client
+        asyncio.run(IngestPipeline(make_config(), ListScanner([note]), processor, NoteManifest(tmp_path / "m.json")).run())
+        assert client.deleted == [], f"Old vectors were deleted before their replacements were written: {client.deleted}"
+        assert NoteManifest(tmp_path / "m.json").chunk_ids(note) == [f"{note}#alpha", f"{note}#beta"]
+
+
+class FirstFileFailingClient(RecordingClient):
+    """Stand-in LLM client whose writes of one file's rows fail."""
+
+    def __init__(self, failing_path):
+        super().__init__()
+        self.failing_path = str(failing_path)
+
+    async def store_embeddings(self, doc_ids, documents, metadatas, embeddings, on_written=None):
+        if any(doc_id.startswith(self.failing_path) for doc_id in doc_ids):
+            await asyncio.sleep(0.05)  # Let the other file deduplicate against the row meanwhile
+            raise OSError("vector store unavailable")
+        await super().store_embeddings(doc_ids, documents, metadatas, embeddings, on_written)
+
+    async def delete_embeddings(self, doc_ids):
+        self.deleted.extend(doc_ids)
+
+
+class DedupProcessor(HashingProcessor):
+    """Stand-in processor deduplicating through a real `ChunkDedupIndex`, like `FileProcessor`."""
+
+    deduplicate = FileProcessor.deduplicate
+    confirm_chunks = FileProcessor.confirm_chunks
+    discard_chunks = FileProcessor.discard_chunks
+
+    def __init__(self, index_path, client):
+        super().__init__()
+        self.llm_client = client
+        self.dedup_index = ChunkDedupIndex(index_path)
+
+    def prepare_chunks(self, record):
+        chunks = super().prepare_chunks(record)
+        for _, chunk_data in chunks:
+            chunk_data["type"] = "text"
+            chunk_data["metadata"]["file_path"] = str(record.path)
+        return chunks
+
+    async def flush(self):
+        self.dedup_index.save()
+
+
+def test_duplicate_is_not_recorded_when_the_shared_row_is_not_written(tmp_path):
+    first, duplicate = tmp_path / "a.md", tmp_path / "b.md"
+    first.write_text("shared")
+    duplicate.write_text("shared")
+
+    client = FirstFileFailingClient(first)
+    summary = asyncio.run(IngestPipeline(
+        make_config(), ListScanner([first, duplicate]), DedupProcessor(tmp_path / "index.json", client), NoteManifest(tmp_path / "m.json")
+    ).run())
+    assert summary["failed"] == 1 and client.stored == [], f"Unexpected first run: {summary}, {client.stored}"
+    assert NoteManifest(tmp_path / "m.json").entries == {}, "A duplicate of an unwritten row was recorded as stored!"
+    assert ChunkDedupIndex(tmp_path / "index.json").entries == {}, "The unwritten row was saved in the dedup index!"
+
+    # With the store back, the shared content is embedded once and both files are recorded
+    client = RecordingClient()
+    asyncio.run(IngestPipeline(
+        make_config(), ListScanner([first, duplicate]), DedupProcessor(tmp_path / "index.json", client), NoteManifest(tmp_path / "m.json")
+    ).run())
+    assert client.stored == [f"{first}#shared"], f"Shared content was not stored once: {client.stored}"
+    assert set(NoteManifest(tmp_path / "m.json").entries) == {str(first), str(duplicate)}
@@ -0,0 +1,91 @@
+"""
+Test Script: test_resources.py
+Description: Tests the `Resources` registry for sharing one model and vector store between components and for its startup, warm, flush and shutdown lifecycle.
+
+Run Instructions:
+    pytest test_resources.py
+
+Reset Instructions:
+    No reset is necessary as the test writes only to pytest's temporary directory.
+"""
+
+import asyncio
+import numpy as np
+import resources as resources_module
+from file_processor import FileProcessor
+from llm_client import LLMClient
+from resources import Resources
+
+
+class RecordingBackend:
+    """Stand-in model backend recording its lifecycle."""
+
+    def __init__(self):
+        self.loaded = False
+        self.closed = False
+
+    def load(self):
+        self.loaded = True
+
+    def encode(self, texts, batch_size):
+        return np.array([[float(len(text))] for text in texts])
+
+    def close(self):
+        self.closed = True
+
+
+class RecordingCollection:
+    """Stand-in Chroma collection recording upserted ids."""
+
+    def __init__(self):
+        self.ids = []
+
+    def upsert(self, ids, documents, metadatas, embeddings):
+        self.ids.extend(ids)
+
+
+def test_components_share_one_set_of_resources(resources):
+    first = FileProcessor(resources.config, resources)
+    second = FileProcessor(resources.config, resources)
+    assert first.llm_client.embedding_model is second.llm_client.embedding_model is resources.embedding_model
+    assert first.llm_client.embedding_batcher is second.llm_client.embedding_batcher
+    assert first.dedup_index is second.dedup_index is resources.dedup_index
+
+    first.close()
+    assert resources.running, "Closing a processor shut down the shared resources!"
+
+
+def test_lifecycle(session_config, monkeypatch):
+    collection = RecordingCollection()
+    monkeypatch.setattr(resources_module, "get_chroma_collection", lambda config: collection)
+    monkeypatch.setattr(resources_module, "get_chroma_client", lambda persist_directory: object())
+    monkeypatch.setattr(session_config, "embedding_cache_enabled", False)
+    monkeypatch.setattr(session_config, "vector_store_write_mode", "upsert")
+
+    shared = Resources(session_config)
+    assert shared.startup() is shared and shared.startup().embedding_model is shared.embedding_model
+    backend = shared.embedding_model.backend = RecordingBackend()
+    monkeypatch.setattr(shared.embedding_model, "get_tokenizer", lambda: None)
+
+    shared.warm()
+    assert backend.loaded and shared.vector_store is collection, "Warm-up did not load the model and open the store!"
+
+    client = LLMClient(session_config, shared)
+
+    async def store():
+        embeddings = await client.generate_embeddings(["a", "bb"], [{}, {}])
+        await client.store_embeddings(["id1", "id2"], ["a", "bb"], [{}, {}], embeddings)
+        return await client.flush()
+
+    assert asyncio.run(store()) == 2 and collection.ids == ["id1", "id2"], "Buffered rows were not flushed!"
+
+    shared.shutdown()
+    assert backend.closed and not shared.running
+    assert shared.startup().embedding_model.backend is not backend, "Startup after shutdown reused the closed model!"
+    shared.shutdown()
+
+
+def test_client_without_resources_owns_them(session_config):
+    client = LLMClient(session_config)
+    client.close()
+    assert not client.resources.running, "A client's own resources were not released on close!"
@@ -9,8 +9,13 @@ Reset Instructions:
     Remove the `test_dir` directory after running the test.
 """
 
+import asyncio
+import threading
+import time
+import pytest
 from pathlib import Path
-from scanner import DirectoryScanner
+from note_record import NoteRecord
+from scanner import DirectoryScanner, scan_directory_entries
 
 def test_scanner():
     test_dir = Path("test_dir")
@@ -25,7 +30,7 @@ def test_scanner():
     scanner = DirectoryScanner(test_dir, {".md", ".txt", ".yaml"}, set())
 
     # Scan and split files
-    yaml_files, non_yaml_files = scanner.scan_and_split()
+    yaml_files, non_yaml_files = asyncio.run(scanner.scan_and_split())
     assert len(yaml_files) == 2, "Failed to detect YAML files!"
     assert len(non_yaml_files) == 1, "Failed to detect non-YAML files!"
 
@@ -34,3 +39,77 @@ def test_scanner():
         file.unlink()
     test_dir.rmdir()
     assert not test_dir.exists(), "Test directory was not removed!"
+
+
+def test_iter_files_prunes_ignored_directories(tmp_path):
+    (tmp_path / "notes" / "deep").mkdir(parents=True)
+    (tmp_path / ".git").mkdir()
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "top.md").write_text("Top")
+    (tmp_path / "notes" / "a.md").write_text("A")
+    (tmp_path / "notes" / "deep" / "b.txt").write_text("B")
+    (tmp_path / "notes" / "image.png").write_text("not a note")
+    (tmp_path / ".git" / "HEAD.md").write_text("ignored")
+    (tmp_path / "node_modules" / "readme.md").write_text("ignored")
+
+    scanner = DirectoryScanner(tmp_path, {".md", ".txt"}, {".git", "node_modules"})
+
+    async def collect():
+        return {path.relative_to(tmp_path).as_posix() async for path in scanner.iter_files(max_workers=2)}
+
+    found = asyncio.run(collect())
+    assert found == {"top.md", "notes/a.md", "notes/deep/b.txt"}, f"Unexpected scan result: {found}"
+
+
+def test_unreadable_directories_are_reported(tmp_path):
+    failed = []
+    assert scan_directory_entries(str(tmp_path / "gone"), {".md"}, set(), failed) == ([], [])
+    assert failed == [str(tmp_path / "gone")], "Unlistable directory was not reported!"
+
+    scanner = DirectoryScanner(tmp_path / "unmounted", {".md"}, set())
+
+    async def collect():
+        return [path async for path in scanner.iter_files()]
+
+    with pytest.raises(OSError):
+        asyncio.run(collect())
+
+
+def test_scan_and_split_loads_records_once(tmp_path):
+    (tmp_path / "with_yaml.md").write_text("---\ntitle: Test\n---\nBody")
+    (tmp_path / "plain.md").write_text("Just text")
+
+    scanner = DirectoryScanner(tmp_path, {".md"}, set())
+    yaml_records, plain_records = asyncio.run(scanner.scan_and_split(load_records=True))
+
+    assert [record.path.name for record in yaml_records] == ["with_yaml.md"], "YAML record misclassified!"
+    assert [record.path.name for record in plain_records] == ["plain.md"], "Plain record misclassified!"
+    assert yaml_records[0].frontmatter == {"title": "Test"}, "Frontmatter was not carried with the record!"
+
+
+def test_load_records_skips_unreadable_files_and_bounds_reads(tmp_path, monkeypatch):
+    paths = []
+    for n in range(6):
+        paths.append(tmp_path / f"note{n}.md")
+        paths[-1].write_text(f"Note {n}")
+    paths.insert(2, tmp_path / "deleted.md")
+
+    active, peak, lock = [0], [0], threading.Lock()
+    original_load = NoteRecord.load.__func__
+
+    def counting_load(cls, path):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            time.sleep(0.01)
+            return original_load(cls, path)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(NoteRecord, "load", classmethod(counting_load))
+    records = asyncio.run(DirectoryScanner.load_records(paths, max_concurrent_reads=2))
+
+    assert [record.path.name for record in records] == [f"note{n}.md" for n in range(6)], "Unreadable file was not skipped!"
+    assert peak[0] <= 2, f"{peak[0]} reads ran at once!"
@@ -0,0 +1,159 @@
+"""
+Test Script: test_search.py
+Description: Tests `NoteSearcher` for ranked results, metadata filters, small collections and the query-embedding cache.
+
+Run Instructions:
+    pytest test_search.py
+
+Reset Instructions:
+    No reset is necessary as the test uses an in-memory model and collection.
+"""
+
+import sys
+from types import ModuleType, SimpleNamespace
+
+import pytest
+from search import NoteSearcher, QueryEmbeddingCache
+
+
+class NoDatapointsException(Exception):
+    """Raised like chromadb 0.3 when no row matches a `where` filter."""
+
+
+class NotEnoughElementsException(Exception):
+    """Raised like chromadb's hnswlib index when more results are requested than it holds."""
+
+
+@pytest.fixture(autouse=True)
+def chromadb_errors(monkeypatch):
+    """Provide `chromadb.errors` with the exception the searcher catches."""
+    errors = ModuleType("chromadb.errors")
+    errors.NoDatapointsException = NoDatapointsException
+    monkeypatch.setitem(sys.modules, "chromadb", ModuleType("chromadb"))
+    monkeypatch.setitem(sys.modules, "chromadb.errors", errors)
+
+
+class CountingModel:
+    """Stand-in model that embeds a query as its length and counts encode calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode_queries(self, queries):
+        self.calls += 1
+        return [[float(len(query))] for query in queries]
+
+
+class ListCollection:
+    """
+    Stand-in collection returning stored rows in order, honouring `where` and `n_results`.
+
+    Like chromadb 0.3 with hnswlib, it raises when more results are requested than
+    the collection holds or when nothing matches `where`, and returns fewer rows
+    only when the `where` matches are fewer than `n_results`.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.requests = []
+
+    def count(self):
+        return len(self.rows)
+
+    def query(self, query_embeddings, n_results, where=None, include=None):
+        self.requests.append(n_results)
+        rows = [row for row in self.rows if not where or all(row[2].get(k) == v for k, v in where.items())]
+        if where and not rows:
+            raise NoDatapointsException(f"No datapoints found for the supplied filter {where}")
+        if n_results > len(self.rows):
+            raise NotEnoughElementsException(
+                f"Number of requested results {n_results} cannot be greater than number of elements in index {len(self.rows)}"
+            )
+        rows = rows[:n_results]
+        return {
+            "ids": [[row[0] for row in rows]],
+            "documents": [[row[1] for row in rows]],
+            "metadatas": [[row[2] for row in rows]],
+            "distances": [[float(n) for n in range(len(rows))]],
+        }
+
+
+def make_config():
+    return SimpleNamespace(
+        vault_directory="/vault", search_top_k=2, search_query_cache_size=8,
+        search_oversample=1, search_max_candidates=100
+    )
+
+
+def make_rows():
+    rows = []
+    for n in range(10):
+        folder = "projects" if n >= 6 else "daily"
+        rows.append((f"id{n}", f"chunk {n}", {
+            "file_path": f"/vault/{folder}/note{n}.md", "chunk_type": "code" if n % 2 else "text",
+            "start": n * 10, "end": n * 10 + 5, "tags": "ai, python" if n == 9 else "ai",
+        }))
+    return rows
+
+
+def test_search_returns_ranked_chunks_with_offsets():
+    searcher = NoteSearcher(make_config(), CountingModel(), ListCollection(make_rows()))
+    results = searcher.search("hello")
+
+    assert [result["id"] for result in results] == ["id0", "id1"], f"Unexpected ranking: {results}"
+    assert results[0]["file_path"] == "/vault/daily/note0.md" and results[0]["start"] == 0, "Source was not returned!"
+
+
+def test_search_filters_by_type_path_and_tags():
+    collection = ListCollection(make_rows())
+    searcher = NoteSearcher(make_config(), CountingModel(), collection)
+
+    assert {r["chunk_type"] for r in searcher.search("q", k=3, chunk_type="code")} == {"code"}, "Type filter failed!"
+    results = searcher.search("q", k=5, path_prefix="projects", tags=["#python"])
+    assert [result["id"] for result in results] == ["id9"], f"Path/tag filters failed: {results}"
+    assert collection.requests[-1] > 5, "Candidates were not widened for post-filters!"
+
+
+def test_search_never_requests_more_than_the_collection_holds():
+    collection = ListCollection(make_rows()[:3])
+    searcher = NoteSearcher(make_config(), CountingModel(), collection)
+
+    assert [result["id"] for result in searcher.search("q", k=5)] == ["id0", "id1", "id2"]
+    assert [result["id"] for result in searcher.search("q", k=5, tags=["ai"])] == ["id0", "id1", "id2"]
+    assert max(collection.requests) == 3, f"Requested more rows than stored: {collection.requests}"
+
+
+def test_search_handles_empty_collection_and_empty_filter_match():
+    assert NoteSearcher(make_config(), CountingModel(), ListCollection([])).search("q") == []
+
+    rows = [row for row in make_rows() if row[2]["chunk_type"] == "text"]
+    assert NoteSearcher(make_config(), CountingModel(), ListCollection(rows)).search("q", chunk_type="code") == []
+
+
+def test_path_prefix_matches_whole_directories():
+    rows = make_rows()
+    rows.insert(0, ("other", "chunk", {"file_path": "/vault/projects-old/note.md", "chunk_type": "text"}))
+    searcher = NoteSearcher(make_config(), CountingModel(), ListCollection(rows))
+
+    results = searcher.search("q", k=20, path_prefix="projects/")
+    assert [result["id"] for result in results] == ["id6", "id7", "id8", "id9"], f"Prefix matched a sibling: {results}"
+
+
+def test_repeated_queries_are_embedded_once():
+    model = CountingModel()
+    searcher = NoteSearcher(make_config(), model, ListCollection(make_rows()))
+    searcher.search("same  query")
+    searcher.search("same query")
+
+    assert model.calls == 1, "Repeated query was embedded again!"
+    assert searcher.query_cache.hits == 1, "Cache hit was not counted!"
+
+
+def test_query_cache_evicts_least_recently_used():
+    cache = QueryEmbeddingCache(max_entries=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    cache.get("a")
+    cache.put("c", [3.0])
+
+    assert cache.get("b") is None and cache.get("a") == [1.0], "LRU order was not respected!"
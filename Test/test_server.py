@@ -0,0 +1,131 @@
+"""
+Test Script: test_server.py
+Description: Tests `SearchServer` endpoints, batching of concurrent query embeddings and latency reporting.
+
+Run Instructions:
+    pytest test_server.py
+
+Reset Instructions:
+    No reset is necessary as the server binds a free local port and uses an in-memory searcher.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from search import NoteSearcher
+from server import LatencyTracker, SearchServer
+
+
+class CountingModel:
+    """Stand-in model counting encode calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def load_model(self):
+        pass
+
+    def encode_queries(self, queries):
+        self.calls += 1
+        return [[float(len(query))] for query in queries]
+
+
+class OneRowCollection:
+    """Stand-in collection holding a single chunk."""
+
+    def count(self):
+        return 1
+
+    def query(self, query_embeddings, n_results, where=None, include=None):
+        return {"ids": [["a.md#1"]], "documents": [["hello"]], "distances": [[0.5]],
+                "metadatas": [[{"file_path": "/vault/a.md", "chunk_type": "text", "start": 0, "end": 5}]]}
+
+
+def make_config():
+    return SimpleNamespace(
+        vault_directory="/vault", search_top_k=5, search_query_cache_size=8, search_oversample=4,
+        search_max_candidates=100, embedding_batch_size=64, server_query_max_latency_ms=20,
+        server_latency_window=100, server_host="127.0.0.1", server_port=0
+    )
+
+
+async def request(port, method, target, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(payload)}\r\n"
+                 f"Connection: close\r\n\r\n".encode() + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_endpoints_batch_queries_and_report_latency():
+    model = CountingModel()
+    reindexed = []
+
+    async def reindex():
+        reindexed.append(True)
+        return {"indexed": 1}
+
+    async def scenario():
+        server = SearchServer(make_config(), NoteSearcher(make_config(), model, OneRowCollection()), reindex)
+        _, port = await server.start()
+        try:
+            searches = await asyncio.gather(*(request(port, "GET", f"/search?q=query{n}&k=1") for n in range(8)))
+            posted = await request(port, "POST", "/search", {"q": "query0", "tags": []})
+            started = await request(port, "POST", "/reindex")
+            await asyncio.sleep(0.05)
+            health = await request(port, "GET", "/health")
+            missing = await request(port, "GET", "/search")
+            malformed = [
+                await request(port, "POST", "/search", body) for body in (["q"], {"q": "query0", "tags": 3})
+            ]
+            unknown = await request(port, "GET", "/nope")
+        finally:
+            await server.close()
+        return searches, posted, started, health, missing, malformed, unknown
+
+    searches, posted, started, health, missing, malformed, unknown = asyncio.run(scenario())
+
+    assert all(status == 200 and body["results"][0]["id"] == "a.md#1" for status, body in searches), "Search failed!"
+    assert model.calls < 8, f"Concurrent queries were not batched: {model.calls} encode calls"
+    assert posted[0] == 200 and health[1]["query_cache"]["hits"] >= 1, "Repeated query was not cached!"
+    assert started == (202, {"started": True}) and reindexed, "Re-index was not started!"
+    assert health[1]["latency"]["/search"]["count"] == 9, f"Latency was not tracked: {health[1]['latency']}"
+    assert health[1]["last_reindex"]["indexed"] == 1, "Re-index summary was not reported!"
+    assert missing[0] == 400 and unknown[0] == 404, "Errors were not reported with HTTP status codes!"
+    assert [status for status, _ in malformed] == [400, 400], f"Malformed search bodies were not rejected: {malformed}"
+
+
+def test_close_cancels_a_running_reindex():
+    cancelled = []
+
+    async def reindex():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        server = SearchServer(make_config(), NoteSearcher(make_config(), CountingModel(), OneRowCollection()), reindex)
+        _, port = await server.start()
+        try:
+            started = await request(port, "POST", "/reindex")
+            await asyncio.sleep(0.01)
+        finally:
+            await server.close()
+        return started
+
+    assert asyncio.run(scenario())[0] == 202 and cancelled, "Closing the server did not cancel the re-index!"
+
+
+def test_latency_percentiles():
+    tracker = LatencyTracker(window=100)
+    for n in range(1, 101):
+        tracker.record("/search", n / 1000)
+
+    assert tracker.summary()["/search"] == {"count": 100, "p50_ms": 50.0, "p95_ms": 95.0}, "Bad percentiles!"
@@ -0,0 +1,70 @@
+"""
+Test Script: test_token_chunker.py
+Description: Tests `chunk_content_by_tokens` for token budgets, heading boundaries, overlap and code blocks.
+
+Run Instructions:
+    pytest test_token_chunker.py
+
+Reset Instructions:
+    No reset is necessary as the test uses an in-memory whitespace tokenizer.
+"""
+
+import re
+
+from token_chunker import chunk_content_by_tokens, chunk_token_ids
+
+
+class WhitespaceTokenizer:
+    """
+    Stand-in for a fast tokenizer: one token per whitespace-separated word.
+    """
+
+    def __init__(self):
+        self.vocab = {}
+        self.calls = 0
+
+    def __call__(self, texts, add_special_tokens=False, return_offsets_mapping=False):
+        self.calls += 1
+        input_ids, offsets = [], []
+        for text in texts:
+            words = list(re.finditer(r"\S+", text))
+            input_ids.append([self.vocab.setdefault(word.group(), len(self.vocab)) for word in words])
+            offsets.append([(word.start(), word.end()) for word in words])
+        return {"input_ids": input_ids, "offset_mapping": offsets}
+
+
+def test_chunks_respect_token_budget_and_offsets():
+    content = "One two three. Four five six. Seven eight nine. Ten eleven twelve."
+    tokenizer = WhitespaceTokenizer()
+    chunks = list(chunk_content_by_tokens(content, {"title": "T"}, tokenizer, max_tokens=6))
+
+    assert tokenizer.calls == 1, "Segments were not tokenized in one batched call!"
+    assert [chunk["chunk"] for chunk in chunks] == [
+        "One two three. Four five six.",
+        "Seven eight nine. Ten eleven twelve.",
+    ], "Sentences were not packed greedily!"
+    for chunk in chunks:
+        assert content[chunk["start"]:chunk["end"]] == chunk["chunk"], f"Offsets do not match chunk: {chunk}"
+        assert len(chunk["token_ids"]) <= 6, "Chunk exceeds the token budget!"
+
+
+def test_headings_start_new_chunks_and_overlap_is_carried():
+    content = "# Title\nAlpha beta. Gamma delta. Epsilon zeta.\n## Next\nEta theta."
+    chunks = list(chunk_content_by_tokens(content, {}, WhitespaceTokenizer(), max_tokens=6, overlap_tokens=2))
+
+    texts = [chunk["chunk"] for chunk in chunks]
+    assert texts[0].startswith("# Title"), "First chunk should start at the heading!"
+    assert any(text.startswith("Gamma delta.") for text in texts[1:]), "Overlap was not carried!"
+    assert any(text.startswith("## Next") for text in texts), "Heading did not start a new chunk!"
+
+
+def test_long_segments_and_code_blocks_are_split_separately():
+    content = "word " * 10 + "\n```python\n# comment\nprint(1)\n```\nTail."
+    chunks = list(chunk_content_by_tokens(content, {}, WhitespaceTokenizer(), max_tokens=4))
+
+    text_chunks = [chunk for chunk in chunks if chunk["type"] == "text"]
+    code_chunks = [chunk for chunk in chunks if chunk["type"] == "code"]
+    assert [len(chunk["token_ids"]) for chunk in text_chunks[:3]] == [4, 4, 2], "Long segment was not windowed!"
+    assert any("# comment" in chunk["chunk"] for chunk in code_chunks), "Code comment was not kept in a code chunk!"
+    assert chunk_token_ids([(str(n), chunk) for n, chunk in enumerate(chunks)]) is not None, "Token ids were dropped!"
+    assert chunk_token_ids([("1", {"chunk": "x"})]) is None, "Character chunks should have no token ids!"
@@ -0,0 +1,108 @@
+"""
+Test Script: test_vector_store_writer.py
+Description: Tests the `VectorStoreWriter` class for batched, columnar writes to the vector store.
+
+Run Instructions:
+    pytest test_vector_store_writer.py
+
+Reset Instructions:
+    No reset is necessary as the test writes to an in-memory stand-in collection.
+"""
+
+import asyncio
+import time
+from vector_store_writer import VectorStoreWriter, sanitize_metadata
+
+
+class RecordingCollection:
+    """Stand-in collection that records every add call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def add(self, ids, documents, metadatas, embeddings):
+        self.calls.append({"ids": ids, "documents": documents, "metadatas": metadatas, "embeddings": embeddings})
+
+
+def test_rows_are_written_in_batches():
+    collection = RecordingCollection()
+    writer = VectorStoreWriter(collection, batch_size=3, flush_interval_ms=10_000)
+
+    async def run():
+        for i in range(7):
+            await writer.add(f"id{i}", f"doc {i}", {"n": i}, [float(i)])
+        return await writer.flush()
+
+    last_flush = asyncio.run(run())
+    assert [len(call["ids"]) for call in collection.calls] == [3, 3, 1], "Rows were not batched!"
+    assert last_flush == 1, "Final flush reported the wrong row count!"
+    assert writer.rows_written == 7 and writer.flushes == 3, "Flush statistics are wrong!"
+    assert collection.calls[1]["embeddings"] == [[3.0], [4.0], [5.0]], "Columns are out of order!"
+
+
+def test_interval_flushes_partial_batch():
+    collection = RecordingCollection()
+    writer = VectorStoreWriter(collection, batch_size=100, flush_interval_ms=1)
+
+    async def run():
+        await writer.add("id0", "doc", {}, [0.0])
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    assert len(collection.calls) == 1, "Buffered row was not flushed after the interval!"
+    assert len(writer) == 0, "Buffer was not emptied!"
+
+
+class FlakyCollection(RecordingCollection):
+    """Stand-in collection whose first write fails."""
+
+    def add(self, ids, documents, metadatas, embeddings):
+        if not self.calls:
+            self.calls.append(None)
+            raise OSError("store unavailable")
+        super().add(ids, documents, metadatas, embeddings)
+
+
+def test_failed_write_keeps_rows_for_retry():
+    collection = FlakyCollection()
+    writer = VectorStoreWriter(collection, batch_size=100, flush_interval_ms=1)
+    written = []
+
+    async def run():
+        await writer.add("id0", "doc", {}, [0.0], on_written=lambda: written.append("id0"))
+        await asyncio.sleep(0.05)  # The interval flush fails
+        assert len(writer) == 1 and written == [] and writer.last_error is not None
+        await writer.add("id1", "doc", {}, [1.0], on_written=lambda: written.append("id1"))
+        return await writer.flush()
+
+    assert asyncio.run(run()) == 2, "Rows of the failed write were not retried!"
+    assert collection.calls[1]["ids"] == ["id0", "id1"] and written == ["id0", "id1"]
+    assert writer.last_error is None
+
+
+class SlowCollection(RecordingCollection):
+    """Stand-in collection whose writes take a while."""
+
+    def add(self, ids, documents, metadatas, embeddings):
+        time.sleep(0.05)
+        super().add(ids, documents, metadatas, embeddings)
+
+
+def test_buffered_and_in_flight_rows_are_pending():
+    writer = VectorStoreWriter(SlowCollection(), batch_size=100, flush_interval_ms=10_000)
+
+    async def run():
+        await writer.add("id0", "doc", {}, [0.0])
+        assert writer.is_pending(["other", "id0"]) and not writer.is_pending(["other"])
+        flush = asyncio.create_task(writer.flush())
+        await asyncio.sleep(0.01)
+        assert len(writer) == 0 and writer.is_pending(["id0"]), "Row being written was not pending!"
+        await flush
+        assert not writer.is_pending(["id0"]), "Written row is still pending!"
+
+    asyncio.run(run())
+
+
+def test_sanitize_metadata():
+    metadata = sanitize_metadata({"tags": ["AI", "Learning"], "title": "Note", "draft": None, "count": 2})
+    assert metadata == {"tags": "AI, Learning", "title": "Note", "draft": "", "count": 2}, "Metadata not sanitized!"
@@ -0,0 +1,154 @@
+"""
+Test Script: test_watcher.py
+Description: Tests watch mode: event coalescing and debouncing, the inotify and polling watchers, and batch re-indexing.
+
+Run Instructions:
+    pytest test_watcher.py
+
+Reset Instructions:
+    No reset is necessary as the test writes only to pytest's temporary directory.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from manifest import NoteManifest
+from watcher import CHANGED, DELETED, ChangeCoalescer, InotifyWatcher, PollingWatcher, VaultWatcher
+
+
+def test_coalescer_merges_bursts_into_one_batch():
+    async def scenario():
+        coalescer = ChangeCoalescer(debounce_ms=50, max_delay_ms=1000)
+        for _ in range(5):
+            coalescer.add("a.md", CHANGED)
+            await asyncio.sleep(0.01)
+        coalescer.add("b.md", CHANGED)
+        coalescer.add("b.md", DELETED)
+        return await coalescer.next_batch()
+
+    assert asyncio.run(scenario()) == {"a.md": CHANGED, "b.md": DELETED}, "Events were not coalesced!"
+
+
+def test_coalescer_releases_batch_after_max_delay():
+    async def scenario():
+        coalescer = ChangeCoalescer(debounce_ms=50, max_delay_ms=100)
+
+        async def keep_saving():
+            for n in range(20):
+                coalescer.add(f"{n}.md", CHANGED)
+                await asyncio.sleep(0.02)
+
+        saver = asyncio.ensure_future(keep_saving())
+        await asyncio.sleep(0)
+        batch = await coalescer.next_batch()
+        saver.cancel()
+        return batch
+
+    assert 0 < len(asyncio.run(scenario())) < 20, "Batch was held open by continuous events!"
+
+
+async def collect_events(watcher_class, tmp_path, actions, **kwargs):
+    events = []
+    watcher = watcher_class(tmp_path, {".git"}, lambda path, kind: events.append((path, kind)), **kwargs)
+    watcher.start()
+    try:
+        await asyncio.sleep(0.1)
+        actions()
+        await asyncio.sleep(0.3)
+    finally:
+        watcher.close()
+    return events
+
+
+def make_changes(tmp_path):
+    def actions():
+        (tmp_path / "note.md").write_text("hello")
+        (tmp_path / "image.png").write_text("skip")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "inner.md").write_text("inner")
+        (tmp_path / "old.md").unlink()
+    return actions
+
+
+@pytest.mark.skipif(not InotifyWatcher.available(), reason="inotify is not available")
+def test_inotify_watcher_reports_changes(tmp_path):
+    (tmp_path / "old.md").write_text("old")
+    events = asyncio.run(collect_events(InotifyWatcher, tmp_path, make_changes(tmp_path), file_extensions={".md"}))
+
+    assert (str(tmp_path / "note.md"), CHANGED) in events, f"Saved note was not reported: {events}"
+    assert (str(tmp_path / "sub" / "inner.md"), CHANGED) in events, f"Note in new directory was missed: {events}"
+    assert (str(tmp_path / "old.md"), DELETED) in events, f"Deleted note was not reported: {events}"
+    assert all(not path.endswith(".png") for path, _ in events), "Filtered extension was reported!"
+
+
+def test_polling_watcher_reports_changes(tmp_path):
+    (tmp_path / "old.md").write_text("old")
+    events = asyncio.run(collect_events(
+        PollingWatcher, tmp_path, make_changes(tmp_path), interval=0.05, file_extensions={".md"}
+    ))
+
+    assert (str(tmp_path / "note.md"), CHANGED) in events, f"Saved note was not reported: {events}"
+    assert (str(tmp_path / "sub" / "inner.md"), CHANGED) in events, f"Note in new directory was missed: {events}"
+    assert (str(tmp_path / "old.md"), DELETED) in events, f"Deleted note was not reported: {events}"
+
+
+class RecordingProcessor:
+    """Stand-in processor with one chunk per line."""
+
+    def __init__(self):
+        self.llm_client = self
+        self.stored = []
+        self.deleted = []
+
+    def should_process_file(self, file_path):
+        return file_path.suffix == ".md"
+
+    def prepare_chunks(self, record):
+        return [(f"{record.path}#{line}", {"chunk": line, "metadata": {}}) for line in record.content.splitlines()]
+
+    async def generate_embeddings(self, texts, metadatas):
+        return [[0.0] for _ in texts]
+
+    async def store_embeddings(self, doc_ids, documents, metadatas, embeddings, on_written=None):
+        self.stored.extend(doc_ids)
+        on_written()
+
+    def deduplicate(self, chunks):
+        return chunks
+
+    def confirm_chunks(self, chunk_ids, on_stored):
+        on_stored()
+
+    async def discard_chunks(self, chunk_ids):
+        pass
+
+    async def delete_chunks(self, chunk_ids):
+        self.deleted.extend(chunk_ids)
+
+    async def flush(self):
+        pass
+
+
+def test_process_batch_reindexes_only_affected_files(tmp_path):
+    config = SimpleNamespace(
+        pipeline_queue_size=2, pipeline_read_workers=1, pipeline_chunk_workers=1, pipeline_embed_workers=1,
+        pipeline_store_workers=1, pipeline_log_interval=60, scan_workers=1,
+        watch_debounce_ms=10, watch_max_delay_ms=100
+    )
+    manifest = NoteManifest(tmp_path / "manifest.json")
+    manifest.record(tmp_path / "gone.md", 1.0, 3, "hash", [f"{tmp_path / 'gone.md'}#old"])
+    manifest.record(tmp_path / "untouched.md", 1.0, 3, "hash", ["untouched"])
+    (tmp_path / "note.md").write_text("first\nsecond")
+    processor = RecordingProcessor()
+
+    async def scenario():
+        watcher = VaultWatcher(config, None, processor, manifest)
+        return await watcher.process_batch({str(tmp_path / "note.md"): CHANGED, str(tmp_path / "gone.md"): DELETED})
+
+    summary = asyncio.run(scenario())
+    assert summary == {"indexed": 1, "unchanged": 0, "failed": 0, "removed": 1}, f"Unexpected summary: {summary}"
+    assert processor.stored == [f"{tmp_path / 'note.md'}#first", f"{tmp_path / 'note.md'}#second"]
+    assert processor.deleted == [f"{tmp_path / 'gone.md'}#old"], "Deleted note's chunks were not removed!"
+    assert NoteManifest(tmp_path / "manifest.json").chunk_ids(tmp_path / "untouched.md") == ["untouched"]
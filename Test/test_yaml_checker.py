@@ -9,7 +9,7 @@ Reset Instructions:
     No reset is necessary as the test operates only on mock data and does not create or modify files.
 """
 
-from yaml_checker import extract_yaml_metadata, split_yaml_files
+from yaml_checker import extract_yaml_metadata, parse_frontmatter, sniff_frontmatter, split_yaml_files
 from pathlib import Path
 
 def test_extract_yaml_metadata():
@@ -34,3 +34,38 @@ def test_split_yaml_files():
     detected_yaml_files, detected_non_yaml_files = split_yaml_files(all_files)
     assert set(detected_yaml_files) == set(yaml_files), "Failed to detect YAML files!"
     assert set(detected_non_yaml_files) == set(non_yaml_files), "Failed to detect non-YAML files!"
+
+
+def test_parse_frontmatter():
+    has_yaml, metadata, body, error = parse_frontmatter("---\ntitle: Note\ntags: [a, b]\n---\nBody text")
+    assert has_yaml and metadata == {"title": "Note", "tags": ["a", "b"]}, "Frontmatter was not parsed!"
+    assert body == "Body text" and error is None, "Body was not separated from the frontmatter!"
+
+    has_yaml, metadata, body, error = parse_frontmatter("No frontmatter here")
+    assert not has_yaml and metadata == {} and error is None, "Plain content was treated as frontmatter!"
+
+    has_yaml, _, _, error = parse_frontmatter("---Invalid YAML---\nBody text")
+    assert not has_yaml and error, "Malformed frontmatter was not reported!"
+
+
+def test_sniff_frontmatter_reads_only_the_header(tmp_path):
+    note = tmp_path / "large.md"
+    note.write_bytes(b"---\ntitle: Big\n---\n" + b"\xff" * 1_000_000)  # Body is not valid UTF-8
+    assert sniff_frontmatter(note) == (True, {"title": "Big"}), "Frontmatter was not found in the prefix!"
+
+    plain = tmp_path / "plain.md"
+    plain.write_bytes(b"# Heading\n" + b"\xff" * 1_000_000)
+    assert sniff_frontmatter(plain) == (False, {}), "File without frontmatter was misclassified!"
+
+
+def test_sniff_frontmatter_spanning_blocks_and_limit(tmp_path):
+    note = tmp_path / "long_header.md"
+    long_value = "x" * 10_000
+    note.write_text(f"---\ntitle: {long_value}\n---\nBody", encoding="utf-8")
+
+    assert sniff_frontmatter(note) == (True, {"title": long_value}), "Frontmatter spanning blocks was not parsed!"
+    assert sniff_frontmatter(note, max_header_bytes=1024) == (False, {}), "Header limit was not enforced!"
+
+    only_header = tmp_path / "only_header.md"
+    only_header.write_text("---\ntitle: Short\n---", encoding="utf-8")
+    assert sniff_frontmatter(only_header) == (True, {"title": "Short"}), "Delimiter at end of file was missed!"
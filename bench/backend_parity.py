@@ -0,0 +1,73 @@
+"""
+Speed and accuracy comparison of the CPU embedding backends.
+
+Encodes chunks of a synthetic vault with the fp32 "local" backend and with each
+candidate backend, and reports throughput and the cosine drift of every
+backend's embeddings from the fp32 ones. Pick the fastest backend whose drift
+your recall can tolerate.
+
+Run Instructions:
+    python bench/backend_parity.py [--backends quantized,onnx,openvino] [--model NAME]
+        [--texts N] [--threads N] [--output FILE]
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from vault_generator import make_note  # noqa: E402
+
+
+def sample_texts(count: int, seed: int = 0) -> list:
+    """
+    Build `count` chunk-sized texts from synthetic notes.
+    """
+    from chunker import chunk_content_with_metadata
+
+    rng = random.Random(seed)
+    texts = []
+    index = 0
+    while len(texts) < count:
+        note = make_note(rng, index, 100, 4000, 0.1, False)
+        texts.extend(chunk["chunk"] for chunk in chunk_content_with_metadata(note, {}, 500, 50))
+        index += 1
+    return texts[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backends against the fp32 model.")
+    parser.add_argument("--backends", default="quantized,onnx,openvino", help="Comma-separated backends to compare.")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="SentenceTransformer model name.")
+    parser.add_argument("--texts", type=int, default=512, help="Number of sample chunks.")
+    parser.add_argument("--batch-size", type=int, default=64, help="Encoder batch size.")
+    parser.add_argument("--threads", type=int, default=4, help="Intra-op threads per backend.")
+    parser.add_argument("--export-dir", type=Path, help="Where ONNX exports are kept.")
+    parser.add_argument("--output", type=Path, help="Optional JSON result file.")
+    args = parser.parse_args()
+
+    from embedding_backends import check_parity
+
+    texts = sample_texts(args.texts)
+    results = check_parity(args.model, args.backends.split(","), texts, args.batch_size, args.export_dir, args.threads)
+
+    print(f"{'backend':<10} {'texts/s':>10} {'speedup':>8} {'mean cos':>10} {'min cos':>10}")
+    baseline = results[0].get("texts_per_second")
+    for entry in results:
+        if "error" in entry:
+            print(f"{entry['backend']:<10} {entry['error']}")
+            continue
+        speedup = f"{entry['texts_per_second'] / baseline:.2f}x" if baseline else "-"
+        print(f"{entry['backend']:<10} {entry['texts_per_second']:>10} {speedup:>8} "
+              f"{entry['mean_cosine']:>10.5f} {entry['min_cosine']:>10.5f}")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"model": args.model, "texts": len(texts), "results": results}, indent=2))
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark for `chunker.chunk_content_with_metadata`.
+
+Builds synthetic notes from 1 KB to 10 MB with 0 to 1,000 fenced code blocks and
+times the single-pass chunker against the previous implementation, which
+rebuilt the whole content string for every code block.
+
+Run Instructions:
+    python bench/bench_chunker.py [--no-legacy] [--repeat N]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chunker import chunk_content_with_metadata  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+CODE_BLOCKS = [0, 10, 100, 1_000]
+CHUNK_SIZE = 500
+OVERLAP = 50
+
+
+def make_note(size: int, code_blocks: int) -> str:
+    """
+    Build a synthetic note of roughly `size` characters with evenly spaced code blocks.
+
+    Args:
+        size (int): Target length in characters.
+        code_blocks (int): Number of fenced code blocks.
+
+    Returns:
+        str: The synthetic note.
+    """
+    code = "```python\nfor i in range(10):\n    print(i)\n```\n"
+    sentence = "The quick brown fox jumps over the lazy dog. "
+    code_total = len(code) * code_blocks
+    text_total = max(size - code_total, 0)
+    gaps = code_blocks + 1
+    gap_text = (sentence * (text_total // (len(sentence) * gaps) + 1))[:text_total // gaps]
+    return gap_text + "".join(code + gap_text for _ in range(code_blocks))
+
+
+def legacy_chunk_content(content: str, metadata: dict, chunk_size: int, overlap: int = 0) -> list:
+    """
+    The previous chunker: blank out each code block by rebuilding the string, then slice.
+    """
+    chunks = []
+    code_blocks = [(m.start(), m.end(), m.group()) for m in re.finditer(r"```[\s\S]*?```", content)]
+    for start_idx, end_idx, code in code_blocks:
+        content = content[:start_idx] + " " * (end_idx - start_idx) + content[end_idx:]
+        chunks.append({"chunk": code, "type": "code", "metadata": metadata})
+    for i in range(0, len(content), chunk_size - overlap):
+        chunk = content[i:i + chunk_size].strip()
+        if chunk:
+            chunks.append({"chunk": chunk, "type": "text", "metadata": metadata})
+    return chunks
+
+
+def best_time(function, repeat: int) -> float:
+    """
+    Return the best wall time in seconds over `repeat` runs.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the note chunker.")
+    parser.add_argument("--no-legacy", action="store_true", help="Skip the previous implementation.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best time is reported.")
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'blocks':>7} {'chunks':>8} {'new ms':>10} {'MB/s':>8} {'legacy ms':>10} {'speedup':>8}")
+    for size in SIZES:
+        for code_blocks in CODE_BLOCKS:
+            note = make_note(size, code_blocks)
+            chunks = sum(1 for _ in chunk_content_with_metadata(note, {}, CHUNK_SIZE, OVERLAP))
+            new_time = best_time(lambda: sum(1 for _ in chunk_content_with_metadata(note, {}, CHUNK_SIZE, OVERLAP)), args.repeat)
+            throughput = len(note) / new_time / 1e6 if new_time else float("inf")
+
+            legacy_ms = speedup = "-"
+            if not args.no_legacy:
+                legacy_time = best_time(lambda: legacy_chunk_content(note, {}, CHUNK_SIZE, OVERLAP), args.repeat)
+                legacy_ms = f"{legacy_time * 1000:.2f}"
+                speedup = f"{legacy_time / new_time:.1f}x" if new_time else "-"
+            print(f"{len(note):>10} {code_blocks:>7} {chunks:>8} {new_time * 1000:>10.2f} {throughput:>8.1f} "
+                  f"{legacy_ms:>10} {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare two result files written by `bench/run_bench.py`.
+
+Prints the time of each stage in both runs and the speedup of the second run
+over the first; a speedup below 1.0 is a regression.
+
+Run Instructions:
+    python bench/compare.py BASELINE.json CANDIDATE.json [--threshold 0.9]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def load(path: Path) -> dict:
+    """
+    Read one result file.
+    """
+    return json.loads(Path(path).read_text())
+
+
+def compare(baseline: dict, candidate: dict) -> list:
+    """
+    Pair up the stages of two runs.
+
+    Args:
+        baseline (dict): The earlier run.
+        candidate (dict): The run being evaluated.
+
+    Returns:
+        list: (stage, baseline seconds, candidate seconds, speedup) rows; missing or skipped
+        stages have None in place of the numbers.
+    """
+    rows = []
+    for stage in list(dict.fromkeys([*baseline["results"], *candidate["results"]])):
+        before = baseline["results"].get(stage, {}).get("seconds")
+        after = candidate["results"].get(stage, {}).get("seconds")
+        speedup = before / after if before and after else None
+        rows.append((stage, before, after, speedup))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.9,
+                        help="Exit with status 1 if any stage's speedup falls below this; a failed stage always does.")
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    print(f"baseline:  {baseline.get('git_commit', '')[:10]} {baseline.get('timestamp', '')}")
+    print(f"candidate: {candidate.get('git_commit', '')[:10]} {candidate.get('timestamp', '')}")
+    print(f"{'stage':<10} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    regressed = False
+    for stage, before, after, speedup in compare(baseline, candidate):
+        before_ms = f"{before * 1000:.1f}" if before else "-"
+        after_ms = f"{after * 1000:.1f}" if after else "-"
+        if "error" in candidate["results"].get(stage, {}):
+            after_ms = "error"
+            regressed = True
+        ratio = f"{speedup:.2f}x" if speedup else "-"
+        print(f"{stage:<10} {before_ms:>10} {after_ms:>10} {ratio:>8}")
+        regressed = regressed or (speedup is not None and speedup < args.threshold)
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
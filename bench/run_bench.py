@@ -0,0 +1,328 @@
+"""
+End-to-end benchmark suite for the ingest hot paths.
+
+Generates a synthetic vault with `vault_generator` (or uses an existing one) and
+times each stage on it:
+
+    startup    fresh interpreter: import main and stream the first scanned file
+    scan       DirectoryScanner.scan_and_split
+    metadata   extract_metadata on every note
+    chunk      chunk_content_with_metadata on every note
+    encode     EmbeddingModel.generate_embeddings on the chunks
+    store      LLMClient.store_embeddings + flush into a temporary Chroma directory
+
+The encoder is either a deterministic hash-based stub (`--encoder stub`, the
+default), which isolates the cost of the code around the model, or a small local
+SentenceTransformer model. A stage whose dependencies are not installed is
+recorded as skipped; a stage that fails for any other reason is recorded as an
+error with its traceback, the remaining stages still run, and the script exits
+with status 1. Results are written as JSON so runs can be compared with
+`bench/compare.py`.
+
+Run Instructions:
+    python bench/run_bench.py [--vault DIR] [--notes N] [--note-size BYTES] [--code-density F]
+        [--frontmatter-ratio F] [--encoder stub|local] [--model NAME] [--repeat N] [--output FILE]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from vault_generator import add_vault_arguments, generate_vault  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+CHUNK_SIZE = 500
+OVERLAP = 50
+# Modules whose import alone takes seconds; none of them should load before the first embedding
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "chromadb")
+# Run in a fresh interpreter by `bench_startup`; prints timings as JSON
+STARTUP_SCRIPT = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from scanner import DirectoryScanner
+
+async def first_file():
+    async for _ in DirectoryScanner(sys.argv[1], {".md"}, {".git", ".obsidian", ".trash"}).iter_files():
+        return time.perf_counter()
+
+scanned = asyncio.run(first_file())
+print(json.dumps({"import": imported - started, "first_file": scanned - started,
+                  "heavy": [name for name in sys.argv[2:] if name in sys.modules]}))
+"""
+
+
+class StubEncoderBackend:
+    """
+    Deterministic stand-in for a model backend: each input maps to a fixed pseudo-random vector.
+
+    Attributes:
+        dimension (int): Length of the embedding vectors.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def load(self) -> None:
+        pass
+
+    def encode(self, texts: List[str], batch_size: int):
+        import numpy as np
+
+        rows = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+            rows[row] = np.random.default_rng(seed).standard_normal(self.dimension)
+        return rows
+
+    def close(self) -> None:
+        pass
+
+
+def best_time(function: Callable, repeat: int) -> float:
+    """
+    Return the best wall time in seconds over `repeat` runs.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def result(seconds: float, items: int, unit: str, **extra) -> Dict:
+    """
+    Build one benchmark result entry.
+    """
+    return {"seconds": round(seconds, 6), "items": items, "unit": unit,
+            "per_second": round(items / seconds, 2) if seconds else None, **extra}
+
+
+def git_commit() -> str:
+    """
+    Return the current commit hash, or "" outside a git checkout.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def load_notes(vault: Path) -> List[str]:
+    """
+    Read every Markdown note of the vault, skipping dot directories.
+    """
+    return [path.read_text(encoding="utf-8") for path in sorted(vault.rglob("*.md"))
+            if not any(part.startswith(".") for part in path.relative_to(vault).parts)]
+
+
+def bench_startup(vault: Path, repeat: int) -> Dict:
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, str(vault), *HEAVY_MODULES], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output))
+    best = min(runs, key=lambda run: run["first_file"])
+    return result(best["first_file"], 1, "files", import_seconds=round(best["import"], 6), heavy_modules=best["heavy"])
+
+
+def bench_scan(vault: Path, repeat: int) -> Dict:
+    from scanner import DirectoryScanner
+
+    scanner = DirectoryScanner(vault, {".md"}, {".git", ".obsidian", ".trash"})
+    found = {}
+
+    def run():
+        yaml_files, non_yaml_files = asyncio.run(scanner.scan_and_split())
+        found.update(yaml=len(yaml_files), non_yaml=len(non_yaml_files))
+
+    seconds = best_time(run, repeat)
+    return result(seconds, found["yaml"] + found["non_yaml"], "files", with_yaml=found["yaml"])
+
+
+def bench_metadata(notes: List[str], repeat: int) -> Dict:
+    from metadata_handler import extract_metadata
+
+    seconds = best_time(lambda: [extract_metadata(note) for note in notes], repeat)
+    return result(seconds, len(notes), "notes")
+
+
+def bench_chunk(notes: List[str], repeat: int) -> Dict:
+    from chunker import chunk_content_with_metadata
+
+    count = sum(1 for note in notes for _ in chunk_content_with_metadata(note, {}, CHUNK_SIZE, OVERLAP))
+    seconds = best_time(lambda: [list(chunk_content_with_metadata(note, {}, CHUNK_SIZE, OVERLAP)) for note in notes], repeat)
+    return result(seconds, count, "chunks", megabytes=round(sum(map(len, notes)) / 1e6, 3))
+
+
+def sample_chunks(notes: List[str], limit: int) -> List[Dict]:
+    """
+    Return up to `limit` chunks of the notes, with per-note metadata, for the encode and store stages.
+    """
+    from chunker import chunk_content_with_metadata
+
+    chunks = []
+    for index, note in enumerate(notes):
+        for chunk in chunk_content_with_metadata(note, {"title": f"Note {index}"}, CHUNK_SIZE, OVERLAP):
+            chunks.append(chunk)
+            if len(chunks) == limit:
+                return chunks
+    return chunks
+
+
+def make_embedding_model(args):
+    """
+    Build an `EmbeddingModel` with either the stub or the local backend, without a cache.
+    """
+    from embedding_model import EmbeddingModel
+
+    model = EmbeddingModel(args.model, device="cpu", batch_size=args.batch_size)
+    if args.encoder == "stub":
+        model.backend = StubEncoderBackend()
+    model.load_model()
+    return model
+
+
+def bench_encode(chunks: List[Dict], args) -> Dict:
+    model = make_embedding_model(args)
+    texts = [chunk["chunk"] for chunk in chunks]
+    metadatas = [chunk["metadata"] for chunk in chunks]
+    try:
+        seconds = best_time(lambda: model.generate_embeddings(texts, metadatas), args.repeat)
+    finally:
+        model.close()
+    return result(seconds, len(texts), "chunks", encoder=args.encoder)
+
+
+def bench_store(chunks: List[Dict], args) -> Dict:
+    import chromadb  # noqa: F401 - the stage is skipped, not failed, without chromadb
+    from config import Config
+    from llm_client import LLMClient
+
+    with tempfile.TemporaryDirectory() as chroma_dir:
+        config = Config()
+        config.chromadb_path = Path(chroma_dir)
+        config.chroma_collection_name = "bench"
+        config.embedding_cache_enabled = False
+        config.embedding_model_name = args.model
+        config.vector_store_write_mode = "upsert"
+        client = LLMClient(config)
+        if client.vector_store is None:
+            raise RuntimeError("the Chroma collection could not be created")
+        if args.encoder == "stub":
+            client.embedding_model.backend = StubEncoderBackend()
+
+        documents = [chunk["chunk"] for chunk in chunks]
+        metadatas = [{"chunk_type": chunk["type"], "title": chunk["metadata"]["title"]} for chunk in chunks]
+        embeddings = [[float(value) for value in row] for row in client.embedding_model.generate_embeddings(documents, metadatas)]
+
+        async def store(run: int):
+            ids = [f"bench-{run}-{index}" for index in range(len(documents))]
+            await client.store_embeddings(ids, documents, metadatas, embeddings)
+            await client.flush()
+
+        runs = iter(range(args.repeat))
+        try:
+            seconds = best_time(lambda: asyncio.run(store(next(runs))), args.repeat)
+        finally:
+            client.close()
+    return result(seconds, len(documents), "rows")
+
+
+def run_stage(name: str, function: Callable, *stage_args) -> Dict:
+    """
+    Run one stage, recording it as skipped if a dependency is missing and as an error if it fails.
+    """
+    try:
+        entry = function(*stage_args)
+    except ImportError as e:
+        entry = {"skipped": f"{type(e).__name__}: {e}"}
+    except Exception as e:
+        entry = {"error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+    if "skipped" in entry:
+        status = f"skipped ({entry['skipped']})"
+    elif "error" in entry:
+        status = f"ERROR {entry['error']}"
+    else:
+        status = f"{entry['seconds'] * 1000:.1f} ms, {entry['per_second']} {entry['unit']}/s"
+    print(f"{name:<10} {status}")
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ingest stages on a synthetic vault.")
+    parser.add_argument("--vault", type=Path, help="Existing vault to benchmark; a synthetic one is generated if omitted.")
+    add_vault_arguments(parser)
+    parser.add_argument("--encoder", choices=["stub", "local"], default="stub", help="Stub hash encoder or a local model.")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="SentenceTransformer model for --encoder local.")
+    parser.add_argument("--batch-size", type=int, default=64, help="Encoder batch size.")
+    parser.add_argument("--max-chunks", type=int, default=2000, help="Chunks used by the encode and store stages.")
+    parser.add_argument("--stages", default="startup,scan,metadata,chunk,encode,store", help="Comma-separated stages to run.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the best time is reported.")
+    parser.add_argument("--output", type=Path, help="Result file; defaults to bench/results/<timestamp>.json.")
+    args = parser.parse_args()
+    stages = set(args.stages.split(","))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vault = args.vault
+        vault_stats = None
+        if vault is None:
+            vault = Path(tmp) / "vault"
+            vault_stats = generate_vault(vault, args.notes, args.note_size, args.code_density,
+                                         args.frontmatter_ratio, args.folders, args.seed)
+        notes = load_notes(vault)
+        print(f"Vault: {vault} ({len(notes)} notes, {sum(map(len, notes)) / 1e6:.1f} MB)")
+
+        results = {}
+        if "startup" in stages:
+            results["startup"] = run_stage("startup", bench_startup, vault, args.repeat)
+        if "scan" in stages:
+            results["scan"] = run_stage("scan", bench_scan, vault, args.repeat)
+        if "metadata" in stages:
+            results["metadata"] = run_stage("metadata", bench_metadata, notes, args.repeat)
+        if "chunk" in stages:
+            results["chunk"] = run_stage("chunk", bench_chunk, notes, args.repeat)
+        if stages & {"encode", "store"}:
+            chunks = sample_chunks(notes, args.max_chunks)
+            if "encode" in stages:
+                results["encode"] = run_stage("encode", bench_encode, chunks, args)
+            if "store" in stages:
+                results["store"] = run_stage("store", bench_store, chunks, args)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "vault": vault_stats,
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Wrote {output}")
+    failed = [stage for stage, entry in results.items() if "error" in entry]
+    if failed:
+        print(f"Failed stages: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
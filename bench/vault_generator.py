@@ -0,0 +1,157 @@
+"""
+Synthetic Obsidian-style vault generator for benchmarks.
+
+Notes get YAML frontmatter (title, tags, date) with a configurable probability,
+headings, paragraphs with [[wikilinks]] and #tags, bullet lists, and fenced code
+blocks at a configurable density, spread over nested folders. Generation is
+seeded, so the same parameters always produce the same vault.
+
+Run Instructions:
+    python bench/vault_generator.py OUTPUT_DIR [--notes N] [--note-size BYTES]
+        [--code-density F] [--frontmatter-ratio F] [--folders N] [--seed S]
+"""
+
+import argparse
+import random
+from pathlib import Path
+from typing import Dict
+
+WORDS = (
+    "vector embedding model note vault index chunk query search python async pipeline token "
+    "graph memory cache latency batch stream idea project meeting summary draft review link "
+    "knowledge context offset header metadata tag folder daily weekly research reading"
+).split()
+LANGUAGES = ("python", "bash", "javascript", "yaml")
+
+
+def _sentence(rng: random.Random, note_count: int) -> str:
+    """
+    Build one sentence, sometimes with a wikilink or inline tag.
+    """
+    words = rng.choices(WORDS, k=rng.randint(6, 16))
+    roll = rng.random()
+    if roll < 0.1:
+        words.insert(rng.randrange(len(words)), f"[[note-{rng.randrange(note_count):05d}]]")
+    elif roll < 0.15:
+        words.append(f"#{rng.choice(WORDS)}")
+    return " ".join(words).capitalize() + "."
+
+
+def _code_block(rng: random.Random) -> str:
+    """
+    Build one fenced code block.
+    """
+    lines = [f"    value_{n} = compute('{rng.choice(WORDS)}', {rng.randint(0, 99)})" for n in range(rng.randint(3, 12))]
+    return f"```{rng.choice(LANGUAGES)}\ndef {rng.choice(WORDS)}():\n" + "\n".join(lines) + "\n```"
+
+
+def make_note(rng: random.Random, index: int, note_count: int, note_size: int, code_density: float, frontmatter: bool) -> str:
+    """
+    Build the text of one note.
+
+    Args:
+        rng (random.Random): Seeded random source.
+        index (int): Note number, used in the title.
+        note_count (int): Total notes, used for wikilink targets.
+        note_size (int): Target body length in characters.
+        code_density (float): Probability that a block is a code block.
+        frontmatter (bool): Whether to add YAML frontmatter.
+
+    Returns:
+        str: The note's Markdown.
+    """
+    parts = []
+    if frontmatter:
+        tags = ", ".join(sorted(set(rng.choices(WORDS, k=rng.randint(1, 4)))))
+        parts.append(f"---\ntitle: Note {index}\ntags: [{tags}]\ndate: 2024-01-{index % 28 + 1:02d}\n---")
+    parts.append(f"# Note {index}")
+
+    length = 0
+    while length < note_size:
+        roll = rng.random()
+        if roll < code_density:
+            block = _code_block(rng)
+        elif roll < code_density + 0.1:
+            block = f"{'#' * rng.randint(2, 3)} {rng.choice(WORDS).capitalize()} {rng.choice(WORDS)}"
+        elif roll < code_density + 0.25:
+            block = "\n".join(f"- {_sentence(rng, note_count)}" for _ in range(rng.randint(2, 6)))
+        else:
+            block = " ".join(_sentence(rng, note_count) for _ in range(rng.randint(2, 6)))
+        parts.append(block)
+        length += len(block) + 2
+    return "\n\n".join(parts) + "\n"
+
+
+def generate_vault(
+    root: Path,
+    notes: int = 1000,
+    note_size: int = 4000,
+    code_density: float = 0.1,
+    frontmatter_ratio: float = 0.7,
+    folders: int = 20,
+    seed: int = 0
+) -> Dict[str, int]:
+    """
+    Write a synthetic vault.
+
+    Args:
+        root (Path): Directory to create the vault in.
+        notes (int): Number of notes.
+        note_size (int): Approximate body length of each note in characters.
+        code_density (float): Probability that a block is a fenced code block.
+        frontmatter_ratio (float): Fraction of notes with YAML frontmatter.
+        folders (int): Number of folders, nested up to three levels deep.
+        seed (int): Random seed.
+
+    Returns:
+        Dict[str, int]: Counts of notes, notes with frontmatter and bytes written.
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    directories = [root]
+    for n in range(folders):
+        parent = rng.choice(directories[-5:]) if rng.random() < 0.5 and len(directories) < folders else root
+        directories.append(parent / f"folder-{n:03d}")
+    for directory in directories:
+        directory.mkdir(parents=True, exist_ok=True)
+    # Directories an indexer must skip
+    (root / ".obsidian").mkdir(exist_ok=True)
+    (root / ".obsidian" / "workspace.json").write_text("{}")
+
+    with_frontmatter = 0
+    total_bytes = 0
+    for index in range(notes):
+        frontmatter = rng.random() < frontmatter_ratio
+        with_frontmatter += frontmatter
+        text = make_note(rng, index, notes, note_size, code_density, frontmatter)
+        path = rng.choice(directories) / f"note-{index:05d}.md"
+        path.write_text(text, encoding="utf-8")
+        total_bytes += len(text.encode("utf-8"))
+    return {"notes": notes, "with_frontmatter": with_frontmatter, "bytes": total_bytes}
+
+
+def add_vault_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the generator's parameters to an argument parser.
+    """
+    parser.add_argument("--notes", type=int, default=1000, help="Number of notes.")
+    parser.add_argument("--note-size", type=int, default=4000, help="Approximate characters per note.")
+    parser.add_argument("--code-density", type=float, default=0.1, help="Probability a block is a code block.")
+    parser.add_argument("--frontmatter-ratio", type=float, default=0.7, help="Fraction of notes with frontmatter.")
+    parser.add_argument("--folders", type=int, default=20, help="Number of folders.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Obsidian-style vault.")
+    parser.add_argument("output", type=Path, help="Directory to create the vault in.")
+    add_vault_arguments(parser)
+    args = parser.parse_args()
+    stats = generate_vault(args.output, args.notes, args.note_size, args.code_density,
+                           args.frontmatter_ratio, args.folders, args.seed)
+    print(f"Wrote {stats['notes']} notes ({stats['with_frontmatter']} with frontmatter, "
+          f"{stats['bytes'] / 1e6:.1f} MB) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -28,11 +28,11 @@ async def process_chunk_limited(
         Optional[Dict]: Processed result including embeddings or None if it fails.
 
     Logs:
-        - Info: When chunk processing starts and completes.
+        - Debug: When chunk processing starts and completes.
         - Error: If chunk processing fails.
     """
     async with semaphore:
-        logging.info(f"Processing chunk {chunk_num}/{total_chunks} for file: {file_path}")
+        logging.debug("Processing chunk %d/%d for file: %s", chunk_num, total_chunks, file_path)
         try:
             chunk = chunk_data["chunk"]
             metadata = chunk_data["metadata"]
@@ -43,7 +43,7 @@ async def process_chunk_limited(
 
             # Wrap the LLM call in a timeout
             response = await asyncio.wait_for(llm_client.generate_embedding(chunk, metadata), timeout=timeout)
-            logging.info(f"Successfully processed chunk {chunk_num}/{total_chunks} for file: {file_path}")
+            logging.debug("Successfully processed chunk %d/%d for file: %s", chunk_num, total_chunks, file_path)
             return {"chunk_num": chunk_num, "embedding": response, "metadata": metadata}
         except asyncio.TimeoutError:
             logging.error(f"Timeout processing chunk {chunk_num}/{total_chunks} for file: {file_path}")
@@ -17,6 +17,9 @@ def validate_chunk_params(content: str, chunk_size: int, overlap: int):
         raise ValueError("Content cannot be empty.")
 
 
+_CODE_PATTERN = re.compile(r"```[\s\S]*?```")
+
+
 def extract_code_blocks(content: str) -> list:
     """
     Extract code blocks from the content.
@@ -27,9 +30,35 @@ def extract_code_blocks(content: str) -> list:
     Returns:
         list: List of tuples with start index, end index, and code block.
     """
-    code_pattern = r"```[\s\S]*?```"
-    matches = [(m.start(), m.end(), m.group()) for m in re.finditer(code_pattern, content)]
-    return matches
+    return [(m.start(), m.end(), m.group()) for m in _CODE_PATTERN.finditer(content)]
+
+
+def _chunk_text_span(content: str, start: int, end: int, metadata: dict, chunk_size: int, step: int) -> Generator[Dict, None, None]:
+    """
+    Slice one text span of the content into overlapping windows, without copying the span.
+
+    Args:
+        content (str): The full content.
+        start (int): Start offset of the text span.
+        end (int): End offset of the text span.
+        metadata (dict): Metadata attached to every chunk.
+        chunk_size (int): Maximum size of each chunk.
+        step (int): Distance between window starts (chunk_size - overlap).
+
+    Yields:
+        Dict: Text chunks with their stripped (start, end) offsets in the content.
+    """
+    for window_start in range(start, end, step):
+        window_end = min(window_start + chunk_size, end)
+        window = content[window_start:window_end]
+        left_stripped = window.lstrip()
+        chunk = left_stripped.rstrip()
+        if chunk:
+            chunk_start = window_end - len(left_stripped)
+            yield {"chunk": chunk, "type": "text", "metadata": metadata,
+                   "start": chunk_start, "end": chunk_start + len(chunk)}
+        if window_end == end:
+            break
 
 
 def chunk_content_with_metadata(content: str, metadata: dict, chunk_size: int, overlap: int = 0) -> Generator[Dict, None, None]:
@@ -37,39 +66,42 @@ def chunk_content_with_metadata(content: str, metadata: dict, chunk_size: int, o
     Generate chunks of content with optional overlap, distinguishing code and text.
     Includes metadata with each chunk.
 
+    The content is walked once by offset: text between code blocks is sliced into
+    windows and each fenced code block becomes its own chunk. The document is never
+    copied, and chunks are yielded lazily in document order.
+
     Args:
         content (str): The file content to split into chunks.
         metadata (dict): Metadata extracted from the file.
-        chunk_size (int): Maximum size of each chunk.
-        overlap (int): Number of overlapping characters between chunks.
+        chunk_size (int): Maximum size of each text chunk.
+        overlap (int): Number of overlapping characters between text chunks.
 
     Yields:
-        Dict: A dictionary containing chunk data, type (text/code), and metadata.
+        Dict: A dictionary containing chunk data, type (text/code), metadata, and the
+        chunk's (start, end) character offsets in the content.
 
     Logs:
-        - Info: Number of chunks generated (logged after yielding all chunks).
+        - Debug: Number of chunks generated (logged after yielding all chunks).
     """
     validate_chunk_params(content, chunk_size, overlap)
-    chunks = []
-    code_blocks = extract_code_blocks(content)
-
-    # Remove code blocks and keep only text
-    for start_idx, end_idx, code in code_blocks:
-        content = content[:start_idx] + " " * (end_idx - start_idx) + content[end_idx:]
-        chunks.append({"chunk": code, "type": "code", "metadata": metadata})
-
-    # Chunk remaining text
-    chunk_count = 0
-    for i in range(0, len(content), chunk_size - overlap):
-        chunk = content[i:i + chunk_size].strip()
-        if chunk:
-            chunks.append({"chunk": chunk, "type": "text", "metadata": metadata})
-            chunk_count += 1
-
-    for chunk in chunks:
+    step = chunk_size - overlap
+    text_count = 0
+    code_count = 0
+
+    position = 0
+    for match in _CODE_PATTERN.finditer(content):
+        for chunk in _chunk_text_span(content, position, match.start(), metadata, chunk_size, step):
+            text_count += 1
+            yield chunk
+        code_count += 1
+        yield {"chunk": match.group(), "type": "code", "metadata": metadata, "start": match.start(), "end": match.end()}
+        position = match.end()
+
+    for chunk in _chunk_text_span(content, position, len(content), metadata, chunk_size, step):
+        text_count += 1
         yield chunk
 
-    logging.info(f"Generated {chunk_count} text chunks and {len(code_blocks)} code blocks.")
+    logging.debug("Generated %d text chunks and %d code blocks.", text_count, code_count)
 
 
 # Example usage:
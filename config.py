@@ -18,13 +18,84 @@ class Config:
         # GitHub configuration
         self.github_pat = os.getenv("GITHUB_PAT", "")  # Securely load from environment variables
         self.github_repo = os.getenv("GITHUB_REPO", "knowmad411dev/ollama-update")
+        self.repo_sync_enabled = os.getenv("REPO_SYNC_ENABLED", "true").lower() == "true"  # Pull the vault repository on start
 
         # File handling
-        self.timestamp_file = Path(os.getenv("TIMESTAMP_FILE", str(Path.home() / "note_timestamps.json")))
+        self.vault_directory = Path(os.getenv("VAULT_DIRECTORY", "/content/ollama-update"))
+        self.timestamp_file = Path(os.getenv("TIMESTAMP_FILE", str(Path.home() / "note_timestamps.json")))  # Index manifest
+        self.dedup_enabled = os.getenv("DEDUP_ENABLED", "true").lower() == "true"  # Store identical chunks once
+        self.dedup_index_file = Path(os.getenv("DEDUP_INDEX_FILE", str(Path.home() / "note_chunk_index.json")))
         self.allowed_extensions = os.getenv("ALLOWED_EXTENSIONS", ".md,.txt,.yaml,.yml").split(",")
+        self.ignored_directories = os.getenv("IGNORED_DIRECTORIES", ".git,.obsidian,.trash,node_modules").split(",")
+        self.scan_workers = int(os.getenv("SCAN_WORKERS", "8"))  # Threads listing directories concurrently
+        self.thread_pool_workers = int(os.getenv("THREAD_POOL_WORKERS", "8"))  # Shared threads for encode and vector-store calls
+        self.max_frontmatter_bytes = int(os.getenv("MAX_FRONTMATTER_BYTES", "65536"))  # Read limit when classifying files
 
         # ChromaDB configuration
         self.chromadb_path = Path(os.getenv("CHROMADB_PATH", str(Path.home() / "ChromaDB")))
+        self.chroma_collection_name = os.getenv("CHROMA_COLLECTION_NAME", "notes_collection")
+        self.hnsw_space = os.getenv("HNSW_SPACE", "l2")  # "l2", "ip" or "cosine"
+        self.hnsw_m = int(os.getenv("HNSW_M", "16"))  # Graph degree; higher improves recall, costs memory
+        self.hnsw_construction_ef = int(os.getenv("HNSW_CONSTRUCTION_EF", "100"))  # Build-time candidate list size
+        self.hnsw_search_ef = int(os.getenv("HNSW_SEARCH_EF", "10"))  # Query-time candidate list size
+        self.vector_store_batch_size = int(os.getenv("VECTOR_STORE_BATCH_SIZE", "256"))  # Rows per add/upsert call
+        self.vector_store_flush_interval_ms = float(os.getenv("VECTOR_STORE_FLUSH_INTERVAL_MS", "500"))
+        self.vector_store_write_mode = os.getenv("VECTOR_STORE_WRITE_MODE", "upsert")  # "add" or "upsert"
+
+        # Pipeline configuration
+        self.pipeline_queue_size = int(os.getenv("PIPELINE_QUEUE_SIZE", "64"))  # Max items waiting between stages
+        self.pipeline_read_workers = int(os.getenv("PIPELINE_READ_WORKERS", "8"))
+        self.pipeline_chunk_workers = int(os.getenv("PIPELINE_CHUNK_WORKERS", "2"))
+        self.pipeline_embed_workers = int(os.getenv("PIPELINE_EMBED_WORKERS", "4"))
+        self.pipeline_store_workers = int(os.getenv("PIPELINE_STORE_WORKERS", "1"))
+        self.pipeline_log_interval = float(os.getenv("PIPELINE_LOG_INTERVAL", "10"))  # Seconds between progress logs
+
+        # Metrics configuration
+        self.metrics_enabled = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+        self.metrics_file = os.getenv("METRICS_FILE", "")  # Written at the end of a run when set
+        self.metrics_format = os.getenv("METRICS_FORMAT", "json")  # "json" or "prometheus"
+
+        # Search configuration
+        self.search_top_k = int(os.getenv("SEARCH_TOP_K", "5"))
+        self.search_query_cache_size = int(os.getenv("SEARCH_QUERY_CACHE_SIZE", "1024"))  # Query embeddings kept in memory
+        self.search_oversample = int(os.getenv("SEARCH_OVERSAMPLE", "4"))  # Candidates fetched per result with tag/path filters
+        self.search_max_candidates = int(os.getenv("SEARCH_MAX_CANDIDATES", "1000"))
+
+        # Search server configuration
+        self.server_host = os.getenv("SERVER_HOST", "127.0.0.1")
+        self.server_port = int(os.getenv("SERVER_PORT", "8765"))
+        self.server_query_max_latency_ms = float(os.getenv("SERVER_QUERY_MAX_LATENCY_MS", "5"))  # Max wait to batch queries
+        self.server_latency_window = int(os.getenv("SERVER_LATENCY_WINDOW", "1000"))  # Requests kept for p50/p95
+
+        # Watch mode configuration
+        self.watch_backend = os.getenv("WATCH_BACKEND", "auto")  # "auto", "inotify" or "poll"
+        self.watch_debounce_ms = float(os.getenv("WATCH_DEBOUNCE_MS", "500"))  # Quiet period that closes a batch
+        self.watch_max_delay_ms = float(os.getenv("WATCH_MAX_DELAY_MS", "5000"))  # Longest a batch waits under constant saves
+        self.watch_poll_interval = float(os.getenv("WATCH_POLL_INTERVAL", "2"))  # Seconds between polls without inotify
+
+        # Chunking configuration
+        self.chunking_mode = os.getenv("CHUNKING_MODE", "chars")  # "chars", "markdown" or "tokens"
+        self.chunk_size = int(os.getenv("CHUNK_SIZE", "500"))  # Characters per chunk in "chars" and "markdown" modes
+        self.chunk_overlap = int(os.getenv("CHUNK_OVERLAP", "50"))
+        self.chunk_max_tokens = int(os.getenv("CHUNK_MAX_TOKENS", "192"))  # Model tokens per chunk in "tokens" mode
+        self.chunk_overlap_tokens = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+
+        # Embedding configuration
+        self.embedding_model_name = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+        self.embedding_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))  # Chunks per forward pass
+        self.embedding_max_latency_ms = float(os.getenv("EMBEDDING_MAX_LATENCY_MS", "20"))  # Max wait to fill a batch
+        self.embedding_sort_by_length = os.getenv("EMBEDDING_SORT_BY_LENGTH", "true").lower() == "true"  # Bucket inputs by length
+        self.embedding_sort_window = int(os.getenv("EMBEDDING_SORT_WINDOW", "4"))  # Batches gathered and sorted together
+        self.embedding_warmup = os.getenv("EMBEDDING_WARMUP", "false").lower() == "true"  # Load the model while the vault is scanned
+        self.embedding_backend = os.getenv("EMBEDDING_BACKEND", "local")  # "local", "process", "quantized", "onnx" or "openvino"
+        self.embedding_export_dir = Path(os.getenv("EMBEDDING_EXPORT_DIR", str(Path.home() / ".cache" / "mybrain_onnx")))
+        self.embedding_workers = int(os.getenv("EMBEDDING_WORKERS", "4"))  # Worker processes for the "process" backend
+        self.embedding_torch_threads = int(os.getenv("EMBEDDING_TORCH_THREADS", "2"))  # Intra-op threads per worker or CPU backend
+        self.embedding_input_fields = os.getenv("EMBEDDING_INPUT_FIELDS", "title,tags")  # Metadata encoded with each chunk; "*" for all
+        self.embedding_input_max_tokens = int(os.getenv("EMBEDDING_INPUT_MAX_TOKENS", "32"))  # Token budget of those fields
+        self.embedding_cache_enabled = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+        self.embedding_cache_dir = Path(os.getenv("EMBEDDING_CACHE_DIR", str(Path.home() / ".cache" / "mybrain_embeddings")))
+        self.embedding_cache_max_entries = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
 
     @classmethod
     def load_default(cls):
@@ -38,62 +109,10 @@ class Config:
         Validate critical configuration settings.
         Raises an error if any required setting is missing or invalid.
         """
-        if not self.github_pat:
+        repo_sync = str(self.repo_sync_enabled).lower() == "true"
+        if repo_sync and not self.github_pat:
             raise ValueError("GitHub PAT is not configured. Set the GITHUB_PAT environment variable.")
-        if not self.github_repo:
+        if repo_sync and not self.github_repo:
             raise ValueError("GitHub repository is not configured. Set the GITHUB_REPO environment variable.")
         if not self.chromadb_path:
             raise ValueError("ChromaDB path is not configured. Set the CHROMADB_PATH environment variable.")
-
-
-# Save the updated code for the user.
-updated_config_code = """
-from pathlib import Path
-import os
-
-
-class Config:
-    \"\"\"
-    Configuration class to store application settings.
-    \"\"\"
-
-    def __init__(self):
-        # Logging configuration
-        self.log_level = os.getenv("LOG_LEVEL", "INFO")  # Default to INFO if not set in the environment
-        self.log_format = os.getenv("LOG_FORMAT", "%(asctime)s - %(levelname)s - %(message)s")
-        self.log_file = os.getenv("LOG_FILE", "app.log")
-
-        # GitHub configuration
-        self.github_pat = os.getenv("GITHUB_PAT", "")  # Securely load from environment variables
-        self.github_repo = os.getenv("GITHUB_REPO", "knowmad411dev/ollama-update")
-
-        # File handling
-        self.timestamp_file = Path(os.getenv("TIMESTAMP_FILE", str(Path.home() / "note_timestamps.json")))
-        self.allowed_extensions = os.getenv("ALLOWED_EXTENSIONS", ".md,.txt,.yaml,.yml").split(",")
-
-        # ChromaDB configuration
-        self.chromadb_path = Path(os.getenv("CHROMADB_PATH", str(Path.home() / "ChromaDB")))
-
-    @classmethod
-    def load_default(cls):
-        \"\"\"
-        Load default configuration settings.
-        \"\"\"
-        return cls()
-
-    def validate(self):
-        \"\"\"
-        Validate critical configuration settings.
-        Raises an error if any required setting is missing or invalid.
-        \"\"\"
-        if not self.github_pat:
-            raise ValueError("GitHub PAT is not configured. Set the GITHUB_PAT environment variable.")
-        if not self.github_repo:
-            raise ValueError("GitHub repository is not configured. Set the GITHUB_REPO environment variable.")
-        if not self.chromadb_path:
-            raise ValueError("ChromaDB path is not configured. Set the CHROMADB_PATH environment variable.")
-"""
-
-# Save updated code for the user.
-with open("/mnt/data/updated_config.py", "w") as file:
-    file.write(updated_config_code)
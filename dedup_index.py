@@ -0,0 +1,278 @@
+"""
+Vault-wide index of chunk content, used to store identical chunks only once.
+
+Templated notes, pasted snippets and copied code blocks produce chunks with the
+same text in many files. Each distinct chunk text (after whitespace
+normalization) is embedded and stored as one vector-store row; the index maps
+the text's hash to that row and to every chunk id that refers to it, so the row
+is deleted only when its last source goes away.
+
+The shared row is embedded and described by its primary note only: the encoded
+metadata prefix and the stored "title", "tags" and "chunk_type" come from that
+note, so tag filters match a deduplicated chunk only through the primary's tags.
+The other notes appear in the row's "source_files", which the path filter checks.
+
+A new row stays unwritten until `confirm` reports it stored. Until then, chunks
+that refer to it are told it is already stored but can wait for it with
+`when_written`. If embedding or writing it fails, `discard` drops it so the
+content is embedded again by whichever note registers it next. Unwritten rows are
+not saved.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+# Separator between the paths of a row's "source_files" metadata
+SOURCE_SEPARATOR = "\n"
+
+
+class ChunkDedupIndex:
+    """
+    Maps normalized chunk content to the one stored row that holds it.
+
+    Attributes:
+        index_path (Path): JSON file the index is persisted to.
+        entries (Dict[str, dict]): Per content key, the stored row's "doc_id", the "primary"
+            chunk id whose file and offsets the row's metadata shows, and the "sources"
+            mapping every referring chunk id to its [file_path, start, end].
+    """
+
+    def __init__(self, index_path: Path):
+        """
+        Initialize the index, loading any previously saved state.
+
+        Args:
+            index_path (Path): JSON file the index is persisted to.
+        """
+        self.index_path = Path(index_path)
+        self.entries: Dict[str, dict] = self._load()
+        self._keys: Dict[str, str] = {
+            chunk_id: key for key, entry in self.entries.items() for chunk_id in entry["sources"]
+        }
+        self._dirty = set()
+        # Content keys of rows not written yet, with the callbacks waiting for them
+        self._unwritten: Dict[str, List[Callable[[], None]]] = {}
+        # Chunks whose row was discarded before it was written; they must be registered again
+        self._lost: Set[str] = set()
+
+    def _load(self) -> Dict[str, dict]:
+        """
+        Load the index from disk.
+
+        Returns:
+            Dict[str, dict]: Saved entries, or an empty mapping if the file is missing or unreadable.
+
+        Logs:
+            - Warning: If the index file exists but cannot be parsed.
+        """
+        if not self.index_path.exists():
+            return {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                return json.load(file).get("chunks", {})
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable dedup index {self.index_path}: {e}")
+            return {}
+
+    def save(self) -> None:
+        """
+        Atomically write the index to disk, leaving out rows not written yet.
+        """
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        entries = {key: entry for key, entry in self.entries.items() if key not in self._unwritten}
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": 1, "chunks": entries}, file)
+        os.replace(tmp_path, self.index_path)
+        logging.debug("Saved dedup index with %d entries to %s", len(self.entries), self.index_path)
+
+    @staticmethod
+    def chunk_key(chunk_data: dict) -> str:
+        """
+        Hash a chunk's type and whitespace-normalized text.
+
+        Args:
+            chunk_data (dict): Chunk data with "chunk" and "type".
+
+        Returns:
+            str: Hex digest identifying the chunk's content.
+        """
+        normalized = " ".join(chunk_data["chunk"].split())
+        return hashlib.sha256(f"{chunk_data['type']}\0{normalized}".encode("utf-8")).hexdigest()[:32]
+
+    def add(self, chunk_id: str, chunk_data: dict) -> bool:
+        """
+        Register a chunk as a source of its content.
+
+        Args:
+            chunk_id (str): The chunk's id.
+            chunk_data (dict): Chunk data with "chunk", "type" and "metadata".
+
+        Returns:
+            bool: True if the chunk owns the stored row and must be embedded and stored,
+            False if an identical chunk is already stored or about to be (see `when_written`).
+        """
+        self._lost.discard(chunk_id)
+        key = self.chunk_key(chunk_data)
+        metadata = chunk_data["metadata"]
+        source = [metadata.get("file_path"), metadata.get("start"), metadata.get("end")]
+        entry = self.entries.get(key)
+        if entry is None:
+            self.entries[key] = {"doc_id": chunk_id, "primary": chunk_id, "sources": {chunk_id: source}}
+            self._keys[chunk_id] = key
+            self._unwritten[key] = []
+            return True
+        if chunk_id not in entry["sources"]:
+            self._dirty.add(key)
+        entry["sources"][chunk_id] = source
+        self._keys[chunk_id] = key
+        return chunk_id == entry["doc_id"]
+
+    def confirm(self, chunk_ids: Iterable[str]) -> None:
+        """
+        Mark the rows owned by these chunks as written and run the callbacks waiting for them.
+
+        Args:
+            chunk_ids (Iterable[str]): Ids of chunks whose rows were written to the vector store.
+        """
+        for chunk_id in chunk_ids:
+            key = self._keys.get(chunk_id)
+            if key in self._unwritten and self.entries[key]["doc_id"] == chunk_id:
+                for callback in self._unwritten.pop(key):
+                    callback()
+
+    def when_written(self, chunk_ids: Iterable[str], callback: Callable[[], None]) -> None:
+        """
+        Run a callback once the rows of all these chunks are written; immediately if they are.
+
+        The callback is dropped if one of the rows is, or has been, discarded.
+
+        Args:
+            chunk_ids (Iterable[str]): Registered chunk ids.
+            callback (Callable[[], None]): Called once, from `confirm`.
+        """
+        chunk_ids = list(chunk_ids)
+        if self._lost.intersection(chunk_ids):
+            return
+        keys = {self._keys.get(chunk_id) for chunk_id in chunk_ids} & self._unwritten.keys()
+        if not keys:
+            callback()
+            return
+        remaining = [len(keys)]
+
+        def countdown() -> None:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                callback()
+
+        for key in keys:
+            self._unwritten[key].append(countdown)
+
+    def discard(self, chunk_ids: Iterable[str]) -> List[str]:
+        """
+        Undo the registration of chunks whose embedding or write failed.
+
+        An unwritten row owned by one of the chunks is dropped with all its sources;
+        the callbacks waiting for it are never run, and those later registered for its
+        other sources are not either. Other chunks are released.
+
+        Args:
+            chunk_ids (Iterable[str]): Ids of the chunks registered by the failed attempt.
+
+        Returns:
+            List[str]: Ids of written rows left without any source, which should be deleted.
+        """
+        released = []
+        for chunk_id in chunk_ids:
+            key = self._keys.get(chunk_id)
+            if key in self._unwritten and self.entries[key]["doc_id"] == chunk_id:
+                for source_id in self.entries.pop(key)["sources"]:
+                    self._keys.pop(source_id, None)
+                    if source_id != chunk_id:
+                        self._lost.add(source_id)
+                del self._unwritten[key]
+                self._dirty.discard(key)
+            elif key is not None:
+                released.append(chunk_id)
+        return self.release(released)
+
+    def move(self, chunk_id: str, start: int, end: int) -> bool:
+        """
+        Record new offsets of a registered chunk.
+
+        Args:
+            chunk_id (str): The chunk's id.
+            start (int): New start offset in its note.
+            end (int): New end offset in its note.
+
+        Returns:
+            bool: True if the chunk is the one the stored row describes, so the row's
+            metadata needs the new offsets too.
+        """
+        key = self._keys.get(chunk_id)
+        if key is None:
+            return True
+        entry = self.entries[key]
+        entry["sources"][chunk_id][1:] = [start, end]
+        return entry["primary"] == chunk_id
+
+    def release(self, chunk_ids: Iterable[str]) -> List[str]:
+        """
+        Remove chunks as sources of their content.
+
+        Args:
+            chunk_ids (Iterable[str]): Ids of the chunks that no longer exist.
+
+        Returns:
+            List[str]: Ids of stored rows left without any source, which should be deleted.
+            Unregistered chunk ids are returned as they are.
+        """
+        orphaned = []
+        for chunk_id in chunk_ids:
+            key = self._keys.pop(chunk_id, None)
+            if key is None:
+                orphaned.append(chunk_id)
+                continue
+            entry = self.entries[key]
+            entry["sources"].pop(chunk_id, None)
+            if not entry["sources"]:
+                del self.entries[key]
+                self._dirty.discard(key)
+                self._unwritten.pop(key, None)
+                orphaned.append(entry["doc_id"])
+                continue
+            if entry["primary"] == chunk_id:
+                entry["primary"] = next(iter(entry["sources"]))
+            self._dirty.add(key)
+        return orphaned
+
+    def pending_updates(self) -> Tuple[List[str], List[dict]]:
+        """
+        Collect the metadata of written rows whose sources changed since the last call.
+
+        Unwritten rows stay pending until they are confirmed.
+
+        Returns:
+            Tuple[List[str], List[dict]]: Row ids and their new "file_path", "start", "end"
+            and "source_files" metadata.
+        """
+        doc_ids, metadatas = [], []
+        for key in self._dirty - self._unwritten.keys():
+            entry = self.entries[key]
+            file_path, start, end = entry["sources"][entry["primary"]]
+            files = sorted({source[0] for source in entry["sources"].values() if source[0]})
+            doc_ids.append(entry["doc_id"])
+            metadatas.append({"file_path": file_path, "start": start, "end": end,
+                              "source_files": SOURCE_SEPARATOR.join(files)})
+        self._dirty &= self._unwritten.keys()
+        return doc_ids, metadatas
+
+    def source_count(self) -> int:
+        """
+        Return the number of chunks registered across all stored rows.
+        """
+        return len(self._keys)
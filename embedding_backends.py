@@ -0,0 +1,667 @@
+"""
+Inference backends used by `EmbeddingModel`.
+
+Every backend exposes the same `load()`, `encode(texts, batch_size)` and
+`close()` methods, so the model wrapper, cache and batcher do not depend on
+where or how inference runs.
+
+CPU-only hosts can trade a little accuracy for speed with the "quantized"
+(dynamic int8 PyTorch), "onnx" (ONNX Runtime) and "openvino" backends;
+`check_parity` measures how far their embeddings drift from the fp32 model.
+
+torch and sentence_transformers are imported only when a backend loads its
+model, so importing this module (and the indexer) stays cheap.
+"""
+
+import json
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class SentenceTransformerBackend:
+    """
+    Runs a SentenceTransformer in the current process.
+
+    Attributes:
+        model_name (str): Name of the pretrained model.
+        device (Optional[str]): Device to run inference on; None lets SentenceTransformer pick.
+        model (SentenceTransformer): The loaded model, or None until `load` is called.
+    """
+
+    def __init__(self, model_name: str, device: Optional[str]):
+        """
+        Initialize the backend without loading the model.
+
+        Args:
+            model_name (str): Name of the pretrained model.
+            device (Optional[str]): Device to run inference on ('cpu' or 'cuda'), or None for CUDA when available.
+        """
+        self.model_name = model_name
+        self.device = device
+        self.model = None
+        # Held while loading, so a warm-up thread and the first encode load the model once
+        self._load_lock = threading.Lock()
+
+    def load(self) -> None:
+        """
+        Load the SentenceTransformer model when needed.
+        """
+        with self._load_lock:
+            if self.model is None:
+                from sentence_transformers import SentenceTransformer
+
+                logging.info("Loading SentenceTransformer model...")
+                self.model = SentenceTransformer(self.model_name, device=self.device)
+                logging.info("Model loaded successfully.")
+
+    def encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """
+        Encode texts into an embedding matrix.
+
+        Args:
+            texts (List[str]): Encoder inputs.
+            batch_size (int): Number of inputs per forward pass.
+
+        Returns:
+            np.ndarray: Matrix with one embedding row per input.
+        """
+        self.load()
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+
+    def token_budget(self) -> int:
+        """
+        Number of input token ids kept per sequence; the rest of `max_seq_length` holds the special tokens.
+        """
+        self.load()
+        tokenizer = self.model.tokenizer
+        max_length = self.model.get_max_seq_length() or tokenizer.model_max_length
+        return max_length - tokenizer.num_special_tokens_to_add()
+
+    def encode_token_ids(self, token_ids: List[List[int]], batch_size: int) -> np.ndarray:
+        """
+        Encode inputs that are already tokenized, skipping the model's own tokenization.
+
+        Args:
+            token_ids (List[List[int]]): Token ids of each input, without special tokens.
+            batch_size (int): Number of inputs per forward pass.
+
+        Returns:
+            np.ndarray: Matrix with one embedding row per input.
+        """
+        import torch
+
+        budget = self.token_budget()
+        tokenizer = self.model.tokenizer
+
+        outputs = []
+        with torch.no_grad():
+            for start in range(0, len(token_ids), batch_size):
+                batch = [tokenizer.build_inputs_with_special_tokens(ids[:budget]) for ids in token_ids[start:start + batch_size]]
+                features = tokenizer.pad({"input_ids": batch}, padding=True, return_tensors="pt")
+                features = {name: tensor.to(self.model.device) for name, tensor in features.items()}
+                outputs.append(self.model(features)["sentence_embedding"].cpu().numpy())
+        return np.vstack(outputs)
+
+    def close(self) -> None:
+        """
+        Release the model.
+        """
+        self.model = None
+
+
+class QuantizedTorchBackend(SentenceTransformerBackend):
+    """
+    Runs a SentenceTransformer on the CPU with its linear layers dynamically quantized to int8.
+    """
+
+    def __init__(self, model_name: str, torch_threads: int = 1):
+        """
+        Initialize the backend without loading the model.
+
+        Args:
+            model_name (str): Name of the pretrained model.
+            torch_threads (int): Torch intra-op threads.
+        """
+        super().__init__(model_name, "cpu")
+        self.torch_threads = torch_threads
+
+    def load(self) -> None:
+        """
+        Load the fp32 model and replace its linear layers with dynamically quantized int8 ones.
+        """
+        with self._load_lock:
+            if self.model is None:
+                import torch
+                from sentence_transformers import SentenceTransformer
+
+                torch.set_num_threads(self.torch_threads)
+                model = SentenceTransformer(self.model_name, device="cpu")
+                logging.info("Quantizing model to dynamic int8...")
+                self.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                logging.info("Model loaded successfully.")
+
+
+# ONNX opset the transformer is exported with
+ONNX_OPSET = 14
+
+# Serializes exports, so backends loading at the same time never write one export directory concurrently
+_export_lock = threading.Lock()
+
+
+def export_onnx(model_name: str, export_dir: Path) -> Path:
+    """
+    Export a SentenceTransformer's transformer to ONNX, once.
+
+    The pooling mode, normalization and sequence length of the SentenceTransformer
+    are saved next to the graph in "pipeline.json", so ONNX-based backends can
+    reproduce its embeddings without loading it.
+
+    Args:
+        model_name (str): Name of the pretrained model.
+        export_dir (Path): Directory holding one sub-directory per exported model.
+
+    Returns:
+        Path: Directory containing "model.onnx" and "pipeline.json".
+
+    Logs:
+        - Info: When a model is exported.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    with _export_lock:
+        target = Path(export_dir) / model_name.replace("/", "__")
+        if (target / "model.onnx").exists() and (target / "pipeline.json").exists():
+            return target
+
+        logging.info(f"Exporting '{model_name}' to ONNX in {target}...")
+        target.mkdir(parents=True, exist_ok=True)
+        model = SentenceTransformer(model_name, device="cpu")
+        transformer = model[0]
+        pooling = next((module for module in model if isinstance(module, Pooling)), None)
+        if pooling is not None and pooling.pooling_mode_cls_token:
+            pooling_mode = "cls"
+        elif pooling is not None and pooling.pooling_mode_max_tokens:
+            pooling_mode = "max"
+        else:
+            pooling_mode = "mean"
+
+        sample = transformer.tokenizer(["An example sentence."], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+        class _HiddenStates(torch.nn.Module):
+            def __init__(self, auto_model):
+                super().__init__()
+                self.auto_model = auto_model
+
+            def forward(self, *inputs):
+                return self.auto_model(**dict(zip(input_names, inputs)))[0]
+
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+        with torch.no_grad():
+            torch.onnx.export(
+                _HiddenStates(transformer.auto_model).eval(),
+                tuple(sample[name] for name in input_names),
+                str(target / "model.onnx"),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=ONNX_OPSET
+            )
+        settings = {
+            "input_names": input_names,
+            "pooling": pooling_mode,
+            "normalize": any(isinstance(module, Normalize) for module in model),
+            "max_seq_length": model.get_max_seq_length() or transformer.tokenizer.model_max_length,
+        }
+        (target / "pipeline.json").write_text(json.dumps(settings))
+        return target
+
+
+class OnnxRuntimeBackend:
+    """
+    Runs an ONNX export of the model with ONNX Runtime on the CPU.
+
+    Tokenization, pooling and normalization match the SentenceTransformer, so the
+    embeddings are interchangeable with the "local" backend up to numerical drift.
+
+    Attributes:
+        model_name (str): Name of the pretrained model.
+        export_dir (Path): Where exported models are kept.
+        threads (int): Intra-op threads of the runtime.
+    """
+
+    def __init__(self, model_name: str, export_dir: Path, threads: int = 1):
+        """
+        Initialize the backend without loading the model.
+
+        Args:
+            model_name (str): Name of the pretrained model.
+            export_dir (Path): Where exported models are kept.
+            threads (int): Intra-op threads of the runtime.
+        """
+        self.model_name = model_name
+        self.export_dir = Path(export_dir)
+        self.threads = threads
+        self.tokenizer = None
+        self.settings: Dict = {}
+        self._session = None
+        self._load_lock = threading.Lock()
+
+    def load(self) -> None:
+        """
+        Export the model if needed, then load the tokenizer and the inference session.
+        """
+        with self._load_lock:
+            if self._session is None:
+                from token_chunker import load_tokenizer
+
+                model_dir = export_onnx(self.model_name, self.export_dir)
+                self.settings = json.loads((model_dir / "pipeline.json").read_text())
+                self.tokenizer = load_tokenizer(self.model_name)
+                self._session = self._create_session(model_dir / "model.onnx")
+                logging.info("Model loaded successfully.")
+
+    def _create_session(self, model_path: Path):
+        """
+        Create the ONNX Runtime inference session.
+        """
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.threads
+        return onnxruntime.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+
+    def _run(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Run the graph and return the last hidden states.
+        """
+        return self._session.run(None, inputs)[0]
+
+    def _embed(self, features) -> np.ndarray:
+        """
+        Run one padded batch and pool it into sentence embeddings.
+        """
+        inputs = {name: np.asarray(features[name], dtype=np.int64) for name in self.settings["input_names"]
+                  if name in features}
+        if "token_type_ids" in self.settings["input_names"] and "token_type_ids" not in inputs:
+            inputs["token_type_ids"] = np.zeros_like(inputs["input_ids"])
+        hidden = self._run(inputs)
+        mask = inputs["attention_mask"][..., None].astype(hidden.dtype)
+        if self.settings["pooling"] == "cls":
+            embeddings = hidden[:, 0]
+        elif self.settings["pooling"] == "max":
+            embeddings = np.where(mask > 0, hidden, -1e9).max(axis=1)
+        else:
+            embeddings = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.settings["normalize"]:
+            embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+    def encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """
+        Encode texts into an embedding matrix.
+
+        Args:
+            texts (List[str]): Encoder inputs.
+            batch_size (int): Number of inputs per forward pass.
+
+        Returns:
+            np.ndarray: Matrix with one embedding row per input.
+        """
+        self.load()
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            features = self.tokenizer(
+                texts[start:start + batch_size], padding=True, truncation=True,
+                max_length=self.settings["max_seq_length"], return_tensors="np"
+            )
+            outputs.append(self._embed(features))
+        return np.vstack(outputs) if outputs else np.empty((0, 0), dtype=np.float32)
+
+    def token_budget(self) -> int:
+        """
+        Number of input token ids kept per sequence; the rest of `max_seq_length` holds the special tokens.
+        """
+        self.load()
+        return self.settings["max_seq_length"] - self.tokenizer.num_special_tokens_to_add()
+
+    def encode_token_ids(self, token_ids: List[List[int]], batch_size: int) -> np.ndarray:
+        """
+        Encode inputs that are already tokenized, skipping tokenization.
+
+        Args:
+            token_ids (List[List[int]]): Token ids of each input, without special tokens.
+            batch_size (int): Number of inputs per forward pass.
+
+        Returns:
+            np.ndarray: Matrix with one embedding row per input.
+        """
+        budget = self.token_budget()
+        outputs = []
+        for start in range(0, len(token_ids), batch_size):
+            batch = [self.tokenizer.build_inputs_with_special_tokens(ids[:budget]) for ids in token_ids[start:start + batch_size]]
+            outputs.append(self._embed(self.tokenizer.pad({"input_ids": batch}, padding=True, return_tensors="np")))
+        return np.vstack(outputs) if outputs else np.empty((0, 0), dtype=np.float32)
+
+    def close(self) -> None:
+        """
+        Release the inference session.
+        """
+        self._session = None
+
+
+class OpenVINOBackend(OnnxRuntimeBackend):
+    """
+    Runs the ONNX export of the model with the OpenVINO runtime on the CPU.
+    """
+
+    def _create_session(self, model_path: Path):
+        """
+        Compile the ONNX graph for the CPU device.
+        """
+        import openvino
+
+        core = openvino.Core()
+        return core.compile_model(str(model_path), "CPU", {"INFERENCE_NUM_THREADS": self.threads})
+
+    def _run(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Run the compiled model and return the last hidden states.
+        """
+        return self._session(inputs)[0]
+
+
+def cosine_drift(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """
+    Compare two embedding matrices row by row.
+
+    Args:
+        reference (np.ndarray): Baseline embeddings, one row per input.
+        candidate (np.ndarray): Embeddings of the same inputs from another backend.
+
+    Returns:
+        Dict[str, float]: Mean and minimum cosine similarity, and the largest drift (1 - cosine).
+
+    Raises:
+        ValueError: If the matrices have different shapes.
+    """
+    if reference.shape != candidate.shape:
+        raise ValueError(f"Embedding shapes differ: {reference.shape} and {candidate.shape}")
+    reference = reference / np.clip(np.linalg.norm(reference, axis=1, keepdims=True), 1e-12, None)
+    candidate = candidate / np.clip(np.linalg.norm(candidate, axis=1, keepdims=True), 1e-12, None)
+    similarities = (reference * candidate).sum(axis=1)
+    return {
+        "mean_cosine": float(similarities.mean()),
+        "min_cosine": float(similarities.min()),
+        "max_drift": float(1.0 - similarities.min()),
+    }
+
+
+def check_parity(
+    model_name: str,
+    backends: List[str],
+    texts: List[str],
+    batch_size: int = 64,
+    export_dir: Optional[Path] = None,
+    threads: int = 1
+) -> List[dict]:
+    """
+    Encode the same texts with the fp32 "local" backend and each candidate backend.
+
+    Args:
+        model_name (str): Name of the pretrained model.
+        backends (List[str]): Backend names to compare, e.g. ["quantized", "onnx", "openvino"].
+        texts (List[str]): Sample encoder inputs.
+        batch_size (int): Number of inputs per forward pass.
+        export_dir (Optional[Path]): Where ONNX exports are kept.
+        threads (int): Intra-op threads of each backend.
+
+    Returns:
+        List[dict]: One entry per backend, the baseline first, with "backend", "seconds",
+        "texts_per_second" and the `cosine_drift` fields, or "error" if the backend failed.
+
+    Logs:
+        - Warning: If a backend cannot be loaded or run.
+    """
+    import torch
+
+    torch.set_num_threads(threads)
+    results = []
+    reference = None
+    for name in ["local"] + [backend for backend in backends if backend != "local"]:
+        backend = create_backend(name, model_name, "cpu", torch_threads=threads, export_dir=export_dir)
+        try:
+            backend.load()
+            backend.encode(texts[:batch_size], batch_size)  # Warm-up
+            started = time.perf_counter()
+            embeddings = np.asarray(backend.encode(texts, batch_size), dtype=np.float32)
+            seconds = time.perf_counter() - started
+        except Exception as e:
+            logging.warning(f"Backend '{name}' failed: {e}")
+            results.append({"backend": name, "error": f"{type(e).__name__}: {e}"})
+            if reference is None:
+                break
+            continue
+        finally:
+            backend.close()
+        if reference is None:
+            reference = embeddings
+        results.append({
+            "backend": name,
+            "seconds": round(seconds, 4),
+            "texts_per_second": round(len(texts) / seconds, 2) if seconds else None,
+            **cosine_drift(reference, embeddings),
+        })
+    return results
+
+
+# SentenceTransformer loaded once per worker process by `_initialize_worker`
+_worker_model = None
+
+
+def _initialize_worker(model_name: str, torch_threads: int) -> None:
+    """
+    Process-pool initializer: cap intra-op threads and load the model once.
+
+    Args:
+        model_name (str): Name of the pretrained model.
+        torch_threads (int): Torch intra-op threads for this worker.
+    """
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(torch_threads)
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_in_worker(texts: List[str], batch_size: int) -> Tuple[str, Tuple[int, ...], str]:
+    """
+    Encode texts in a worker and place the result in a new shared-memory block.
+
+    The parent attaches to the block by name, copies the matrix out and unlinks
+    it, so embeddings never travel through pickled Python lists. The block is
+    handed over to the parent: the worker stops tracking it, so the worker's
+    resource tracker neither reports it as leaked nor unlinks it on exit.
+
+    Args:
+        texts (List[str]): Encoder inputs.
+        batch_size (int): Number of inputs per forward pass.
+
+    Returns:
+        Tuple[str, Tuple[int, ...], str]: Shared-memory block name, matrix shape and dtype.
+    """
+    embeddings = _worker_model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    block = shared_memory.SharedMemory(create=True, size=max(1, embeddings.nbytes))
+    np.ndarray(embeddings.shape, dtype=embeddings.dtype, buffer=block.buf)[:] = embeddings
+    block.close()
+    resource_tracker.unregister(block._name, "shared_memory")
+    return block.name, embeddings.shape, embeddings.dtype.str
+
+
+class ProcessPoolBackend:
+    """
+    Spreads encoding across worker processes that each hold their own model copy.
+
+    Attributes:
+        model_name (str): Name of the pretrained model.
+        num_workers (int): Number of worker processes.
+        torch_threads (int): Torch intra-op threads per worker.
+    """
+
+    def __init__(self, model_name: str, num_workers: int, torch_threads: int = 1):
+        """
+        Initialize the backend without starting the workers.
+
+        Args:
+            model_name (str): Name of the pretrained model.
+            num_workers (int): Number of worker processes.
+            torch_threads (int): Torch intra-op threads per worker; num_workers * torch_threads
+                should not exceed the number of cores.
+        """
+        if num_workers <= 0:
+            raise ValueError("num_workers must be greater than 0.")
+        if torch_threads <= 0:
+            raise ValueError("torch_threads must be greater than 0.")
+        self.model_name = model_name
+        self.num_workers = num_workers
+        self.torch_threads = torch_threads
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._load_lock = threading.Lock()
+
+    def load(self) -> None:
+        """
+        Start the worker processes; each loads the model in its initializer.
+        """
+        with self._load_lock:
+            if self._executor is None:
+                logging.info(f"Starting {self.num_workers} embedding workers with {self.torch_threads} torch threads each...")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.num_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_initialize_worker,
+                    initargs=(self.model_name, self.torch_threads)
+                )
+
+    def encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """
+        Split texts across the workers, encode them in parallel and reassemble the matrix.
+
+        Args:
+            texts (List[str]): Encoder inputs.
+            batch_size (int): Number of inputs per forward pass inside each worker.
+
+        Returns:
+            np.ndarray: Matrix with one embedding row per input, in input order.
+        """
+        self.load()
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        slice_size = math.ceil(len(texts) / self.num_workers)
+        futures = [
+            self._executor.submit(_encode_in_worker, texts[start:start + slice_size], batch_size)
+            for start in range(0, len(texts), slice_size)
+        ]
+
+        # Wait for every slice so no shared-memory block is left behind if one fails
+        results = []
+        error = None
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                error = error or e
+
+        parts = []
+        for name, shape, dtype in results:
+            block = shared_memory.SharedMemory(name=name)
+            try:
+                parts.append(np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf).copy())
+            finally:
+                block.close()
+                block.unlink()
+        if error is not None:
+            raise error
+        return np.vstack(parts)
+
+    def close(self) -> None:
+        """
+        Shut down the worker processes.
+        """
+        with self._load_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+def create_backend(
+    name: str,
+    model_name: str,
+    device: Optional[str],
+    num_workers: int = 1,
+    torch_threads: int = 1,
+    export_dir: Optional[Path] = None
+):
+    """
+    Build the inference backend selected in the configuration.
+
+    Args:
+        name (str): Backend name: "local", "process", "quantized", "onnx" or "openvino".
+        model_name (str): Name of the pretrained model.
+        device (Optional[str]): Device for the local backend, None to auto-detect; the other backends run on the CPU.
+        num_workers (int): Worker processes for the process backend.
+        torch_threads (int): Intra-op threads per worker for the process backend, and of the
+            quantized, ONNX Runtime and OpenVINO backends.
+        export_dir (Optional[Path]): Where the ONNX and OpenVINO backends keep exported models.
+
+    Returns:
+        An object exposing `load`, `encode` and `close`.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if name == "local":
+        return SentenceTransformerBackend(model_name, device)
+    if name == "process":
+        return ProcessPoolBackend(model_name, num_workers, torch_threads)
+    if name == "quantized":
+        return QuantizedTorchBackend(model_name, torch_threads)
+    if name in ("onnx", "openvino"):
+        export_dir = export_dir or Path.home() / ".cache" / "mybrain_onnx"
+        backend_class = OnnxRuntimeBackend if name == "onnx" else OpenVINOBackend
+        return backend_class(model_name, export_dir, torch_threads)
+    raise ValueError(f"Unknown embedding backend: {name}")
+
+
+def cache_variant(name: str) -> str:
+    """
+    Describe how a backend computes its vectors, for keying the embedding cache.
+
+    Backends whose vectors differ (quantized weights, an exported graph) get
+    different variants, so cached vectors of one are never served to another.
+    The "process" backend runs the same fp32 model as "local" and shares its variant.
+
+    Args:
+        name (str): Backend name, as passed to `create_backend`.
+
+    Returns:
+        str: The backend name, with the export settings for exported backends.
+    """
+    if name == "process":
+        return "local"
+    if name in ("onnx", "openvino"):
+        return f"{name}-opset{ONNX_OPSET}"
+    return name
@@ -0,0 +1,149 @@
+"""
+Dynamic micro-batching in front of `EmbeddingModel.generate_embeddings`.
+
+Concurrent callers each submit a single chunk; the batcher collects them until
+either the batch size or the latency bound is reached and encodes the whole
+batch with one model call.
+"""
+
+import asyncio
+import functools
+import logging
+from typing import List, Optional, Set, Tuple
+
+
+class EmbeddingBatcher:
+    """
+    Collects embedding requests from concurrent coroutines into batched encode calls.
+
+    Attributes:
+        embedding_model: Object exposing `generate_embeddings(texts, metadatas)`.
+        max_batch_size (int): Number of pending requests that triggers an immediate flush.
+        max_latency (float): Seconds the first pending request may wait before a flush.
+        batches (int): Number of encode calls issued so far.
+        items (int): Number of inputs encoded so far.
+    """
+
+    def __init__(self, embedding_model, max_batch_size: int = 64, max_latency_ms: float = 20.0, executor=None):
+        """
+        Initialize the batcher.
+
+        Args:
+            embedding_model: Object exposing `generate_embeddings(texts, metadatas)`.
+            max_batch_size (int): Maximum number of inputs per encode call.
+            max_latency_ms (float): Maximum time in milliseconds a request waits for its batch to fill.
+            executor: Executor used for the blocking encode call. None uses the loop's default executor.
+        """
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be greater than 0.")
+        if max_latency_ms < 0:
+            raise ValueError("max_latency_ms must be non-negative.")
+        self.embedding_model = embedding_model
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+        self.executor = executor
+        self.batches = 0
+        self.items = 0
+        self._pending: List[Tuple[str, dict, Optional[List[int]], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str, metadata: dict, token_ids: Optional[List[int]] = None):
+        """
+        Queue a single input and wait for its embedding.
+
+        Args:
+            text (str): Input text or code for embedding generation.
+            metadata (dict): Metadata to include in the embedding context.
+            token_ids (Optional[List[int]]): Token ids of the text, if the chunker already computed them.
+
+        Returns:
+            np.ndarray: The embedding row for this input.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, metadata, token_ids, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_latency, self._flush)
+        return await future
+
+    async def embed_many(self, texts: List[str], metadatas: List[dict], token_ids: Optional[List[List[int]]] = None) -> list:
+        """
+        Queue several inputs at once and wait for all of their embeddings.
+
+        Args:
+            texts (List[str]): Input texts or code blocks.
+            metadatas (List[dict]): Metadata for each text, in the same order.
+            token_ids (Optional[List[List[int]]]): Token ids for each text, if already computed.
+
+        Returns:
+            list: Embedding rows in input order.
+        """
+        if len(texts) != len(metadatas) or (token_ids is not None and len(token_ids) != len(texts)):
+            raise ValueError("texts, metadatas and token_ids must have the same length.")
+        token_ids = token_ids if token_ids is not None else [None] * len(texts)
+        return await asyncio.gather(*(
+            self.embed(text, metadata, ids) for text, metadata, ids in zip(texts, metadatas, token_ids)
+        ))
+
+    async def drain(self) -> None:
+        """
+        Flush any pending requests and wait until every in-flight batch has finished.
+        """
+        if self._pending:
+            self._flush()
+        while self._in_flight:
+            await asyncio.gather(*list(self._in_flight), return_exceptions=True)
+
+    def _flush(self) -> None:
+        """
+        Hand the pending requests to a background encode task.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, dict, Optional[List[int]], asyncio.Future]]) -> None:
+        """
+        Encode one batch off the event loop and resolve the waiting futures.
+
+        Args:
+            batch (List[Tuple[str, dict, Optional[List[int]], asyncio.Future]]): Pending requests to encode.
+
+        Logs:
+            - Debug: Size of each encoded batch.
+            - Error: If the encode call fails; the error is propagated to every caller in the batch.
+        """
+        texts = [text for text, _, _, _ in batch]
+        metadatas = [metadata for _, metadata, _, _ in batch]
+        token_ids = [ids for _, _, ids, _ in batch]
+        encode = functools.partial(self.embedding_model.generate_embeddings, texts, metadatas)
+        if any(ids is not None for ids in token_ids):
+            encode = functools.partial(encode, token_ids=token_ids)
+
+        loop = asyncio.get_running_loop()
+        try:
+            matrix = await loop.run_in_executor(self.executor, encode)
+        except Exception as e:
+            logging.error(f"Error encoding batch of {len(batch)} inputs: {e}")
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        logging.debug("Encoded batch of %d inputs.", len(batch))
+        for row, (_, _, _, future) in zip(matrix, batch):
+            if not future.done():
+                future.set_result(row)
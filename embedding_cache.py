@@ -0,0 +1,233 @@
+"""
+On-disk, content-addressed cache of embedding vectors.
+
+Vectors live in a memory-mapped float32 matrix with one row per slot; a JSON
+index maps the hash of (model name, backend variant, normalized encoder input) to its slot and
+keeps least-recently-used order for eviction. The hash of the entry stored in
+each slot is kept in a second memory-mapped file and checked on every lookup,
+so an index saved before a slot was reused never returns another input's vector.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+# Size of the SHA-256 digest stored per slot
+_KEY_BYTES = 32
+
+
+class EmbeddingCache:
+    """
+    LRU cache of embeddings backed by a memory-mapped float32 array.
+
+    Attributes:
+        cache_dir (Path): Directory holding the vector and index files.
+        model_name (str): Embedding model the cached vectors belong to.
+        variant (str): How the vectors were computed, e.g. the inference backend and its export settings.
+        max_entries (int): Number of slots; the least recently used entry is evicted when full.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that required the model.
+    """
+
+    def __init__(self, cache_dir: Path, model_name: str, max_entries: int = 200_000, variant: str = "local"):
+        """
+        Initialize the cache, loading an existing index if present.
+
+        Args:
+            cache_dir (Path): Directory holding the vector and index files.
+            model_name (str): Embedding model the cached vectors belong to.
+            max_entries (int): Maximum number of cached vectors.
+            variant (str): How the vectors were computed (see `embedding_backends.cache_variant`);
+                each variant is kept in its own sub-directory.
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be greater than 0.")
+        self.model_name = model_name
+        self.variant = variant
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.cache_dir = Path(cache_dir) / re.sub(r"[^A-Za-z0-9_.-]", "_", variant)
+        self.vectors_path = self.cache_dir / f"{safe_name}.f32"
+        self.index_path = self.cache_dir / f"{safe_name}.index.json"
+        self.keys_path = self.cache_dir / f"{safe_name}.keys"
+
+        self._lock = threading.Lock()
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._next_slot = 0
+        self._dim: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._slot_keys: Optional[np.memmap] = None
+        self._dirty = False
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """
+        Load the slot index from disk if it matches this cache's capacity.
+
+        Logs:
+            - Warning: If the index is unreadable or incompatible and the cache is reset.
+        """
+        if not all(path.exists() for path in (self.index_path, self.vectors_path, self.keys_path)):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                index = json.load(file)
+            if index["capacity"] != self.max_entries:
+                raise ValueError(f"capacity changed from {index['capacity']} to {self.max_entries}")
+            self._dim = index["dim"]
+            self._slots = OrderedDict(index["entries"])
+            self._next_slot = index["next_slot"]
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self.max_entries, self._dim))
+            self._slot_keys = np.memmap(self.keys_path, dtype=np.uint8, mode="r+", shape=(self.max_entries, _KEY_BYTES))
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Resetting embedding cache at {self.cache_dir}: {e}")
+            self._slots = OrderedDict()
+            self._next_slot = 0
+            self._dim = None
+            self._vectors = None
+            self._slot_keys = None
+
+    def _allocate(self, dim: int) -> None:
+        """
+        Create the memory-mapped vector and slot-key files for vectors of the given dimension.
+
+        Args:
+            dim (int): Embedding dimension.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._dim = dim
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="w+", shape=(self.max_entries, dim))
+        self._slot_keys = np.memmap(self.keys_path, dtype=np.uint8, mode="w+", shape=(self.max_entries, _KEY_BYTES))
+        self._slots = OrderedDict()
+        self._next_slot = 0
+
+    def key(self, text: str) -> str:
+        """
+        Compute the cache key for an encoder input.
+
+        Whitespace runs are collapsed before hashing, since the tokenizer ignores them.
+
+        Args:
+            text (str): Encoder input.
+
+        Returns:
+            str: Hex SHA-256 digest of the model name, variant and normalized text.
+        """
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{self.model_name}\0{self.variant}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Look up the embedding of an encoder input.
+
+        Args:
+            text (str): Encoder input.
+
+        Returns:
+            Optional[np.ndarray]: A copy of the cached vector, or None on a miss.
+        """
+        key = self.key(text)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                self.misses += 1
+                return None
+            if self._slot_keys[slot].tobytes() != bytes.fromhex(key):
+                # The slot was reused after the index was saved
+                del self._slots[key]
+                self._dirty = True
+                self.misses += 1
+                return None
+            self._slots.move_to_end(key)
+            self.hits += 1
+            return np.array(self._vectors[slot])
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up several encoder inputs.
+
+        Args:
+            texts (List[str]): Encoder inputs.
+
+        Returns:
+            List[Optional[np.ndarray]]: Cached vectors, with None for each miss.
+        """
+        return [self.get(text) for text in texts]
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        """
+        Store the embedding of an encoder input, evicting the least recently used entry if full.
+
+        Args:
+            text (str): Encoder input.
+            vector (np.ndarray): Its embedding.
+        """
+        key = self.key(text)
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            if self._vectors is None or vector.shape[0] != self._dim:
+                self._allocate(vector.shape[0])
+
+            slot = self._slots.get(key)
+            if slot is None:
+                if self._next_slot < self.max_entries:
+                    slot = self._next_slot
+                    self._next_slot += 1
+                else:
+                    _, slot = self._slots.popitem(last=False)
+            self._slots[key] = slot
+            self._slots.move_to_end(key)
+            # Clear the slot's key while its vector is replaced, so a stale index entry cannot match it
+            self._slot_keys[slot] = 0
+            self._vectors[slot] = vector
+            self._slot_keys[slot] = np.frombuffer(bytes.fromhex(key), dtype=np.uint8)
+            self._dirty = True
+
+    def save(self) -> None:
+        """
+        Flush cached vectors and atomically write the index to disk.
+        """
+        with self._lock:
+            if not self._dirty or self._vectors is None:
+                return
+            self._vectors.flush()
+            self._slot_keys.flush()
+            tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump({
+                    "model_name": self.model_name,
+                    "variant": self.variant,
+                    "dim": self._dim,
+                    "capacity": self.max_entries,
+                    "next_slot": self._next_slot,
+                    "entries": list(self._slots.items()),
+                }, file)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+        logging.info(f"Saved embedding cache: {len(self._slots)} entries, {self.hits} hits, {self.misses} misses.")
+
+    def stats(self) -> dict:
+        """
+        Report cache effectiveness.
+
+        Returns:
+            dict: Hit and miss counts, hit rate and number of cached entries.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._slots),
+        }
@@ -0,0 +1,154 @@
+"""
+Encoder input template for chunks.
+
+Only a few selected metadata fields (by default the note's title and tags) are
+prefixed to each chunk's text, and the prefix is capped at a token budget so it
+cannot crowd the chunk out of the model's sequence window. Everything else in
+the metadata is stored with the vector but never encoded. Prefixes are built
+once per distinct set of field values, so the chunks of a note share one.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Metadata that changes without the chunk changing, kept out of the "*" template
+CONTEXT_EXCLUDED_KEYS = {"timestamp", "start", "end", "length"}
+# Number of distinct prefixes kept before the prefix cache is reset
+_PREFIX_CACHE_SIZE = 1024
+
+
+def _format_value(value) -> str:
+    """
+    Render a metadata value for the prefix; lists are joined with ", ".
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple, set)):
+        return ", ".join(str(item) for item in value)
+    return str(value)
+
+
+class EmbeddingInputTemplate:
+    """
+    Builds the encoder input of a chunk from its text and selected metadata fields.
+
+    With fields ("title", "tags") a chunk of a note titled "Trip" is encoded as
+    "title: Trip\\ntags: travel, plans\\n<chunk text>". The field list "*" keeps
+    the previous format, `Metadata: {...}\\nContent: <chunk text>`, with all
+    metadata except `CONTEXT_EXCLUDED_KEYS`.
+
+    Attributes:
+        fields (Tuple[str, ...]): Metadata keys included in the prefix, in order.
+        max_prefix_tokens (int): Token budget of the prefix; 0 for no limit.
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str] = ("title", "tags"),
+        max_prefix_tokens: int = 32,
+        tokenizer_loader: Optional[Callable[[], object]] = None
+    ):
+        """
+        Initialize the template.
+
+        Args:
+            fields (Sequence[str]): Metadata keys included in the prefix, or ["*"] for all of them.
+            max_prefix_tokens (int): Token budget of the prefix; 0 for no limit.
+            tokenizer_loader (Optional[Callable[[], object]]): Returns the model's fast tokenizer;
+                needed only to cut prefixes that may exceed the budget and for `prefix_token_ids`.
+        """
+        self.fields = tuple(field.strip() for field in fields if field.strip())
+        self.max_prefix_tokens = max_prefix_tokens
+        self.tokenizer_loader = tokenizer_loader
+        self._all_fields = self.fields == ("*",)
+        self._prefixes: Dict[str, Tuple[str, Optional[List[int]]]] = {}
+
+    def _raw_prefix(self, metadata: dict) -> str:
+        """
+        Return the untruncated prefix of a chunk.
+        """
+        if self._all_fields:
+            context_metadata = {key: value for key, value in metadata.items() if key not in CONTEXT_EXCLUDED_KEYS}
+            return f"Metadata: {context_metadata}\nContent: "
+        lines = []
+        for field in self.fields:
+            value = metadata.get(field)
+            if value not in (None, "", [], ()):
+                lines.append(f"{field}: {_format_value(value)}\n")
+        return "".join(lines)
+
+    def identity(self, text: str, metadata: dict) -> str:
+        """
+        Return a string that is equal for two chunks exactly when their encoder inputs are.
+
+        Unlike `build`, this never needs the tokenizer, so chunk ids can be derived from it cheaply.
+
+        Args:
+            text (str): Chunk text.
+            metadata (dict): Chunk metadata.
+
+        Returns:
+            str: The token budget, the untruncated prefix and the text.
+        """
+        return f"{self.max_prefix_tokens}\0{self._raw_prefix(metadata)}\0{text}"
+
+    def _prefix_entry(self, raw: str) -> Tuple[str, Optional[List[int]]]:
+        """
+        Return the cached (prefix, token ids) of an untruncated prefix, cutting it to the budget if needed.
+        """
+        entry = self._prefixes.get(raw)
+        if entry is None:
+            prefix = raw
+            # A prefix no longer than the budget in characters cannot exceed it in tokens
+            if self.max_prefix_tokens and len(raw) > self.max_prefix_tokens:
+                offsets = self.tokenizer_loader()(
+                    raw, add_special_tokens=False, return_offsets_mapping=True
+                )["offset_mapping"]
+                if len(offsets) > self.max_prefix_tokens:
+                    prefix = raw[:offsets[self.max_prefix_tokens - 1][1]].rstrip() + "\n"
+            if len(self._prefixes) >= _PREFIX_CACHE_SIZE:
+                self._prefixes.clear()
+            entry = self._prefixes[raw] = (prefix, None)
+        return entry
+
+    def prefix(self, metadata: dict) -> str:
+        """
+        Return the metadata prefix of a chunk, cut to the token budget.
+
+        Args:
+            metadata (dict): Chunk metadata.
+
+        Returns:
+            str: The prefix, empty if none of the fields are set.
+        """
+        return self._prefix_entry(self._raw_prefix(metadata))[0]
+
+    def build(self, text: str, metadata: dict) -> str:
+        """
+        Build the encoder input of a chunk.
+
+        Args:
+            text (str): Chunk text.
+            metadata (dict): Chunk metadata.
+
+        Returns:
+            str: The prefix followed by the text.
+        """
+        prefix = self._prefix_entry(self._raw_prefix(metadata))[0]
+        return prefix + text if prefix else text
+
+    def prefix_token_ids(self, metadata: dict) -> List[int]:
+        """
+        Tokenize the prefix of a chunk, reusing the ids of repeated prefixes.
+
+        Args:
+            metadata (dict): Chunk metadata.
+
+        Returns:
+            List[int]: Token ids of `prefix(metadata)` without special tokens.
+        """
+        raw = self._raw_prefix(metadata)
+        prefix, ids = self._prefix_entry(raw)
+        if ids is None:
+            ids = self.tokenizer_loader()(prefix, add_special_tokens=False)["input_ids"] if prefix else []
+            self._prefixes[raw] = (prefix, ids)
+        return ids
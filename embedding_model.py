@@ -1,37 +1,113 @@
-from sentence_transformers import SentenceTransformer
+from pathlib import Path
+from typing import List, Optional, Sequence
+import numpy as np
 import logging
-import torch
+import threading
+from embedding_backends import create_backend
+from embedding_input import EmbeddingInputTemplate
+from metrics import METRICS
+from token_chunker import load_tokenizer
+
+
+def padded_length(lengths: List[int], batch_size: int) -> int:
+    """
+    Total sequence length processed when inputs are padded to the longest one in each batch.
+
+    Args:
+        lengths (List[int]): Input lengths in encoding order.
+        batch_size (int): Number of inputs per forward pass.
+
+    Returns:
+        int: Sum over batches of the batch's longest length times its size.
+    """
+    return sum(
+        max(lengths[start:start + batch_size]) * len(lengths[start:start + batch_size])
+        for start in range(0, len(lengths), batch_size)
+    )
 
 
 class EmbeddingModel:
     """
     A wrapper for a pretrained SentenceTransformer embedding model.
 
+    Inference is delegated to a backend from `embedding_backends`, either in this
+    process or spread across worker processes.
+
     Methods:
         generate_embedding(text, metadata): Generates an embedding for input text with metadata.
+        generate_embeddings(texts, metadatas): Generates embeddings for a batch of texts in one encode call.
     """
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2", device: str = None):
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        device: str = None,
+        batch_size: int = 64,
+        cache=None,
+        backend: str = "local",
+        num_workers: int = 1,
+        torch_threads: int = 1,
+        input_fields: Sequence[str] = ("title", "tags"),
+        input_max_tokens: int = 32,
+        export_dir: Optional[Path] = None,
+        sort_by_length: bool = True
+    ):
         """
         Initialize the embedding model with lazy loading.
 
         Args:
             model_name (str): Name of the pretrained model.
-            device (str): Device to use for inference ('cpu' or 'cuda'). If None, defaults to auto-detection.
+            device (str): Device to use for inference ('cpu' or 'cuda'). If None, CUDA is used when
+                available, detected when the model loads so torch is not imported before then.
+            batch_size (int): Number of inputs per forward pass in `generate_embeddings`.
+            cache (EmbeddingCache): Optional embedding cache; hits skip the model entirely.
+            backend (str): "local" to run in this process, "process" to use a pool of worker processes,
+                or "quantized", "onnx" or "openvino" for faster CPU inference (see `embedding_backends`).
+            num_workers (int): Worker processes for the "process" backend.
+            torch_threads (int): Intra-op threads per worker for the "process" backend, and of the CPU backends.
+            input_fields (Sequence[str]): Metadata fields prefixed to each chunk's text, or ["*"] for all.
+            input_max_tokens (int): Token budget of that prefix; 0 for no limit.
+            export_dir (Optional[Path]): Where the "onnx" and "openvino" backends keep exported models.
+            sort_by_length (bool): Encode inputs longest first to cut padding, restoring the input order after.
         """
         self.model_name = model_name
-        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
-        self.model = None  # Lazy loading
-        logging.info(f"EmbeddingModel initialized with model '{self.model_name}' on device '{self.device}'.")
+        self.device = device
+        self.batch_size = batch_size
+        self.cache = cache
+        self.sort_by_length = sort_by_length
+        self.padding = {"real": 0, "padded": 0, "padded_unsorted": 0}
+        self._padding_lock = threading.Lock()
+        self.backend = create_backend(backend, model_name, self.device, num_workers, torch_threads, export_dir)  # Lazy loading
+        self._tokenizer = None  # Lazy loading
+        self._tokenizer_lock = threading.Lock()
+        self.input_template = EmbeddingInputTemplate(input_fields, input_max_tokens, self.get_tokenizer)
+        logging.info(f"EmbeddingModel initialized with model '{self.model_name}' on device '{self.device or 'auto'}' "
+                     f"using the '{backend}' backend.")
 
     def load_model(self):
         """
-        Load the SentenceTransformer model when needed.
+        Load the model (or start the worker processes) when needed.
+        """
+        self.backend.load()
+
+    def close(self):
+        """
+        Release the model and stop any worker processes.
+        """
+        self.backend.close()
+
+    def build_context(self, text: str, metadata: dict) -> str:
+        """
+        Build the encoder input for a chunk from its text and the template's metadata fields.
+
+        Args:
+            text (str): Input text or code for embedding generation.
+            metadata (dict): Chunk metadata; only the template's fields are encoded.
+
+        Returns:
+            str: The string passed to the encoder.
         """
-        if self.model is None:
-            logging.info("Loading SentenceTransformer model...")
-            self.model = SentenceTransformer(self.model_name, device=self.device)
-            logging.info("Model loaded successfully.")
+        return self.input_template.build(text, metadata)
 
     def generate_embedding(self, text: str, metadata: dict):
         """
@@ -42,10 +118,162 @@ class EmbeddingModel:
             metadata (dict): Metadata to include in the embedding context.
 
         Returns:
-            List[float]: The generated embedding vector.
+            np.ndarray: The generated embedding vector.
+        """
+        return self.generate_embeddings([text], [metadata])[0]
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed search queries as plain text, without the metadata context or the embedding cache.
+
+        Args:
+            queries (List[str]): Query texts.
+
+        Returns:
+            np.ndarray: Matrix with one embedding row per query.
+        """
+        return self.backend.encode(list(queries), self.batch_size)
+
+    def get_tokenizer(self):
+        """
+        Return the model's fast tokenizer, loading it on first use.
+
+        Returns:
+            transformers.PreTrainedTokenizerFast: The tokenizer matching this model.
         """
-        self.load_model()
+        with self._tokenizer_lock:
+            if self._tokenizer is None:
+                self._tokenizer = load_tokenizer(self.model_name)
+            return self._tokenizer
 
-        # Combine metadata with text for embedding context
-        context = f"Metadata: {metadata}\nContent: {text}"
-        return self.model.encode(context)
+    def generate_embeddings(self, texts: List[str], metadatas: List[dict], token_ids: List[List[int]] = None) -> np.ndarray:
+        """
+        Generate embeddings for a batch of texts with one encode call.
+
+        Args:
+            texts (List[str]): Input texts or code blocks.
+            metadatas (List[dict]): Metadata for each text, in the same order.
+            token_ids (List[List[int]]): Optional token ids of each text from the token-aware
+                chunker; when every input has them the text is not tokenized again.
+
+        Returns:
+            np.ndarray: Matrix of shape (len(texts), dimension), one row per input.
+
+        Raises:
+            ValueError: If `texts`, `metadatas` and `token_ids` differ in length.
+        """
+        if len(texts) != len(metadatas) or (token_ids is not None and len(token_ids) != len(texts)):
+            raise ValueError("texts, metadatas and token_ids must have the same length.")
+
+        contexts = [self.build_context(text, metadata) for text, metadata in zip(texts, metadatas)]
+        if self.cache is None:
+            return self._encode(contexts, metadatas, token_ids)
+
+        # Only encode inputs the cache has not seen
+        cached = self.cache.get_many(contexts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        METRICS.inc("embedding_cache.hits", len(contexts) - len(missing))
+        if missing:
+            encoded = self._encode(
+                [contexts[i] for i in missing],
+                [metadatas[i] for i in missing],
+                [token_ids[i] for i in missing] if token_ids is not None else None
+            )
+            for i, vector in zip(missing, encoded):
+                self.cache.put(contexts[i], vector)
+                cached[i] = vector
+        return np.vstack(cached)
+
+    def _encode(self, contexts: List[str], metadatas: List[dict], token_ids: List[List[int]] = None) -> np.ndarray:
+        """
+        Run the model on a list of encoder inputs.
+
+        If token ids are available for every input and the backend accepts them, the
+        encoder input is assembled from the tokenized metadata prefix and the cached
+        chunk ids instead of tokenizing the full context string. Inputs are encoded
+        longest first, so each forward pass holds inputs of similar length and pads
+        little, and the rows are put back in input order afterwards. Padding is only
+        counted on the token-id path, where the exact sequence lengths are known.
+
+        Args:
+            contexts (List[str]): Encoder inputs.
+            metadatas (List[dict]): Metadata of each input.
+            token_ids (List[List[int]]): Optional chunk token ids of each input.
+
+        Returns:
+            np.ndarray: Matrix with one embedding row per input.
+        """
+        METRICS.inc("encode.inputs", len(contexts))
+        use_token_ids = (
+            token_ids is not None
+            and all(ids is not None for ids in token_ids)
+            and hasattr(self.backend, "encode_token_ids")
+        )
+        if use_token_ids:
+            inputs = [self.input_template.prefix_token_ids(metadata) + ids for metadata, ids in zip(metadatas, token_ids)]
+            # Sequence lengths as the backend sees them: ids beyond the model's max length are dropped
+            budget = self.backend.token_budget()
+            lengths = [min(len(ids), budget) for ids in inputs]
+        else:
+            # Characters only approximate token counts, but are good enough to order the inputs;
+            # sentence-transformers reorders them again, the ONNX and OpenVINO backends batch them as given
+            inputs = contexts
+            lengths = [len(text) for text in inputs]
+
+        order = None
+        if self.sort_by_length and len(inputs) > 1:
+            order = sorted(range(len(inputs)), key=lengths.__getitem__, reverse=True)
+            inputs = [inputs[i] for i in order]
+        if use_token_ids:
+            self._record_padding(lengths, order)
+
+        with METRICS.timer("encode"):
+            if use_token_ids:
+                matrix = self.backend.encode_token_ids(inputs, self.batch_size)
+            else:
+                matrix = self.backend.encode(inputs, self.batch_size)
+        if order is None:
+            return matrix
+        # Scatter the rows back: row i of the sorted matrix belongs to input order[i]
+        result = np.empty_like(matrix)
+        result[order] = matrix
+        return result
+
+    def _record_padding(self, lengths: List[int], order: Optional[List[int]]) -> None:
+        """
+        Count real and padded token lengths per forward pass, with and without sorting.
+
+        Args:
+            lengths (List[int]): Token count of each input, capped at the model's maximum and
+                excluding special tokens, in input order.
+            order (Optional[List[int]]): Encoding order, or None if inputs are encoded as given.
+        """
+        unsorted = padded_length(lengths, self.batch_size)
+        padded = padded_length([lengths[i] for i in order], self.batch_size) if order is not None else unsorted
+        real = sum(lengths)
+        with self._padding_lock:
+            self.padding["real"] += real
+            self.padding["padded"] += padded
+            self.padding["padded_unsorted"] += unsorted
+        METRICS.inc("encode.padding.real", real)
+        METRICS.inc("encode.padding.padded", padded)
+        METRICS.inc("encode.padding.padded_unsorted", unsorted)
+
+    def padding_efficiency(self) -> Optional[dict]:
+        """
+        Report how much of the encoded sequence length was real input rather than padding.
+
+        Only inputs encoded from token ids are counted. Text inputs are tokenized by
+        the backend, and sentence-transformers also sorts them by length itself, so
+        neither their token counts nor their batching are known here.
+
+        Returns:
+            Optional[dict]: Efficiency (real / padded length) of the batches as encoded and as
+            they would have been in arrival order, or None if no input was measured.
+        """
+        if not self.padding["padded"]:
+            return None
+        return {
+            "efficiency": round(self.padding["real"] / self.padding["padded"], 4),
+            "unsorted_efficiency": round(self.padding["real"] / self.padding["padded_unsorted"], 4),
+        }
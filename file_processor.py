@@ -1,26 +1,56 @@
+import hashlib
 import logging
 from pathlib import Path
+from typing import Callable, List, Optional, Tuple
 from llm_client import LLMClient
-from metadata_handler import extract_metadata
-from file_handler import FileHandler
+from resources import Resources
+from embedding_input import EmbeddingInputTemplate
+from note_record import NoteRecord
 from chunker import chunk_content_with_metadata
+from metrics import METRICS
+from markdown_chunker import chunk_markdown
+from token_chunker import chunk_content_by_tokens, chunk_token_ids
 import asyncio
 
 
+def make_chunk_id(file_path: Path, chunk_data: dict, template: EmbeddingInputTemplate, occurrence: int = 0) -> str:
+    """
+    Derive a stable chunk id from the chunk's encoder input.
+
+    Two chunks get the same id exactly when they would produce the same embedding,
+    so an edit to one paragraph does not change the ids of the chunks around it.
+
+    Args:
+        file_path (Path): The note the chunk belongs to.
+        chunk_data (dict): Chunk data with "chunk" and its merged "metadata".
+        template (EmbeddingInputTemplate): Template the encoder input is built with.
+        occurrence (int): How many identical chunks precede this one in the note.
+
+    Returns:
+        str: "<file_path>#<digest>", with "-<occurrence>" appended for repeated chunks.
+    """
+    context = template.identity(chunk_data["chunk"], chunk_data["metadata"])
+    digest = hashlib.sha256(context.encode("utf-8")).hexdigest()[:24]
+    return f"{file_path}#{digest}" + (f"-{occurrence}" if occurrence else "")
+
+
 class FileProcessor:
     """
     Processes files for metadata extraction and embedding storage.
     """
 
-    def __init__(self, config):
+    def __init__(self, config, resources: Optional[Resources] = None):
         """
         Initialize the file processor with the provided configuration.
 
         Args:
             config (Config): Configuration object containing settings.
+            resources (Optional[Resources]): Shared model, vector store, dedup index and pools.
+                If None the processor builds its own and releases them in `close`.
         """
         self.config = config
-        self.llm_client = LLMClient(config)
+        self.llm_client = LLMClient(config, resources)
+        self.dedup_index = self.llm_client.resources.dedup_index
 
     def should_process_file(self, file_path: Path) -> bool:
         """
@@ -34,38 +64,170 @@ class FileProcessor:
         """
         return file_path.suffix in set(self.config.allowed_extensions)
 
-    async def validate_and_process_file(self, file_path: Path) -> dict:
+    def prepare_chunks(self, record: NoteRecord) -> List[Tuple[str, dict]]:
         """
-        Validate and process a file by extracting metadata, chunking, and storing embeddings.
+        Split an already read note into chunks ready for embedding.
+
+        The note's frontmatter was parsed when the record was loaded, so no YAML is parsed here.
 
         Args:
-            file_path (Path): The path of the file to process.
+            record (NoteRecord): The note, read once.
 
         Returns:
-            dict: Result of the processing operation.
+            List[Tuple[str, dict]]: (chunk id, chunk data) pairs; ids are content hashes (see
+            `make_chunk_id`) and each chunk's metadata includes its chunk type and (start, end)
+            offsets in the note.
+
+        Raises:
+            ValueError: If the content is empty or whitespace only.
         """
-        try:
-            # Read file content
-            content = FileHandler.read_file(file_path)
+        file_path = record.path
+        content = record.content
+        if not content.strip():
+            raise ValueError(f"File {file_path} is empty or contains only whitespace.")
+
+        metadata = record.metadata()
+        metadata["file_path"] = str(file_path)
+
+        # Generate chunks with metadata, by fixed windows, Markdown structure or the embedding model's tokens
+        if self.config.chunking_mode == "markdown":
+            chunk_generator = chunk_markdown(content, metadata, chunk_size=self.config.chunk_size)
+        elif self.config.chunking_mode == "tokens":
+            chunk_generator = chunk_content_by_tokens(
+                content,
+                metadata,
+                self.llm_client.embedding_model.get_tokenizer(),
+                self.config.chunk_max_tokens,
+                self.config.chunk_overlap_tokens
+            )
+        else:
+            chunk_generator = chunk_content_with_metadata(
+                content, metadata, chunk_size=self.config.chunk_size, overlap=self.config.chunk_overlap
+            )
+        template = self.llm_client.embedding_model.input_template
+        chunks = []
+        occurrences = {}
+        with METRICS.timer("chunk"):
+            for chunk_data in chunk_generator:
+                chunk_data["metadata"] = {
+                    **chunk_data["metadata"],
+                    "chunk_type": chunk_data["type"],
+                    "start": chunk_data["start"],
+                    "end": chunk_data["end"],
+                }
+                chunk_id = make_chunk_id(file_path, chunk_data, template)
+                occurrence = occurrences.get(chunk_id, 0)
+                occurrences[chunk_id] = occurrence + 1
+                if occurrence:
+                    chunk_id = make_chunk_id(file_path, chunk_data, template, occurrence)
+                chunks.append((chunk_id, chunk_data))
+        METRICS.inc("chunks", len(chunks))
+        return chunks
+
+    def deduplicate(self, chunks: List[Tuple[str, dict]]) -> List[Tuple[str, dict]]:
+        """
+        Register chunks in the vault-wide dedup index and drop those already stored.
+
+        The rows of the returned chunks are unwritten in the index until `confirm_chunks`
+        is called for them; if they cannot be stored, call `discard_chunks` instead.
+
+        Args:
+            chunks (List[Tuple[str, dict]]): (chunk id, chunk data) pairs from `prepare_chunks`.
+
+        Returns:
+            List[Tuple[str, dict]]: The chunks that must be embedded and stored; all of them
+            if deduplication is disabled.
+        """
+        if self.dedup_index is None:
+            return chunks
+        unique = [(chunk_id, chunk_data) for chunk_id, chunk_data in chunks if self.dedup_index.add(chunk_id, chunk_data)]
+        METRICS.inc("dedup.hits", len(chunks) - len(unique))
+        return unique
+
+    def confirm_chunks(self, chunk_ids: List[str], on_stored: Callable[[], None]) -> None:
+        """
+        Mark the rows of a file's new chunks as written, then run `on_stored` once every
+        row its chunks were deduplicated against is written too.
+
+        Args:
+            chunk_ids (List[str]): Ids of all the file's current chunks.
+            on_stored (Callable[[], None]): Called when the file's content is fully stored.
+        """
+        if self.dedup_index is None:
+            on_stored()
+            return
+        self.dedup_index.confirm(chunk_ids)
+        self.dedup_index.when_written(chunk_ids, on_stored)
+
+    async def discard_chunks(self, chunk_ids: List[str]) -> None:
+        """
+        Undo `deduplicate` for chunks whose embedding or write failed.
+
+        Args:
+            chunk_ids (List[str]): Ids of the chunks passed to `deduplicate`.
+        """
+        if self.dedup_index is not None:
+            await self.llm_client.delete_embeddings(self.dedup_index.discard(chunk_ids))
+
+    async def update_chunks(self, chunks: List[Tuple[str, dict]]) -> None:
+        """
+        Refresh the stored metadata of chunks that moved within their note.
+
+        Args:
+            chunks (List[Tuple[str, dict]]): (chunk id, chunk data) pairs with the new offsets.
+        """
+        if self.dedup_index is not None:
+            chunks = [
+                (chunk_id, chunk_data) for chunk_id, chunk_data in chunks
+                if self.dedup_index.move(chunk_id, chunk_data["metadata"].get("start"), chunk_data["metadata"].get("end"))
+            ]
+        await self.llm_client.update_metadata(
+            [chunk_id for chunk_id, _ in chunks],
+            [chunk_data["metadata"] for _, chunk_data in chunks]
+        )
+
+    async def embed_and_store(self, chunks: List[Tuple[str, dict]], on_written: Optional[Callable[[], None]] = None) -> None:
+        """
+        Embed a file's chunks through the shared batcher and buffer them for the vector store.
 
-            if not content.strip():
-                raise ValueError(f"File {file_path} is empty or contains only whitespace.")
+        Args:
+            chunks (List[Tuple[str, dict]]): (chunk id, chunk data) pairs from `prepare_chunks`.
+            on_written (Optional[Callable[[], None]]): Called once the chunks have been written.
+        """
+        if not chunks:
+            if on_written is not None:
+                on_written()
+            return
+        ids = [chunk_id for chunk_id, _ in chunks]
+        documents = [chunk_data["chunk"] for _, chunk_data in chunks]
+        metadatas = [chunk_data["metadata"] for _, chunk_data in chunks]
+        embeddings = await self.llm_client.generate_embeddings(documents, metadatas, chunk_token_ids(chunks))
+        await self.llm_client.store_embeddings(ids, documents, metadatas, embeddings, on_written=on_written)
 
-            # Extract metadata
-            metadata = extract_metadata(content)
-            metadata["file_path"] = str(file_path)
+    async def validate_and_process_file(self, file_path: Path) -> dict:
+        """
+        Validate and process a file by extracting metadata, chunking, and storing embeddings.
 
-            # Generate chunks with metadata
-            chunk_generator = chunk_content_with_metadata(content, metadata, chunk_size=500, overlap=50)
+        Args:
+            file_path (Path): The path of the file to process.
 
-            # Process each chunk
-            results = []
-            for chunk_num, chunk_data in enumerate(chunk_generator, start=1):
-                result = await self.llm_client.save_embedding(chunk_data["chunk"], chunk_data["metadata"], f"{file_path}_{chunk_num}")
-                results.append(result)
+        Returns:
+            dict: Result of the processing operation, including the stored chunk ids on success.
+        """
+        try:
+            record = NoteRecord.load(file_path)
+            chunks = self.prepare_chunks(record)
+            chunk_ids = [chunk_id for chunk_id, _ in chunks]
+            try:
+                await self.embed_and_store(
+                    self.deduplicate(chunks), on_written=lambda: self.confirm_chunks(chunk_ids, lambda: None)
+                )
+            except Exception:
+                await self.discard_chunks(chunk_ids)
+                raise
 
-            logging.info(f"Successfully processed file: {file_path}")
-            return {"success": True, "results": results}
+            logging.debug("Successfully processed file: %s", file_path)
+            return {"success": True, "chunk_ids": [chunk_id for chunk_id, _ in chunks]}
         except Exception as e:
             logging.error(f"Error processing file {file_path}: {e}")
             return {"success": False, "error": str(e)}
@@ -78,11 +240,43 @@ class FileProcessor:
             file_paths (list): List of file paths to process.
             max_workers (int): Maximum number of parallel workers.
         """
-        loop = asyncio.get_event_loop()
         tasks = [self.validate_and_process_file(file_path) for file_path in file_paths]
         results = await asyncio.gather(*tasks)
+        await self.flush()
         for result in results:
             if result["success"]:
                 logging.info(f"Processed file successfully: {result}")
             else:
                 logging.error(f"File processing failed: {result['error']}")
+
+    async def delete_chunks(self, chunk_ids: list) -> None:
+        """
+        Remove previously stored chunks from the vector store.
+
+        With deduplication, a stored row is only deleted once no chunk refers to it.
+
+        Args:
+            chunk_ids (list): Ids of the chunks to delete.
+        """
+        if self.dedup_index is not None:
+            chunk_ids = self.dedup_index.release(chunk_ids)
+        await self.llm_client.delete_embeddings(chunk_ids)
+
+    async def flush(self) -> int:
+        """
+        Write any embeddings still buffered by the LLM client and the source lists of deduplicated rows.
+
+        Returns:
+            int: Number of rows written.
+        """
+        rows = await self.llm_client.flush()
+        if self.dedup_index is not None:
+            await self.llm_client.update_metadata(*self.dedup_index.pending_updates())
+            self.dedup_index.save()
+        return rows
+
+    def close(self) -> None:
+        """
+        Release the resources held by the LLM client.
+        """
+        self.llm_client.close()
@@ -1,8 +1,8 @@
+import asyncio
 import logging
-import chromadb
-from chromadb.utils import embedding_functions
-from embedding_model import EmbeddingModel
-import os
+from typing import Callable, Optional
+from resources import Resources
+from vector_store_writer import sanitize_metadata
 
 
 class LLMClient:
@@ -10,50 +10,119 @@ class LLMClient:
     Manages interactions with the Language Learning Model (LLM) and the Chroma vector database.
 
     Responsibilities:
-        - Initialize and configure the Chroma vector store.
-        - Generate embeddings using a custom PyTorch model.
+        - Store, update and delete embeddings in the shared Chroma vector store.
+        - Generate embeddings using the shared model (see `Resources`).
         - Provide utility functions for text tokenization and LLM interactions.
     """
 
-    def __init__(self, config):
+    def __init__(self, config, resources: Optional[Resources] = None):
         """
         Initialize the LLM client with the provided configuration.
 
+        Nothing heavy happens here: the vector store is opened on first use and the
+        model is loaded on the first embedding, or earlier by `Resources.warm`.
+
         Args:
             config (Config): Configuration object containing settings.
+            resources (Optional[Resources]): Shared model, vector store and pools. If None the
+                client builds its own and releases them in `close`.
         """
         self.config = config
-        self.vector_store = self._initialize_vector_store()
-        self.embedding_model = EmbeddingModel()
+        self._owns_resources = resources is None
+        self.resources = (resources or Resources(config)).startup()
 
-    def _initialize_vector_store(self):
+    @property
+    def embedding_model(self):
+        """
+        The shared embedding model.
+        """
+        return self.resources.embedding_model
+
+    @property
+    def embedding_cache(self):
+        """
+        The shared embedding cache, or None if disabled.
         """
-        Initialize and configure the Chroma vector store for managing embeddings.
+        return self.resources.embedding_cache
+
+    @property
+    def embedding_batcher(self):
+        """
+        The shared embedding micro-batcher.
+        """
+        return self.resources.embedding_batcher
+
+    @property
+    def vector_store(self):
+        """
+        The shared Chroma collection, opened on first access; None if opening it failed.
+        """
+        return self.resources.vector_store
+
+    @property
+    def writer(self):
+        """
+        The shared batched vector-store writer.
+        """
+        return self.resources.writer
+
+    async def generate_embedding(self, text: str, metadata: dict):
+        """
+        Generate an embedding through the shared micro-batcher.
+
+        Args:
+            text (str): Input text or code for embedding generation.
+            metadata (dict): Metadata to include in the embedding context.
 
         Returns:
-            chromadb.Collection: Chroma collection instance for storing and querying embeddings.
+            np.ndarray: The generated embedding vector.
+        """
+        return await self.embedding_batcher.embed(text, metadata)
 
-        Logs:
-            - Error: If initialization fails.
+    async def generate_embeddings(self, texts: list, metadatas: list, token_ids: list = None) -> list:
         """
-        try:
-            client = chromadb.Client()
-            embedding_function = embedding_functions.OpenAIEmbeddingFunction(
-                api_key=os.getenv("OPENAI_API_KEY")
-            )
-            collection = client.get_or_create_collection(
-                name="notes_collection",
-                embedding_function=embedding_function
-            )
-            logging.info("Successfully initialized Chroma vector store.")
-            return collection
-        except Exception as e:
-            logging.error(f"Failed to initialize Chroma vector store: {e}")
-            return None
+        Generate embeddings for several inputs through the shared micro-batcher.
+
+        Args:
+            texts (list): Input texts or code blocks.
+            metadatas (list): Metadata for each text, in the same order.
+            token_ids (list): Optional token ids for each text from the token-aware chunker.
+
+        Returns:
+            list: Embedding vectors in input order.
+        """
+        return await self.embedding_batcher.embed_many(texts, metadatas, token_ids)
+
+    async def store_embeddings(
+        self,
+        doc_ids: list,
+        documents: list,
+        metadatas: list,
+        embeddings: list,
+        on_written: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Buffer precomputed embeddings for a batched write to the vector store.
+
+        Args:
+            doc_ids (list): Unique identifiers of the documents.
+            documents (list): Document texts.
+            metadatas (list): Metadata for each document.
+            embeddings (list): Embedding vector for each document.
+            on_written (Optional[Callable[[], None]]): Called once all of these rows have been
+                written; right away if there are none.
+        """
+        if not doc_ids:
+            if on_written is not None:
+                on_written()
+            return
+        last = len(doc_ids) - 1
+        for index, (doc_id, document, metadata, embedding) in enumerate(zip(doc_ids, documents, metadatas, embeddings)):
+            await self.writer.add(doc_id, document, metadata, embedding, on_written if index == last else None)
 
-    def save_embedding(self, document: str, metadata: dict, doc_id: str) -> None:
+    async def save_embedding(self, document: str, metadata: dict, doc_id: str) -> None:
         """
-        Save a document's embedding to the Chroma vector store.
+        Embed a document and buffer it for a batched write to the Chroma vector store.
 
         Args:
             document (str): The document text to generate an embedding for.
@@ -61,17 +130,87 @@ class LLMClient:
             doc_id (str): A unique identifier for the document.
 
         Logs:
-            - Info: When an embedding is successfully saved.
-            - Error: If saving to the vector store fails.
+            - Debug: When an embedding is buffered for writing.
+            - Error: If embedding or writing fails.
         """
         try:
-            embedding = self.embedding_model.generate_embedding(document, metadata).tolist()
-            self.vector_store.add(
-                documents=[document],
-                metadatas=[metadata],
-                ids=[doc_id],
-                embeddings=[embedding]
-            )
-            logging.info(f"Successfully saved embedding for document ID: {doc_id}")
+            embedding = await self.generate_embedding(document, metadata)
+            await self.writer.add(doc_id, document, metadata, embedding)
+            logging.debug("Buffered embedding for document ID: %s", doc_id)
         except Exception as e:
             logging.error(f"Error saving embedding for document ID {doc_id}: {e}")
+
+    async def flush(self) -> int:
+        """
+        Finish pending embeddings and write every buffered row to the vector store.
+
+        Returns:
+            int: Number of rows written by this flush.
+        """
+        return await self.resources.flush()
+
+    async def update_metadata(self, doc_ids: list, metadatas: list) -> None:
+        """
+        Merge new fields into the stored metadata of existing documents without re-embedding them.
+
+        Chroma's `update` replaces a row's whole metadata, so the stored metadata is read
+        first and the given fields are laid over it; fields not given, such as "tags" or
+        "chunk_type" of a deduplicated row, are kept. If any of the documents is still
+        buffered by the writer, the writer is flushed first so the update reaches it;
+        otherwise buffered rows of other files are left to their batch.
+
+        Args:
+            doc_ids (list): Identifiers of the documents to update.
+            metadatas (list): Fields to set for each document.
+
+        Logs:
+            - Debug: Number of documents updated.
+            - Error: If updating the vector store fails.
+        """
+        if not doc_ids:
+            return
+        if self.writer.is_pending(doc_ids):
+            await self.writer.flush()
+        sanitized = [sanitize_metadata(metadata) for metadata in metadatas]
+
+        def merge_and_update() -> None:
+            stored = self.vector_store.get(ids=list(doc_ids), include=["metadatas"])
+            current = dict(zip(stored["ids"], stored["metadatas"] or []))
+            merged = [{**(current.get(doc_id) or {}), **fields} for doc_id, fields in zip(doc_ids, sanitized)]
+            self.vector_store.update(ids=list(doc_ids), metadatas=merged)
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.resources.executor, merge_and_update)
+            logging.debug(f"Updated metadata of {len(doc_ids)} embeddings.")
+        except Exception as e:
+            logging.error(f"Error updating metadata of {len(doc_ids)} embeddings: {e}")
+
+    async def delete_embeddings(self, doc_ids: list) -> None:
+        """
+        Delete stored embeddings by document ID.
+
+        Args:
+            doc_ids (list): Identifiers of the documents to delete.
+
+        Logs:
+            - Info: Number of embeddings deleted.
+            - Error: If deleting from the vector store fails.
+        """
+        if not doc_ids:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self.resources.executor, lambda: self.vector_store.delete(ids=list(doc_ids))
+            )
+            logging.info(f"Deleted {len(doc_ids)} embeddings from the vector store.")
+        except Exception as e:
+            logging.error(f"Error deleting {len(doc_ids)} embeddings: {e}")
+
+    def close(self) -> None:
+        """
+        Release the embedding model and stop any embedding worker processes, unless the resources are shared.
+
+        Shared resources are released by whoever started them, with `Resources.shutdown`.
+        """
+        if self._owns_resources:
+            self.resources.shutdown()
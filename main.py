@@ -2,83 +2,190 @@
 
 import logging
 import asyncio
+import time
 from config import Config
 from sync_repo import ensure_repository_synced
 from scanner import DirectoryScanner
 from file_processor import FileProcessor
+from resources import Resources
+from manifest import NoteManifest
+from pipeline import IngestPipeline
+from watcher import VaultWatcher
+from search import NoteSearcher
+from server import SearchServer
 from utils import setup_logging
+from metrics import configure_metrics, report_metrics
 import os
 import sys
 
+# time.perf_counter() when main() started, for measuring the time to the first scanned file
+_started = None
+
+
+def start_warmup(config: Config, resources: Resources):
+    """
+    Start loading the vector store and embedding model in a background thread if `config.embedding_warmup` is set.
+
+    Args:
+        config (Config): Configuration object containing settings.
+        resources (Resources): The started resources to warm up.
+
+    Returns:
+        Optional[asyncio.Future]: The running warm-up, to be awaited before the resources are shut down.
+    """
+    if str(config.embedding_warmup).lower() != "true":
+        return None
+    return asyncio.get_running_loop().run_in_executor(resources.executor, resources.warm)
+
 
 async def process_files(config: Config):
     """
     Orchestrate the scanning and processing of files with incremental updates.
+
+    Files flow through the staged `IngestPipeline`. Files whose mtime and size
+    (or, failing that, content hash) match the manifest in `config.timestamp_file`
+    are skipped, changed files have their old chunks replaced, and notes that
+    disappeared from the vault have their chunks deleted.
+
+    With `config.embedding_warmup` the vector store and embedding model are loaded
+    in a background thread while the vault is scanned, so the first changed file
+    does not wait for them; otherwise they load on first use.
     """
     logging.info("Starting file processing pipeline.")
 
     try:
-        scanner = DirectoryScanner(config)
-        processor = FileProcessor(config)
-
-        # Scan the directory and process files
-        scanned_files = scanner.scan()
-        for file_path in scanned_files:
-            if processor.should_process_file(file_path):
-                for attempt in range(3):  # Retry mechanism
-                    result = await processor.process_file(file_path)
-                    if result["success"]:
-                        logging.info(f"Processed file: {file_path}")
-                        break
-                    else:
-                        logging.error(f"Attempt {attempt + 1} failed for file: {file_path} - {result['error']}")
-                else:
-                    logging.error(f"Failed to process file after 3 attempts: {file_path}")
-
-        logging.info("File processing pipeline completed successfully.")
+        scanner = DirectoryScanner(
+            config.vault_directory,
+            set(config.allowed_extensions),
+            set(config.ignored_directories),
+            config.max_frontmatter_bytes
+        )
+        resources = Resources(config).startup()
+        processor = FileProcessor(config, resources)
+        manifest = NoteManifest(config.timestamp_file)
+        warmup = start_warmup(config, resources)
+
+        try:
+            summary = await IngestPipeline(config, scanner, processor, manifest, started=_started).run()
+        finally:
+            if warmup is not None:
+                await warmup
+            resources.shutdown()
+            report_metrics(config.metrics_file or None, config.metrics_format)
+
+        logging.info(f"File processing pipeline completed successfully: {summary['indexed']} files indexed, "
+                     f"{summary['unchanged']} unchanged, {summary['failed']} failed, {summary['removed']} removed.")
     except Exception as e:
         logging.error(f"Error during file processing pipeline: {e}")
         raise
 
 
+async def watch_files(config: Config):
+    """
+    Keep the index in sync with the vault until interrupted.
+
+    Changes made while the watcher was not running are picked up by an initial
+    pipeline run; after that only the files named by file-system events are
+    re-indexed.
+    """
+    logging.info(f"Starting watch mode on {config.vault_directory}.")
+    scanner = DirectoryScanner(
+        config.vault_directory,
+        set(config.allowed_extensions),
+        set(config.ignored_directories),
+        config.max_frontmatter_bytes
+    )
+    resources = Resources(config).startup()
+    processor = FileProcessor(config, resources)
+    manifest = NoteManifest(config.timestamp_file)
+    warmup = start_warmup(config, resources)
+    try:
+        await VaultWatcher(config, scanner, processor, manifest).run()
+    finally:
+        if warmup is not None:
+            await warmup
+        resources.shutdown()
+        report_metrics(config.metrics_file or None, config.metrics_format)
+
+
+async def serve(config: Config):
+    """
+    Run the search HTTP service until interrupted.
+
+    The searcher and the processor share one `Resources`, so /reindex and
+    /search use one loaded model and collection.
+    """
+    scanner = DirectoryScanner(
+        config.vault_directory,
+        set(config.allowed_extensions),
+        set(config.ignored_directories),
+        config.max_frontmatter_bytes
+    )
+    resources = Resources(config).startup()
+    processor = FileProcessor(config, resources)
+    manifest = NoteManifest(config.timestamp_file)
+    searcher = NoteSearcher(config, resources.embedding_model, resources.vector_store)
+
+    async def reindex() -> dict:
+        return await IngestPipeline(config, scanner, processor, manifest).run()
+
+    server = SearchServer(config, searcher, reindex)
+    warmup = start_warmup(config, resources)
+    await server.start()
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        if warmup is not None:
+            await warmup
+        resources.shutdown()
+        report_metrics(config.metrics_file or None, config.metrics_format)
+
+
+# Subcommands accepted as the first CLI argument; "index" runs when none is given
+COMMANDS = {"index": process_files, "watch": watch_files, "serve": serve}
+
+
 def main():
     """
     Main entry point for the script.
+
+    Usage:
+        python main.py [index|watch|serve] [key=value ...]
     """
+    global _started
+    _started = time.perf_counter()
     try:
-        # Sync the repository
-        ensure_repository_synced()
-
         # Load configuration dynamically
         config = Config.load_default()
-        config.validate()
+
+        args = sys.argv[1:]
+        command = args.pop(0) if args and args[0] in COMMANDS else "index"
 
         # Allow CLI overrides for configuration settings
-        if len(sys.argv) > 1:
-            for arg in sys.argv[1:]:
-                key, value = arg.split("=", 1)
-                if hasattr(config, key):
-                    setattr(config, key, value)
-                    logging.info(f"Overriding config: {key} set to {value}")
+        for arg in args:
+            key, value = arg.split("=", 1)
+            if hasattr(config, key):
+                setattr(config, key, value)
+                logging.info(f"Overriding config: {key} set to {value}")
 
         # Set up logging with the configured log level
         log_level = getattr(config, "log_level", "INFO")  # Default to INFO if log_level is missing
         setup_logging(log_level, config.log_format, config.log_file)
+        configure_metrics(str(config.metrics_enabled).lower() == "true")
+        config.validate()
 
-        # Run the file processing pipeline
-        asyncio.run(process_files(config))
+        # Sync the repository
+        if str(config.repo_sync_enabled).lower() == "true":
+            ensure_repository_synced(config.vault_directory, config.github_repo)
+
+        # Run the selected command
+        asyncio.run(COMMANDS[command](config))
+    except KeyboardInterrupt:
+        logging.info("Interrupted; shutting down.")
     except Exception as e:
         logging.error(f"Fatal error in main execution: {e}")
 
 
 if __name__ == "__main__":
     main()
-
-# Save the updated code for the user
-updated_main_code = """
-# Updated main.py as per improvements above
-"""
-
-# Write updated code to file for download
-with open("/mnt/data/updated_main.py", "w") as file:
-    file.write(updated_main_code)
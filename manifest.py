@@ -0,0 +1,216 @@
+"""
+Persistent manifest of indexed notes, used for incremental re-indexing.
+
+Each entry records a note's mtime, size, content hash and the chunk ids (with
+their offsets) it produced, so unchanged notes can be skipped, changed notes can
+be diffed chunk by chunk, and the vectors of removed notes can be deleted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class NoteManifest:
+    """
+    Tracks the state of every indexed note between runs.
+
+    Attributes:
+        manifest_path (Path): JSON file the manifest is persisted to.
+        entries (Dict[str, dict]): Mapping of file path to its recorded state.
+    """
+
+    def __init__(self, manifest_path: Path):
+        """
+        Initialize the manifest, loading any previously saved state.
+
+        Args:
+            manifest_path (Path): JSON file the manifest is persisted to.
+        """
+        self.manifest_path = Path(manifest_path)
+        self.entries: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        """
+        Load the manifest from disk.
+
+        Returns:
+            Dict[str, dict]: Saved entries, or an empty mapping if the file is missing or unreadable.
+
+        Logs:
+            - Warning: If the manifest file exists but cannot be parsed.
+        """
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            return data.get("files", {})
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable manifest {self.manifest_path}: {e}")
+            return {}
+
+    def save(self) -> None:
+        """
+        Atomically write the manifest to disk.
+
+        Logs:
+            - Info: Number of entries saved.
+        """
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": 1, "files": self.entries}, file)
+        os.replace(tmp_path, self.manifest_path)
+        logging.info(f"Saved manifest with {len(self.entries)} entries to {self.manifest_path}")
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        """
+        Hash file content for change detection.
+
+        Args:
+            data (bytes): Raw file content.
+
+        Returns:
+            str: Hex SHA-256 digest.
+        """
+        return hashlib.sha256(data).hexdigest()
+
+    @classmethod
+    def hash_file(cls, file_path: Path) -> str:
+        """
+        Hash the content of a file on disk.
+
+        Args:
+            file_path (Path): The path to the file.
+
+        Returns:
+            str: Hex SHA-256 digest.
+        """
+        with open(file_path, "rb") as file:
+            return cls.hash_bytes(file.read())
+
+    def is_unchanged(self, file_path: Path, mtime: float, size: int, content_hash: Optional[str] = None) -> bool:
+        """
+        Check whether a file matches its recorded state.
+
+        A matching mtime and size is treated as unchanged. If they differ but a
+        content hash is given, the file is unchanged when the hash still matches.
+
+        Args:
+            file_path (Path): The path to the file.
+            mtime (float): Current modification time.
+            size (int): Current size in bytes.
+            content_hash (Optional[str]): Current content hash, if already computed.
+
+        Returns:
+            bool: True if the file does not need to be re-indexed.
+        """
+        entry = self.entries.get(str(file_path))
+        if entry is None:
+            return False
+        if entry["mtime"] == mtime and entry["size"] == size:
+            return True
+        return content_hash is not None and entry["hash"] == content_hash
+
+    def chunk_ids(self, file_path: Path) -> List[str]:
+        """
+        Return the chunk ids recorded for a file.
+
+        Args:
+            file_path (Path): The path to the file.
+
+        Returns:
+            List[str]: Recorded chunk ids, empty if the file is not in the manifest.
+        """
+        entry = self.entries.get(str(file_path))
+        return list(entry["chunk_ids"]) if entry else []
+
+    def chunk_offsets(self, file_path: Path) -> Dict[str, Tuple[int, int]]:
+        """
+        Return the recorded (start, end) offsets of a file's chunks.
+
+        Args:
+            file_path (Path): The path to the file.
+
+        Returns:
+            Dict[str, Tuple[int, int]]: Offsets by chunk id, empty if none were recorded.
+        """
+        entry = self.entries.get(str(file_path))
+        if not entry or "chunk_offsets" not in entry:
+            return {}
+        return {chunk_id: tuple(offsets) for chunk_id, offsets in zip(entry["chunk_ids"], entry["chunk_offsets"])}
+
+    def record(
+        self,
+        file_path: Path,
+        mtime: float,
+        size: int,
+        content_hash: str,
+        chunk_ids: List[str],
+        chunk_offsets: Optional[List[Tuple[int, int]]] = None
+    ) -> None:
+        """
+        Record the indexed state of a file.
+
+        Args:
+            file_path (Path): The path to the file.
+            mtime (float): Modification time at indexing.
+            size (int): Size in bytes at indexing.
+            content_hash (str): Content hash at indexing.
+            chunk_ids (List[str]): Ids of the chunks stored for the file.
+            chunk_offsets (Optional[List[Tuple[int, int]]]): (start, end) offsets of each chunk, in the same order.
+        """
+        entry = {
+            "mtime": mtime,
+            "size": size,
+            "hash": content_hash,
+            "chunk_ids": list(chunk_ids),
+        }
+        if chunk_offsets is not None:
+            entry["chunk_offsets"] = [list(offsets) for offsets in chunk_offsets]
+        self.entries[str(file_path)] = entry
+
+    def touch(self, file_path: Path, mtime: float, size: int) -> None:
+        """
+        Refresh the stat fields of an entry whose content is unchanged.
+
+        Args:
+            file_path (Path): The path to the file.
+            mtime (float): Current modification time.
+            size (int): Current size in bytes.
+        """
+        entry = self.entries.get(str(file_path))
+        if entry is not None:
+            entry["mtime"] = mtime
+            entry["size"] = size
+
+    def remove(self, file_path: Path) -> List[str]:
+        """
+        Drop a file from the manifest.
+
+        Args:
+            file_path (Path): The path to the file.
+
+        Returns:
+            List[str]: Chunk ids that were recorded for the file.
+        """
+        entry = self.entries.pop(str(file_path), None)
+        return list(entry["chunk_ids"]) if entry else []
+
+    def removed_files(self, seen_paths: Iterable[str]) -> List[str]:
+        """
+        Find files that are in the manifest but were not seen in the latest scan.
+
+        Args:
+            seen_paths (Iterable[str]): Paths found by the current scan.
+
+        Returns:
+            List[str]: Paths of notes that have been removed from the vault.
+        """
+        seen = set(seen_paths)
+        return [path for path in self.entries if path not in seen]
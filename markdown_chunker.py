@@ -0,0 +1,218 @@
+"""
+Structure-aware chunking for Markdown notes.
+
+The note is walked line by line, once, and grouped into blocks: headings, fenced
+code, list items, tables, block quotes and paragraphs. Blocks are packed greedily
+into chunks of at most `chunk_size` characters. A heading always starts a new
+chunk, and every chunk carries the path of headings it sits under.
+"""
+
+import logging
+import re
+from typing import Dict, Generator, List, Optional, Tuple
+
+from chunker import validate_chunk_params
+
+_HEADING = re.compile(r" {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_FENCE = re.compile(r" {0,3}(`{3,}|~{3,})")
+_LIST_ITEM = re.compile(r"[ \t]*(?:[-*+]|\d{1,9}[.)])[ \t]+")
+_TABLE_ROW = re.compile(r"[ \t]*\|")
+_QUOTE = re.compile(r" {0,3}>")
+
+# Separator between the headings of a chunk's "heading_path" metadata
+HEADING_SEPARATOR = " > "
+
+
+def iter_blocks(content: str) -> Generator[Tuple[str, int, int, Optional[Tuple[int, str]]], None, None]:
+    """
+    Group the content's lines into Markdown blocks in a single pass.
+
+    Args:
+        content (str): The Markdown content.
+
+    Yields:
+        Tuple[str, int, int, Optional[Tuple[int, str]]]: Block kind ("heading", "code", "list",
+        "table", "quote" or "paragraph"), its (start, end) offsets, and the (level, title)
+        of a heading block.
+    """
+    kind = None
+    block_start = block_end = 0
+    fence = None
+
+    position = 0
+    length = len(content)
+    while position < length:
+        newline = content.find("\n", position)
+        line_end = length if newline == -1 else newline
+        next_position = line_end + 1
+
+        # Inside a fence only the matching closing fence matters
+        if fence is not None:
+            block_end = line_end
+            closing = _FENCE.match(content, position, line_end)
+            if closing and closing.group(1)[0] == fence[0] and len(closing.group(1)) >= len(fence) \
+                    and not content[closing.end():line_end].strip():
+                yield "code", block_start, block_end, None
+                kind = fence = None
+            position = next_position
+            continue
+
+        line = content[position:line_end]
+        if not line.strip():
+            if kind is not None:
+                yield kind, block_start, block_end, None
+                kind = None
+            position = next_position
+            continue
+
+        heading = _HEADING.match(line)
+        opening = _FENCE.match(line)
+        if heading or opening:
+            if kind is not None:
+                yield kind, block_start, block_end, None
+                kind = None
+            if heading:
+                yield "heading", position, line_end, (len(heading.group(1)), (heading.group(2) or "").strip())
+            else:
+                fence = opening.group(1)
+                block_start, block_end = position, line_end
+            position = next_position
+            continue
+
+        if _LIST_ITEM.match(line):
+            line_kind = "list"
+        elif _TABLE_ROW.match(line):
+            line_kind = "table"
+        elif _QUOTE.match(line):
+            line_kind = "quote"
+        else:
+            line_kind = "paragraph"
+
+        # List items start a new block; other lines continue a block of the same kind,
+        # and plain lines continue a paragraph, list item or quote (lazy continuation)
+        continues = kind is not None and (
+            (line_kind == kind and kind != "list")
+            or (line_kind == "paragraph" and kind in ("paragraph", "list", "quote"))
+        )
+        if continues:
+            block_end = line_end
+        else:
+            if kind is not None:
+                yield kind, block_start, block_end, None
+            kind, block_start, block_end = line_kind, position, line_end
+        position = next_position
+
+    if fence is not None:
+        # An unclosed fence runs to the end of the note
+        yield "code", block_start, length, None
+    elif kind is not None:
+        yield kind, block_start, block_end, None
+
+
+def _strip_span(content: str, start: int, end: int) -> Tuple[int, int]:
+    """
+    Narrow a span to exclude leading and trailing whitespace.
+    """
+    while start < end and content[start].isspace():
+        start += 1
+    while end > start and content[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _split_on_words(content: str, start: int, end: int, chunk_size: int) -> Generator[Tuple[int, int], None, None]:
+    """
+    Split an oversized block into spans of at most `chunk_size` characters, breaking at whitespace.
+
+    Yields:
+        Tuple[int, int]: Stripped (start, end) offsets of each piece.
+    """
+    position = start
+    while position < end:
+        limit = min(position + chunk_size, end)
+        cut = limit
+        if limit < end and not content[limit].isspace():
+            cut = max(content.rfind(" ", position, limit), content.rfind("\n", position, limit))
+            if cut <= position:
+                cut = limit
+        piece_start, piece_end = _strip_span(content, position, cut)
+        if piece_start < piece_end:
+            yield piece_start, piece_end
+        position = cut
+
+
+def chunk_markdown(content: str, metadata: dict, chunk_size: int) -> Generator[Dict, None, None]:
+    """
+    Generate chunks that follow the note's Markdown structure.
+
+    Blocks are packed greedily up to `chunk_size` characters without overlap.
+    Headings start a new chunk (consecutive headings share one), fenced code blocks
+    become their own "code" chunks, and blocks longer than `chunk_size` are split at
+    word boundaries.
+
+    Args:
+        content (str): The file content to split into chunks.
+        metadata (dict): Metadata extracted from the file.
+        chunk_size (int): Maximum size of each text chunk in characters.
+
+    Yields:
+        Dict: Chunk data with type (text/code), metadata including "heading_path", and the
+        chunk's (start, end) character offsets in the content.
+
+    Logs:
+        - Debug: Number of chunks generated (logged after yielding all chunks).
+    """
+    validate_chunk_params(content, chunk_size, 0)
+    headings: List[Tuple[int, str]] = []
+    section_metadata = {**metadata, "heading_path": ""}
+    counts = {"text": 0, "code": 0}
+
+    current: Optional[List[int]] = None  # [start, end] of the chunk being packed
+    headings_only = False
+
+    def make_chunk(start: int, end: int, chunk_type: str) -> Dict:
+        counts[chunk_type] += 1
+        return {"chunk": content[start:end], "type": chunk_type, "metadata": section_metadata,
+                "start": start, "end": end}
+
+    for kind, start, end, heading in iter_blocks(content):
+        if kind == "heading":
+            if current is not None and not headings_only:
+                yield make_chunk(*_strip_span(content, *current), "text")
+                current = None
+            level, title = heading
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, title))
+            section_metadata = {**metadata, "heading_path": HEADING_SEPARATOR.join(t for _, t in headings if t)}
+            if current is None:
+                current = [start, end]
+            else:
+                current[1] = end
+            headings_only = True
+            continue
+
+        if kind == "code":
+            if current is not None:
+                yield make_chunk(*_strip_span(content, *current), "text")
+                current = None
+            yield make_chunk(*_strip_span(content, start, end), "code")
+            continue
+
+        if current is not None and end - current[0] > chunk_size:
+            yield make_chunk(*_strip_span(content, *current), "text")
+            current = None
+        if end - start > chunk_size:
+            for piece_start, piece_end in _split_on_words(content, start, end, chunk_size):
+                yield make_chunk(piece_start, piece_end, "text")
+            continue
+        if current is None:
+            current = [start, end]
+        else:
+            current[1] = end
+        headings_only = False
+
+    if current is not None:
+        yield make_chunk(*_strip_span(content, *current), "text")
+
+    logging.debug("Generated %d text chunks and %d code blocks from Markdown structure.", counts["text"], counts["code"])
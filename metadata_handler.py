@@ -1,8 +1,28 @@
 # Updating metadata_handler.py for stricter validation and enhanced logging
 
-import yaml
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
+from yaml_checker import parse_frontmatter
+
+
+def build_metadata(frontmatter: Dict, body: str, error: Optional[str] = None) -> Dict:
+    """
+    Build the metadata dictionary from already parsed frontmatter.
+
+    Args:
+        frontmatter (Dict): Parsed YAML frontmatter (empty if none).
+        body (str): The content after the frontmatter block.
+        error (Optional[str]): Frontmatter parsing error, if any.
+
+    Returns:
+        Dict: Metadata including timestamp, length, any YAML metadata and any parsing error.
+    """
+    metadata = {"timestamp": datetime.now().isoformat()}
+    metadata.update(frontmatter)
+    if error:
+        metadata["error"] = error
+    metadata["length"] = len(body)
+    return metadata
 
 
 def extract_metadata(content: str) -> Dict:
@@ -18,32 +38,8 @@ def extract_metadata(content: str) -> Dict:
     Notes:
         - If YAML metadata is present, it will be parsed and included in the output.
         - Adds a "timestamp" field indicating when the metadata was extracted.
-        - Includes a "length" field for the length of the content.
+        - Includes a "length" field for the length of the content after the frontmatter.
+        - Adds an "error" field if the frontmatter is malformed or not a dictionary.
     """
-    metadata = {"timestamp": datetime.now().isoformat()}
-    try:
-        if content.startswith("---"):
-            end_idx = content.find("---", 3)
-            if end_idx != -1:
-                yaml_content = content[3:end_idx].strip()
-                parsed_yaml = yaml.safe_load(yaml_content)
-                if not isinstance(parsed_yaml, dict):
-                    raise ValueError("YAML metadata is not a valid dictionary.")
-                metadata.update(parsed_yaml)
-                content = content[end_idx + 3:].strip()  # Remove YAML for further processing
-    except yaml.YAMLError as e:
-        metadata["error"] = f"Failed to parse YAML metadata: {e}"
-    except Exception as e:
-        metadata["error"] = f"Unexpected error during metadata extraction: {e}"
-    metadata["length"] = len(content)
-    return metadata
-
-
-# Save the updated code for the user
-updated_metadata_handler_code = """
-# Updated metadata_handler.py as per improvements above
-"""
-
-# Write updated code to file for download
-with open("/mnt/data/updated_metadata_handler.py", "w") as file:
-    file.write(updated_metadata_handler_code)
+    _, frontmatter, body, error = parse_frontmatter(content)
+    return build_metadata(frontmatter, body, error)
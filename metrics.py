@@ -0,0 +1,306 @@
+"""
+Lightweight in-process metrics: counters, histograms and timers.
+
+Instrumented code uses the process-wide `METRICS` registry:
+
+    with METRICS.timer("chunk"):
+        ...
+    METRICS.inc("chunks", len(chunks))
+
+Metrics are disabled by default. While disabled, `inc` and `observe` return
+immediately and `timer` returns a shared no-op context manager, so the
+instrumentation costs one attribute check per call.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Histogram bucket upper bounds in seconds, used for the Prometheus export
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, float("inf"))
+
+
+class Histogram:
+    """
+    Distribution of observed values with fixed buckets.
+
+    Attributes:
+        count (int): Number of observations.
+        total (float): Sum of the observations.
+        minimum (float): Smallest observation.
+        maximum (float): Largest observation.
+        buckets (List[int]): Observations per bucket of `DEFAULT_BUCKETS` (not cumulative).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = 0.0
+        self.buckets: List[int] = [0] * len(DEFAULT_BUCKETS)
+
+    def observe(self, value: float) -> None:
+        """
+        Record one observation.
+        """
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        for index, bound in enumerate(DEFAULT_BUCKETS):
+            if value <= bound:
+                self.buckets[index] += 1
+                break
+
+    def to_dict(self) -> dict:
+        """
+        Return the histogram as plain values.
+        """
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.minimum if self.count else 0.0,
+            "max": self.maximum,
+            "mean": self.total / self.count if self.count else 0.0,
+        }
+
+
+class _Timer:
+    """
+    Context manager that records its elapsed time into a histogram.
+    """
+
+    __slots__ = ("registry", "name", "started")
+
+    def __init__(self, registry: "Metrics", name: str):
+        self.registry = registry
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    """
+    Shared no-op timer handed out while metrics are disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters and histograms.
+
+    Attributes:
+        enabled (bool): Whether observations are recorded.
+        counters (Dict[str, float]): Counter values by name.
+        histograms (Dict[str, Histogram]): Histograms by name; timers record seconds.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """
+        Initialize an empty registry.
+
+        Args:
+            enabled (bool): Whether observations are recorded.
+        """
+        self.enabled = enabled
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """
+        Add to a counter.
+
+        Args:
+            name (str): Counter name, e.g. "chunks".
+            value (float): Amount to add.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Record a value in a histogram.
+
+        Args:
+            name (str): Histogram name.
+            value (float): Observed value; timers use seconds.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def timer(self, name: str):
+        """
+        Return a context manager that records the duration of its block in seconds.
+
+        Args:
+            name (str): Histogram name, e.g. "encode".
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def reset(self) -> None:
+        """
+        Drop every recorded value.
+        """
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def to_dict(self) -> dict:
+        """
+        Return a JSON-serializable snapshot.
+        """
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            }
+
+    def to_prometheus(self, prefix: str = "mybrain") -> str:
+        """
+        Render the registry in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): Prefix of every metric name.
+
+        Returns:
+            str: Metrics text; timers are exported as `<name>_seconds` histograms.
+        """
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{prefix}_{_metric_name(name)}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+            for name, histogram in sorted(self.histograms.items()):
+                metric = f"{prefix}_{_metric_name(name)}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(DEFAULT_BUCKETS, histogram.buckets):
+                    cumulative += count
+                    label = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{metric}_bucket{{le="{label}"}} {cumulative}')
+                lines += [f"{metric}_sum {histogram.total}", f"{metric}_count {histogram.count}"]
+        return "\n".join(lines) + "\n"
+
+    def format_table(self) -> str:
+        """
+        Render a summary table of every timer and counter.
+
+        Returns:
+            str: Fixed-width table, timers first, sorted by total time.
+        """
+        snapshot = self.to_dict()
+        rows = [f"{'metric':<28} {'count':>10} {'total s':>10} {'mean ms':>10} {'max ms':>10}"]
+        for name, values in sorted(snapshot["histograms"].items(), key=lambda item: -item[1]["sum"]):
+            rows.append(f"{name:<28} {values['count']:>10} {values['sum']:>10.3f} "
+                        f"{values['mean'] * 1000:>10.3f} {values['max'] * 1000:>10.3f}")
+        for name, value in sorted(snapshot["counters"].items()):
+            rows.append(f"{name:<28} {value:>10g}")
+        return "\n".join(rows)
+
+    def write(self, file_path: Path, file_format: str = "json") -> None:
+        """
+        Atomically write the registry to a file.
+
+        Args:
+            file_path (Path): Destination file.
+            file_format (str): "json" or "prometheus".
+
+        Raises:
+            ValueError: If the format is unknown.
+        """
+        if file_format == "json":
+            text = json.dumps(self.to_dict(), indent=2)
+        elif file_format == "prometheus":
+            text = self.to_prometheus()
+        else:
+            raise ValueError(f"Unknown metrics format: {file_format}")
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_name(file_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(tmp_path, file_path)
+
+
+def _metric_name(name: str) -> str:
+    """
+    Turn a dotted metric name into a Prometheus-safe one.
+    """
+    return "".join(character if character.isalnum() else "_" for character in name)
+
+
+# Process-wide registry used by the instrumented modules
+METRICS = Metrics()
+
+
+def configure_metrics(enabled: bool) -> Metrics:
+    """
+    Enable or disable the process-wide registry.
+
+    Args:
+        enabled (bool): Whether observations are recorded.
+
+    Returns:
+        Metrics: The process-wide registry.
+    """
+    METRICS.enabled = enabled
+    return METRICS
+
+
+def report_metrics(file_path: Optional[Path] = None, file_format: str = "json") -> None:
+    """
+    Print the summary table and optionally write the registry to a file.
+
+    Does nothing while metrics are disabled.
+
+    Args:
+        file_path (Optional[Path]): Destination file, or None to skip writing.
+        file_format (str): "json" or "prometheus".
+
+    Logs:
+        - Info: The summary table and the file written.
+        - Error: If the file cannot be written.
+    """
+    if not METRICS.enabled:
+        return
+    table = METRICS.format_table()
+    print(table)
+    logging.info("Metrics summary:\n" + table)
+    if file_path:
+        try:
+            METRICS.write(file_path, file_format)
+            logging.info(f"Wrote metrics to {file_path}")
+        except (OSError, ValueError) as e:
+            logging.error(f"Error writing metrics to {file_path}: {e}")
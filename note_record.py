@@ -0,0 +1,100 @@
+"""
+Single-read ingestion record for a note.
+
+A `NoteRecord` is created from one read of the file and carries the raw bytes,
+decoded text, parsed frontmatter and body through scanning, splitting and
+processing, so no stage has to read the file or parse its YAML again.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict
+
+from metadata_handler import build_metadata
+from metrics import METRICS
+from yaml_checker import parse_frontmatter
+
+
+class NoteRecord:
+    """
+    Everything the pipeline needs to know about one note, read once.
+
+    Attributes:
+        path (Path): The path of the note.
+        data (bytes): Raw file content.
+        mtime (float): Modification time at read.
+        size (int): Size in bytes at read.
+        content (str): Decoded file content.
+        has_frontmatter (bool): Whether a YAML frontmatter block is present.
+        frontmatter (Dict): Parsed frontmatter (empty if none).
+        body (str): Content after the frontmatter block.
+        error (str): Frontmatter parsing error, if any.
+    """
+
+    def __init__(self, path: Path, data: bytes, mtime: float, size: int):
+        """
+        Build a record from already read bytes, decoding and parsing them once.
+
+        Args:
+            path (Path): The path of the note.
+            data (bytes): Raw file content.
+            mtime (float): Modification time at read.
+            size (int): Size in bytes at read.
+
+        Raises:
+            UnicodeDecodeError: If the content is not valid UTF-8.
+        """
+        self.path = Path(path)
+        self.data = data
+        self.mtime = mtime
+        self.size = size
+        self.content = data.decode("utf-8")
+        self.has_frontmatter, self.frontmatter, self.body, self.error = parse_frontmatter(self.content)
+        self._content_hash = None
+
+    @classmethod
+    def load(cls, file_path: Path) -> "NoteRecord":
+        """
+        Read a note from disk with a single open.
+
+        Args:
+            file_path (Path): The path to the note.
+
+        Returns:
+            NoteRecord: The loaded record.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            IOError: If an I/O error occurs.
+        """
+        with METRICS.timer("read"), open(file_path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            data = file.read()
+        METRICS.inc("read.bytes", len(data))
+        return cls(file_path, data, stat.st_mtime, stat.st_size)
+
+    @property
+    def content_hash(self) -> str:
+        """
+        Hex SHA-256 digest of the raw bytes, computed on first use.
+        """
+        if self._content_hash is None:
+            self._content_hash = hashlib.sha256(self.data).hexdigest()
+        return self._content_hash
+
+    def metadata(self) -> Dict:
+        """
+        Build a fresh metadata dictionary from the parsed frontmatter.
+
+        Returns:
+            Dict: Metadata including timestamp, length and any YAML metadata.
+        """
+        return build_metadata(self.frontmatter, self.body, self.error)
+
+    def release_data(self) -> None:
+        """
+        Drop the raw bytes once the hash is known, to keep queued records small.
+        """
+        _ = self.content_hash
+        self.data = b""
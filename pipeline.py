@@ -0,0 +1,416 @@
+"""
+Staged, streaming ingest pipeline.
+
+Files flow through scan -> read -> chunk -> embed -> store stages connected by
+bounded queues. Each stage runs its own pool of workers, so disk I/O, chunking,
+model inference and vector-store writes overlap, and the bounded queues apply
+backpressure so memory stays flat on large vaults.
+"""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from manifest import NoteManifest
+from metrics import METRICS
+from note_record import NoteRecord
+from token_chunker import chunk_token_ids
+
+# Marks the end of a stage's input
+_STOP = object()
+
+
+def _chunk_offsets(chunk_data: dict) -> tuple:
+    """
+    Return a chunk's (start, end) offsets in its note, as recorded in the manifest.
+    """
+    metadata = chunk_data["metadata"]
+    return metadata.get("start"), metadata.get("end")
+
+
+class StageStats:
+    """
+    Throughput counters for one pipeline stage.
+
+    Attributes:
+        name (str): Stage name.
+        processed (int): Items the stage handled.
+        failed (int): Items that raised an error in the stage.
+        busy_seconds (float): Total time workers spent handling items.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.started = time.perf_counter()
+
+    def throughput(self) -> float:
+        """
+        Items handled per second of wall time since the stage started.
+        """
+        elapsed = time.perf_counter() - self.started
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+
+class IngestPipeline:
+    """
+    Runs the scan -> read -> chunk -> embed -> store pipeline for one indexing run.
+
+    Attributes:
+        config (Config): Configuration object containing settings.
+        scanner (DirectoryScanner): Source of file paths.
+        processor (FileProcessor): Chunking, embedding and storage operations.
+        manifest (NoteManifest): Index state used to skip unchanged files.
+        stats (Dict[str, StageStats]): Per-stage counters.
+        first_file_seconds (Optional[float]): Time from `started` until the scan produced its first file.
+    """
+
+    def __init__(self, config, scanner, processor, manifest: NoteManifest, started: Optional[float] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            config (Config): Configuration object containing settings.
+            scanner (DirectoryScanner): Source of file paths.
+            processor (FileProcessor): Chunking, embedding and storage operations.
+            manifest (NoteManifest): Index state used to skip unchanged files.
+            started (Optional[float]): `time.perf_counter()` at program start, for measuring
+                the time to the first scanned file; defaults to when `run` starts.
+        """
+        self.config = config
+        self.started = started
+        self.first_file_seconds: Optional[float] = None
+        self.scanner = scanner
+        self.processor = processor
+        self.manifest = manifest
+        self.seen_files = set()
+        self.skipped = 0
+        self.stats: Dict[str, StageStats] = {}
+        self.chunk_counts = {"embedded": 0, "kept": 0, "deduplicated": 0, "deleted": 0}
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self._stale_ids: List[str] = []  # Chunks replaced by rows already written, still to delete
+
+    async def run(self, remove_missing: bool = True) -> dict:
+        """
+        Run every stage to completion, remove vectors of deleted notes and flush all writes.
+
+        Args:
+            remove_missing (bool): Delete notes that are in the manifest but were not scanned.
+                Only valid when the scanner covers the whole vault.
+
+        Returns:
+            dict: Summary with counts of indexed, unchanged, failed and removed files.
+
+        Logs:
+            - Info: Periodic queue depth and throughput per stage, and a final summary.
+        """
+        if self.started is None:
+            self.started = time.perf_counter()
+        size = self.config.pipeline_queue_size
+        self.queues = {name: asyncio.Queue(maxsize=size) for name in ("read", "chunk", "embed", "store")}
+        self.stats = {name: StageStats(name) for name in ("scan", "read", "chunk", "embed", "store")}
+
+        workers = {
+            "read": max(1, self.config.pipeline_read_workers),
+            "chunk": max(1, self.config.pipeline_chunk_workers),
+            "embed": max(1, self.config.pipeline_embed_workers),
+            "store": max(1, self.config.pipeline_store_workers),
+        }
+        stages = [
+            self._scan(workers["read"]),
+            self._run_stage("read", self._read, "read", "chunk", workers["read"], workers["chunk"]),
+            self._run_stage("chunk", self._chunk, "chunk", "embed", workers["chunk"], workers["embed"]),
+            self._run_stage("embed", self._embed, "embed", "store", workers["embed"], workers["store"]),
+            self._run_stage("store", self._store, "store", None, workers["store"], 0),
+        ]
+        reporter = asyncio.ensure_future(self._report_progress())
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            reporter.cancel()
+
+        # Delete the vectors of notes removed from the vault, but not of notes under directories
+        # the scan could not list: those may still exist
+        removed_files = self.manifest.removed_files(self.seen_files) if remove_missing else []
+        failed_directories = [Path(directory) for directory in getattr(self.scanner, "failed_directories", ())]
+        if failed_directories:
+            logging.warning(f"Keeping the index of {len(failed_directories)} directories that could not be scanned.")
+            removed_files = [
+                file_path for file_path in removed_files
+                if not any(Path(file_path).is_relative_to(directory) for directory in failed_directories)
+            ]
+        for file_path in removed_files:
+            await self.processor.delete_chunks(self.manifest.remove(file_path))
+
+        # Write out anything still buffered for the vector store; files whose rows were
+        # written are saved in the manifest even if the final write fails
+        try:
+            await self.processor.flush()
+            while self._stale_ids:
+                # The flush retired the stale chunks of the files it wrote; flush again to save their removal
+                await self._delete_stale_chunks()
+                await self.processor.flush()
+        finally:
+            self.manifest.save()
+
+        self._log_progress()
+        summary = {
+            "indexed": self.stats["store"].processed,
+            "unchanged": self.skipped,
+            "failed": sum(stats.failed for stats in self.stats.values()),
+            "removed": len(removed_files),
+        }
+        logging.info(f"Pipeline summary: {summary}")
+        logging.info(
+            f"Chunk diff: {self.chunk_counts['embedded']} embedded, {self.chunk_counts['kept']} kept, "
+            f"{self.chunk_counts['deduplicated']} deduplicated, {self.chunk_counts['deleted']} deleted"
+        )
+        return summary
+
+    async def _scan(self, downstream_workers: int) -> None:
+        """
+        Feed scanned file paths into the read queue, then signal the read workers to stop.
+
+        Args:
+            downstream_workers (int): Number of read workers to stop.
+        """
+        stats = self.stats["scan"]
+        queue = self.queues["read"]
+        try:
+            async for file_path in self.scanner.iter_files(self.config.scan_workers):
+                if self.first_file_seconds is None:
+                    self.first_file_seconds = time.perf_counter() - self.started
+                    METRICS.observe("startup.first_file", self.first_file_seconds)
+                    logging.info("First file scanned %.1f ms after start.", self.first_file_seconds * 1000)
+                if not self.processor.should_process_file(file_path):
+                    continue
+                self.seen_files.add(str(file_path))
+                stats.processed += 1
+                await queue.put(file_path)
+        finally:
+            for _ in range(downstream_workers):
+                await queue.put(_STOP)
+
+    async def _run_stage(
+        self,
+        name: str,
+        handler: Callable[[object], Awaitable[Optional[object]]],
+        input_name: str,
+        output_name: Optional[str],
+        workers: int,
+        downstream_workers: int
+    ) -> None:
+        """
+        Run a pool of workers that apply `handler` to items from one queue and pass results to the next.
+
+        A handler returning None drops the item (for example an unchanged file).
+        A failed item is logged and dropped; its manifest entry is left stale so the
+        next run retries it. Once every worker has stopped, the downstream workers
+        are signalled to stop.
+
+        Args:
+            name (str): Stage name for statistics and logs.
+            handler (Callable): Coroutine function handling one item.
+            input_name (str): Name of the queue to read from.
+            output_name (Optional[str]): Name of the queue to write to, or None for the last stage.
+            workers (int): Number of concurrent workers.
+            downstream_workers (int): Number of workers on the output queue to stop.
+        """
+        stats = self.stats[name]
+        input_queue = self.queues[input_name]
+        output_queue = self.queues[output_name] if output_name else None
+
+        async def worker() -> None:
+            while True:
+                item = await input_queue.get()
+                if item is _STOP:
+                    return
+                started = time.perf_counter()
+                try:
+                    result = await handler(item)
+                except Exception as e:
+                    stats.failed += 1
+                    file_path = item["path"] if isinstance(item, dict) else item
+                    logging.error(f"Error processing file {file_path} in {name} stage: {e}")
+                    continue
+                finally:
+                    stats.busy_seconds += time.perf_counter() - started
+                if result is None:
+                    continue
+                stats.processed += 1
+                if output_queue is not None:
+                    await output_queue.put(result)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        finally:
+            if output_queue is not None:
+                for _ in range(downstream_workers):
+                    await output_queue.put(_STOP)
+
+    async def _read(self, file_path: Path) -> Optional[dict]:
+        """
+        Read stage: skip files the manifest marks unchanged and load the rest as note records.
+
+        Each file is opened once; its bytes, hash and parsed frontmatter travel with the record.
+
+        Args:
+            file_path (Path): File to read.
+
+        Returns:
+            Optional[dict]: Work item holding the note record, or None if unchanged.
+        """
+        stat = file_path.stat()
+        if self.manifest.is_unchanged(file_path, stat.st_mtime, stat.st_size):
+            self.skipped += 1
+            return None
+
+        record = await asyncio.get_running_loop().run_in_executor(None, NoteRecord.load, file_path)
+        if self.manifest.is_unchanged(file_path, record.mtime, record.size, record.content_hash):
+            self.manifest.touch(file_path, record.mtime, record.size)
+            self.skipped += 1
+            return None
+        record.release_data()
+        return {"path": file_path, "record": record}
+
+    async def _chunk(self, item: dict) -> dict:
+        """
+        Chunk stage: split the note into chunks off the event loop.
+
+        Args:
+            item (dict): Work item from the read stage.
+
+        Returns:
+            dict: The work item with its chunks.
+        """
+        item["chunks"] = await asyncio.get_running_loop().run_in_executor(
+            None, self.processor.prepare_chunks, item["record"]
+        )
+        return item
+
+    async def _embed(self, item: dict) -> dict:
+        """
+        Embed stage: diff the note's chunks against the manifest and embed only the new ones.
+
+        Chunk ids are content hashes, so a chunk whose id was already recorded for the
+        file still has a valid vector. New chunks whose content is not already stored
+        elsewhere in the vault are embedded through the batcher, kept chunks whose
+        offsets moved are queued for a metadata-only update, and vanished chunks are
+        left for `_store` to delete once the new rows are written.
+
+        Args:
+            item (dict): Work item from the chunk stage.
+
+        Returns:
+            dict: The work item with the new, moved and stale chunks and the new chunks' embeddings.
+        """
+        previous_ids = self.manifest.chunk_ids(item["path"])
+        previous_offsets = self.manifest.chunk_offsets(item["path"])
+        current_ids = {chunk_id for chunk_id, _ in item["chunks"]}
+        item["stale_ids"] = [chunk_id for chunk_id in previous_ids if chunk_id not in current_ids]
+
+        kept_ids = set(previous_ids)
+        new_chunks = [(chunk_id, chunk_data) for chunk_id, chunk_data in item["chunks"] if chunk_id not in kept_ids]
+        # Content already stored for another chunk of the vault is not embedded again. The new chunks
+        # are registered in the dedup index now, confirmed once written and discarded if that fails
+        item["registered_ids"] = [chunk_id for chunk_id, _ in new_chunks]
+        chunks = item["new_chunks"] = self.processor.deduplicate(new_chunks)
+        item["moved_chunks"] = [
+            (chunk_id, chunk_data) for chunk_id, chunk_data in item["chunks"]
+            if chunk_id in previous_offsets and previous_offsets[chunk_id] != _chunk_offsets(chunk_data)
+        ]
+        self.chunk_counts["embedded"] += len(chunks)
+        self.chunk_counts["deduplicated"] += len(new_chunks) - len(chunks)
+        self.chunk_counts["kept"] += len(item["chunks"]) - len(new_chunks)
+        if not chunks:
+            item["embeddings"] = []
+            return item
+
+        texts = [chunk_data["chunk"] for _, chunk_data in chunks]
+        metadatas = [chunk_data["metadata"] for _, chunk_data in chunks]
+        token_ids = chunk_token_ids(chunks)
+        try:
+            if token_ids is None:
+                item["embeddings"] = await self.processor.llm_client.generate_embeddings(texts, metadatas)
+            else:
+                item["embeddings"] = await self.processor.llm_client.generate_embeddings(texts, metadatas, token_ids)
+        except Exception:
+            await self.processor.discard_chunks(item["registered_ids"])
+            raise
+        return item
+
+    async def _store(self, item: dict) -> dict:
+        """
+        Store stage: buffer the new rows for the vector store, refresh moved chunks and record the file in the manifest.
+
+        The file is recorded, and its vanished chunks are deleted, only once the write
+        holding its last new row has succeeded and every row its deduplicated chunks
+        share with other notes is written too, so a failed write leaves the note with
+        its old vectors and changed in the manifest, and the next run retries it. If
+        buffering fails, the file's new chunks are removed from the dedup index again.
+
+        Args:
+            item (dict): Work item from the embed stage.
+
+        Returns:
+            dict: The completed work item.
+        """
+        record = item["record"]
+        chunk_ids = [chunk_id for chunk_id, _ in item["chunks"]]
+
+        def record_file() -> None:
+            self.manifest.record(
+                item["path"], record.mtime, record.size, record.content_hash,
+                chunk_ids, [_chunk_offsets(chunk_data) for _, chunk_data in item["chunks"]]
+            )
+            self._stale_ids.extend(item["stale_ids"])
+
+        chunks = item["new_chunks"]
+        try:
+            if item["moved_chunks"]:
+                await self.processor.update_chunks(item["moved_chunks"])
+            await self.processor.llm_client.store_embeddings(
+                [chunk_id for chunk_id, _ in chunks],
+                [chunk_data["chunk"] for _, chunk_data in chunks],
+                [chunk_data["metadata"] for _, chunk_data in chunks],
+                item["embeddings"],
+                on_written=lambda: self.processor.confirm_chunks(chunk_ids, record_file)
+            )
+        except Exception:
+            await self.processor.discard_chunks(item["registered_ids"])
+            raise
+        await self._delete_stale_chunks()
+        logging.debug("Processed file: %s", item["path"])
+        return item
+
+    async def _delete_stale_chunks(self) -> None:
+        """
+        Delete the vanished chunks of files whose new rows have been written since the last call.
+        """
+        if self._stale_ids:
+            stale_ids, self._stale_ids = self._stale_ids, []
+            self.chunk_counts["deleted"] += len(stale_ids)
+            await self.processor.delete_chunks(stale_ids)
+
+    async def _report_progress(self) -> None:
+        """
+        Log queue depths and throughput at the configured interval until cancelled.
+        """
+        while True:
+            await asyncio.sleep(self.config.pipeline_log_interval)
+            self._log_progress()
+
+    def _log_progress(self) -> None:
+        """
+        Log each stage's processed count, throughput and input queue depth.
+        """
+        parts: List[str] = []
+        for name, stats in self.stats.items():
+            queue = self.queues.get(name)
+            depth = f", queue {queue.qsize()}/{queue.maxsize}" if queue is not None else ""
+            parts.append(f"{name}: {stats.processed} done ({stats.throughput():.1f}/s{depth})")
+        logging.info("Pipeline progress - " + "; ".join(parts))
@@ -0,0 +1,292 @@
+"""
+Shared resources of an indexing process.
+
+`Resources` owns the objects that are expensive to build or must exist only
+once per process: the embedding model with its tokenizer and worker processes,
+the embedding cache and micro-batcher, the Chroma client and collection with
+their batched writer, the dedup index and the thread pool blocking calls run
+in. Components such as `LLMClient` and `FileProcessor` take a handle to it
+instead of constructing their own, so several processors, a searcher and the
+tests all reuse one loaded model.
+
+Lifecycle:
+    resources = Resources(config).startup()   # cheap: nothing is loaded yet
+    resources.warm()                          # optional, blocking: load the model and open the store
+    await resources.flush()                   # write everything buffered, save caches
+    resources.shutdown()                      # release the model, workers and threads
+
+`with Resources(config) as resources:` runs `startup` and `shutdown` around a block.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from dedup_index import ChunkDedupIndex
+from embedding_backends import cache_variant
+from embedding_batcher import EmbeddingBatcher
+from embedding_cache import EmbeddingCache
+from embedding_model import EmbeddingModel
+from vector_store_writer import VectorStoreWriter
+
+# One Chroma client per persist directory and one collection per (directory, name) for the whole process
+_chroma_clients: Dict[str, object] = {}
+_chroma_collections: Dict[Tuple[str, str], object] = {}
+_chroma_lock = threading.Lock()
+
+
+def get_chroma_client(persist_directory: Path):
+    """
+    Return the process-wide Chroma client persisting to the given directory.
+
+    chromadb is imported on the first call, so runs that never touch the vector
+    store do not pay for it.
+
+    Args:
+        persist_directory (Path): Directory Chroma stores its data in.
+
+    Returns:
+        The shared Chroma client for that directory.
+    """
+    key = str(persist_directory)
+    with _chroma_lock:
+        client = _chroma_clients.get(key)
+        if client is None:
+            import chromadb
+
+            Path(persist_directory).mkdir(parents=True, exist_ok=True)
+            if hasattr(chromadb, "PersistentClient"):
+                client = chromadb.PersistentClient(path=key)
+            else:
+                from chromadb.config import Settings
+                client = chromadb.Client(Settings(chroma_db_impl="duckdb+parquet", persist_directory=key))
+            _chroma_clients[key] = client
+            logging.info(f"Opened persistent Chroma client at {key}")
+        return client
+
+
+def get_chroma_collection(config):
+    """
+    Return the process-wide collection described by the configuration.
+
+    HNSW parameters only take effect when the collection is first created;
+    an existing collection keeps the parameters it was built with.
+
+    Args:
+        config (Config): Configuration object containing settings.
+
+    Returns:
+        chromadb.Collection: The shared collection.
+    """
+    key = (str(config.chromadb_path), config.chroma_collection_name)
+    client = get_chroma_client(config.chromadb_path)
+    with _chroma_lock:
+        collection = _chroma_collections.get(key)
+        if collection is None:
+            collection = client.get_or_create_collection(
+                name=config.chroma_collection_name,
+                metadata={
+                    "hnsw:space": config.hnsw_space,
+                    "hnsw:M": config.hnsw_m,
+                    "hnsw:construction_ef": config.hnsw_construction_ef,
+                    "hnsw:search_ef": config.hnsw_search_ef,
+                }
+            )
+            _chroma_collections[key] = collection
+        return collection
+
+
+class Resources:
+    """
+    Registry of the model, tokenizer, vector store, caches and pools shared by the components of a run.
+
+    Attributes:
+        config (Config): Configuration object containing settings.
+        executor (ThreadPoolExecutor): Threads for blocking encode and vector-store calls.
+        embedding_cache (Optional[EmbeddingCache]): Embedding cache, or None if disabled.
+        embedding_model (EmbeddingModel): The embedding model; its backend owns any worker processes.
+        embedding_batcher (EmbeddingBatcher): Micro-batcher shared by every client of the model.
+        dedup_index (Optional[ChunkDedupIndex]): Vault-wide dedup index, or None if disabled.
+        running (bool): True between `startup` and `shutdown`.
+    """
+
+    def __init__(self, config):
+        """
+        Initialize an empty registry; `startup` builds the components.
+
+        Args:
+            config (Config): Configuration object containing settings.
+        """
+        self.config = config
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.embedding_cache: Optional[EmbeddingCache] = None
+        self.embedding_model: Optional[EmbeddingModel] = None
+        self.embedding_batcher: Optional[EmbeddingBatcher] = None
+        self.dedup_index: Optional[ChunkDedupIndex] = None
+        self.running = False
+        self._vector_store = None  # Lazy loading
+        self._vector_store_ready = False
+        self._vector_store_lock = threading.Lock()
+        self._writer: Optional[VectorStoreWriter] = None  # Lazy loading
+
+    def startup(self) -> "Resources":
+        """
+        Build the components without loading anything heavy; a no-op if already running.
+
+        The model is loaded on the first embedding (or by `warm`) and the vector
+        store is opened on first use.
+
+        Returns:
+            Resources: This registry, for chaining.
+        """
+        if self.running:
+            return self
+        config = self.config
+        self.executor = ThreadPoolExecutor(max_workers=config.thread_pool_workers, thread_name_prefix="resources")
+        self.embedding_cache = (
+            EmbeddingCache(
+                config.embedding_cache_dir,
+                config.embedding_model_name,
+                config.embedding_cache_max_entries,
+                variant=cache_variant(config.embedding_backend)
+            )
+            if config.embedding_cache_enabled else None
+        )
+        self.embedding_model = EmbeddingModel(
+            config.embedding_model_name,
+            batch_size=config.embedding_batch_size,
+            cache=self.embedding_cache,
+            backend=config.embedding_backend,
+            num_workers=config.embedding_workers,
+            torch_threads=config.embedding_torch_threads,
+            export_dir=config.embedding_export_dir,
+            sort_by_length=config.embedding_sort_by_length,
+            input_fields=config.embedding_input_fields.split(","),
+            input_max_tokens=config.embedding_input_max_tokens
+        )
+        # Gather several forward passes per encode call so inputs can be grouped by length
+        self.embedding_batcher = EmbeddingBatcher(
+            self.embedding_model,
+            max_batch_size=config.embedding_batch_size * max(1, config.embedding_sort_window),
+            max_latency_ms=config.embedding_max_latency_ms,
+            executor=self.executor
+        )
+        self.dedup_index = ChunkDedupIndex(config.dedup_index_file) if config.dedup_enabled else None
+        self.running = True
+        return self
+
+    @property
+    def vector_store(self):
+        """
+        The shared Chroma collection, opened on first access; None if opening it failed.
+
+        Logs:
+            - Error: If the collection cannot be opened.
+        """
+        with self._vector_store_lock:
+            if not self._vector_store_ready:
+                try:
+                    self._vector_store = get_chroma_collection(self.config)
+                    logging.info(f"Successfully initialized Chroma vector store '{self.config.chroma_collection_name}'.")
+                except Exception as e:
+                    logging.error(f"Failed to initialize Chroma vector store: {e}")
+                self._vector_store_ready = True
+            return self._vector_store
+
+    @property
+    def writer(self) -> VectorStoreWriter:
+        """
+        The batched vector-store writer, created with the vector store on first access.
+        """
+        if self._writer is None:
+            self._writer = VectorStoreWriter(
+                self.vector_store,
+                batch_size=self.config.vector_store_batch_size,
+                flush_interval_ms=self.config.vector_store_flush_interval_ms,
+                write_mode=self.config.vector_store_write_mode,
+                executor=self.executor
+            )
+        return self._writer
+
+    def get_tokenizer(self):
+        """
+        Return the embedding model's fast tokenizer, loading it on first use.
+        """
+        return self.embedding_model.get_tokenizer()
+
+    def warm(self) -> None:
+        """
+        Open the vector store and load the embedding model and tokenizer ahead of the first embedding.
+
+        Blocking; meant to run in an executor thread while the vault is being scanned.
+
+        Logs:
+            - Info: How long the warm-up took.
+            - Warning: If loading fails; the first embedding will retry it.
+        """
+        started = time.perf_counter()
+        if self.vector_store is None:
+            logging.warning("Warm-up could not open the vector store.")
+        try:
+            self.embedding_model.load_model()
+            self.get_tokenizer()
+        except Exception as e:
+            logging.warning(f"Embedding model warm-up failed: {e}")
+            return
+        logging.info(f"Warm-up finished in {time.perf_counter() - started:.2f}s.")
+
+    def persist(self) -> None:
+        """
+        Persist the Chroma client to disk on backends that need an explicit call.
+
+        Does nothing if the vector store was never opened.
+        """
+        if self._vector_store is None:
+            return
+        client = get_chroma_client(self.config.chromadb_path)
+        if hasattr(client, "persist"):
+            client.persist()
+
+    async def flush(self) -> int:
+        """
+        Finish pending embeddings, write every buffered row and save the embedding cache.
+
+        Returns:
+            int: Number of rows written by this flush.
+
+        Logs:
+            - Info: Embedding cache statistics and the encoder's padding efficiency, if it was measured.
+        """
+        await self.embedding_batcher.drain()
+        rows = await self._writer.flush() if self._writer is not None else 0
+        self.persist()
+        if self.embedding_cache is not None:
+            self.embedding_cache.save()
+            logging.info(f"Embedding cache stats: {self.embedding_cache.stats()}")
+        padding = self.embedding_model.padding_efficiency()
+        if padding is not None:
+            logging.info(f"Encoder padding efficiency: {padding}")
+        return rows
+
+    def shutdown(self) -> None:
+        """
+        Release the model, stop its worker processes and the thread pool; a no-op if not running.
+
+        Buffered rows are not written; call `flush` first. The Chroma client stays
+        open for the rest of the process, shared with any other registry.
+        """
+        if not self.running:
+            return
+        self.embedding_model.close()
+        self.executor.shutdown(wait=True)
+        self._writer = None
+        self.running = False
+
+    def __enter__(self) -> "Resources":
+        return self.startup()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
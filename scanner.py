@@ -1,39 +1,140 @@
 # Updating scanner.py to include specific error handling and enhanced logging
 
+import asyncio
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Set, Tuple
-from yaml_checker import has_yaml_metadata, split_yaml_files
-
-
-async def async_scan_files(directory: Path, file_extensions: Set[str]) -> List[Path]:
+from typing import AsyncIterator, Iterable, List, Optional, Set, Tuple
+from metrics import METRICS
+from note_record import NoteRecord
+from yaml_checker import DEFAULT_MAX_HEADER_BYTES, split_yaml_files
+
+
+def scan_directory_entries(
+    directory: str,
+    file_extensions: Set[str],
+    ignored_directories: Set[str],
+    failed_directories: Optional[List[str]] = None
+) -> Tuple[List[Path], List[str]]:
     """
-    Asynchronously scan the directory for files with allowed extensions.
+    List one directory level with `os.scandir`, reusing the cached `DirEntry` type information.
 
     Args:
-        directory (Path): The root directory to scan.
+        directory (str): The directory to list.
         file_extensions (Set[str]): Allowed file extensions.
+        ignored_directories (Set[str]): Directory names that are not descended into.
+        failed_directories (Optional[List[str]]): If given, the directory is appended to it
+            when it cannot be listed, so callers can tell an empty directory from an unreadable one.
 
     Returns:
-        List[Path]: List of files matching the extensions.
+        Tuple[List[Path], List[str]]: Matching files, and subdirectories still to scan.
 
     Logs:
         - Warning: Issues encountered during directory scanning.
     """
-    results = []
+    files = []
+    subdirectories = []
+    timer = METRICS.timer("scan")
     try:
-        for entry in directory.iterdir():
-            if entry.is_dir():
-                results += await async_scan_files(entry, file_extensions)
-            elif entry.suffix in file_extensions:
-                results.append(entry)
+        with timer, os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in ignored_directories:
+                            subdirectories.append(entry.path)
+                    elif os.path.splitext(entry.name)[1] in file_extensions and entry.is_file():
+                        files.append(Path(entry.path))
+                except OSError as e:
+                    logging.warning(f"Could not inspect {entry.path}: {e}")
     except PermissionError:
         logging.warning(f"Permission denied when accessing directory: {directory}")
+        if failed_directories is not None:
+            failed_directories.append(directory)
     except FileNotFoundError:
         logging.warning(f"Directory not found: {directory}")
+        if failed_directories is not None:
+            failed_directories.append(directory)
     except Exception as e:
         logging.warning(f"Unexpected error while scanning directory {directory}: {e}")
-    return results
+        if failed_directories is not None:
+            failed_directories.append(directory)
+    METRICS.inc("scan.files", len(files))
+    return files, subdirectories
+
+
+async def iter_scan_files(
+    directory: Path,
+    file_extensions: Set[str],
+    ignored_directories: Optional[Set[str]] = None,
+    max_workers: int = 8,
+    failed_directories: Optional[List[str]] = None
+) -> AsyncIterator[Path]:
+    """
+    Walk the directory tree on a thread pool, yielding matching files as they are found.
+
+    Each directory level is listed by a worker thread, so the event loop is never
+    blocked and processing can start before the walk finishes. Ignored
+    directories are pruned before they are descended into.
+
+    Args:
+        directory (Path): The root directory to scan.
+        file_extensions (Set[str]): Allowed file extensions.
+        ignored_directories (Optional[Set[str]]): Directory names to skip, e.g. ".git".
+        max_workers (int): Number of threads listing directories concurrently.
+        failed_directories (Optional[List[str]]): Collects subdirectories that could not be listed.
+
+    Yields:
+        Path: Each file matching the extensions, in discovery order.
+
+    Raises:
+        OSError: If the root directory itself cannot be listed, so a missing or unmounted
+            vault is never mistaken for an empty one.
+    """
+    failed_directories = failed_directories if failed_directories is not None else []
+    file_extensions = set(file_extensions)
+    ignored_directories = set(ignored_directories or ())
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scanner") as executor:
+        def submit(path: str) -> asyncio.Future:
+            return loop.run_in_executor(
+                executor, scan_directory_entries, path, file_extensions, ignored_directories, failed_directories
+            )
+
+        root = str(directory)
+        files, subdirectories = await submit(root)
+        if root in failed_directories:
+            raise OSError(f"Could not list the vault root {root}.")
+        pending = {submit(subdirectory) for subdirectory in subdirectories}
+        for file_path in files:
+            yield file_path
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                files, subdirectories = future.result()
+                for subdirectory in subdirectories:
+                    pending.add(submit(subdirectory))
+                for file_path in files:
+                    yield file_path
+
+
+async def async_scan_files(
+    directory: Path,
+    file_extensions: Set[str],
+    ignored_directories: Optional[Iterable[str]] = None
+) -> List[Path]:
+    """
+    Asynchronously scan the directory for files with allowed extensions.
+
+    Args:
+        directory (Path): The root directory to scan.
+        file_extensions (Set[str]): Allowed file extensions.
+        ignored_directories (Optional[Iterable[str]]): Directory names to skip.
+
+    Returns:
+        List[Path]: Sorted list of files matching the extensions.
+    """
+    return sorted([file_path async for file_path in iter_scan_files(directory, file_extensions, set(ignored_directories or ()))])
 
 
 class DirectoryScanner:
@@ -44,9 +145,16 @@ class DirectoryScanner:
         vault_directory (Path): Root directory for scanning.
         file_extensions (Set[str]): Allowed file extensions.
         ignored_directories (Set[str]): Directories to ignore during scanning.
+        failed_directories (List[str]): Subdirectories the latest `iter_files` walk could not list.
     """
 
-    def __init__(self, vault_directory: Path, file_extensions: Set[str], ignored_directories: Set[str]):
+    def __init__(
+        self,
+        vault_directory: Path,
+        file_extensions: Set[str],
+        ignored_directories: Set[str],
+        max_header_bytes: int = DEFAULT_MAX_HEADER_BYTES
+    ):
         """
         Initialize the directory scanner.
 
@@ -54,37 +162,89 @@ class DirectoryScanner:
             vault_directory (Path): Root directory to scan.
             file_extensions (Set[str]): File extensions to include.
             ignored_directories (Set[str]): Directories to ignore.
+            max_header_bytes (int): Maximum bytes read per file when classifying by frontmatter.
         """
         self.vault_directory = vault_directory
         self.file_extensions = file_extensions
         self.ignored_directories = ignored_directories
+        self.max_header_bytes = max_header_bytes
+        self.failed_directories: List[str] = []
+
+    def iter_files(self, max_workers: int = 8) -> AsyncIterator[Path]:
+        """
+        Stream matching files from the vault as the walk discovers them.
+
+        Args:
+            max_workers (int): Number of threads listing directories concurrently.
+
+        Returns:
+            AsyncIterator[Path]: Files with allowed extensions outside ignored directories.
+
+        Raises:
+            OSError: While iterating, if the vault root cannot be listed.
+        """
+        self.failed_directories = []
+        return iter_scan_files(
+            self.vault_directory, self.file_extensions, self.ignored_directories, max_workers, self.failed_directories
+        )
 
-    async def scan_and_split(self) -> Tuple[List[Path], List[Path]]:
+    @staticmethod
+    async def load_records(paths: List[Path], max_concurrent_reads: int = 8) -> List[NoteRecord]:
+        """
+        Read files into `NoteRecord`s on the default executor, a bounded number at a time.
+
+        Args:
+            paths (List[Path]): Files to read.
+            max_concurrent_reads (int): Maximum number of reads in flight.
+
+        Returns:
+            List[NoteRecord]: Records of the files that could be read, in input order.
+
+        Logs:
+            - Warning: Files that could not be read; they are skipped.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max(1, max_concurrent_reads))
+
+        async def load(path: Path) -> Optional[NoteRecord]:
+            async with semaphore:
+                try:
+                    return await loop.run_in_executor(None, NoteRecord.load, path)
+                except OSError as e:
+                    logging.warning(f"Could not read {path}, skipping it: {e}")
+                    return None
+
+        records = await asyncio.gather(*(load(path) for path in paths))
+        return [record for record in records if record is not None]
+
+    async def scan_and_split(self, load_records: bool = False, max_concurrent_reads: int = 8) -> Tuple[list, list]:
         """
         Asynchronously scan and split files into YAML and non-YAML categories.
 
+        Args:
+            load_records (bool): If True, read each file once into a `NoteRecord` and
+                classify from its parsed frontmatter, so the records can be processed
+                without reading the files again. Unreadable files are skipped.
+            max_concurrent_reads (int): Maximum number of files read at once when `load_records` is set.
+
         Returns:
-            Tuple[List[Path], List[Path]]: Files with YAML metadata, files without.
+            Tuple[list, list]: Files with YAML metadata, files without (paths, or records if `load_records`).
 
         Logs:
             - Info: Summary of files scanned and categorized.
         """
         try:
-            all_files = await async_scan_files(self.vault_directory, self.file_extensions)
-            yaml_files, non_yaml_files = split_yaml_files(all_files)
+            all_files = await async_scan_files(self.vault_directory, self.file_extensions, self.ignored_directories)
+            loop = asyncio.get_running_loop()
+            if load_records:
+                all_files = await self.load_records(all_files, max_concurrent_reads)
+            # Path classification only reads each file's frontmatter prefix
+            yaml_files, non_yaml_files = await loop.run_in_executor(
+                None, split_yaml_files, all_files, self.max_header_bytes
+            )
             logging.info(f"Scanning complete: {len(all_files)} files found, "
                          f"{len(yaml_files)} with YAML metadata, {len(non_yaml_files)} without.")
             return yaml_files, non_yaml_files
         except Exception as e:
             logging.error(f"Error during scanning and splitting files: {e}")
             raise
-
-
-# Save the updated code for the user
-updated_scanner_code = """
-# Updated scanner.py as per improvements above
-"""
-
-# Write updated code to file for download
-with open("/mnt/data/updated_scanner.py", "w") as file:
-    file.write(updated_scanner_code)
@@ -0,0 +1,371 @@
+"""
+Semantic search over the indexed notes.
+
+`NoteSearcher` keeps the embedding model and the Chroma collection loaded, caches
+the embeddings of repeated queries, and returns ranked chunks with their source
+file and offsets. `search_notes` wraps a process-wide searcher, and running this
+module gives a command-line entry point.
+
+Run Instructions:
+    python search.py "query text" [-k 5] [--tag TAG] [--path-prefix DIR] [--chunk-type text|code] [--json]
+    python search.py            # read one query per line from stdin, keeping the model warm
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import PurePath
+from typing import Iterable, List, Optional
+
+from config import Config
+from dedup_index import SOURCE_SEPARATOR
+from embedding_model import EmbeddingModel
+from resources import get_chroma_collection
+from utils import setup_logging
+
+
+def _split_tags(value) -> List[str]:
+    """
+    Normalize stored tags ("a, b" after metadata sanitizing) into a list without leading "#".
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(tag).strip().lstrip("#") for tag in value if str(tag).strip()]
+
+
+def _no_match_errors() -> tuple:
+    """
+    Return the exceptions Chroma raises when no row matches a `where` filter.
+
+    chromadb 0.3 raises `NoDatapointsException`; it is imported here because the
+    collection has already loaded chromadb by the time a query runs.
+    """
+    try:
+        from chromadb.errors import NoDatapointsException
+    except ImportError:
+        return ()
+    return (NoDatapointsException,)
+
+
+def _is_under(path, prefix: PurePath) -> bool:
+    """
+    Return True if `path` is `prefix` or lies inside it, comparing whole path components.
+    """
+    return bool(path) and PurePath(os.path.normpath(str(path))).is_relative_to(prefix)
+
+
+class QueryEmbeddingCache:
+    """
+    Thread-safe in-memory LRU cache of query embeddings.
+
+    Attributes:
+        max_entries (int): Number of queries kept.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that needed an encode call.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries (int): Number of queries kept; 0 disables caching.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query: str) -> str:
+        """
+        Normalize a query so whitespace differences share an entry.
+        """
+        return " ".join(query.split())
+
+    def get(self, query: str) -> Optional[list]:
+        """
+        Return the cached embedding of a query, or None.
+        """
+        key = self.key(query)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, query: str, embedding: list) -> None:
+        """
+        Store a query embedding, evicting the least recently used entry when full.
+        """
+        if self.max_entries <= 0:
+            return
+        key = self.key(query)
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class NoteSearcher:
+    """
+    Answers top-k queries against the notes collection with a warm model.
+
+    Attributes:
+        config (Config): Configuration object containing settings.
+        embedding_model (EmbeddingModel): Model used to embed queries.
+        collection (chromadb.Collection): The notes collection.
+        query_cache (QueryEmbeddingCache): Embeddings of recent queries.
+    """
+
+    def __init__(self, config, embedding_model: Optional[EmbeddingModel] = None, collection=None):
+        """
+        Initialize the searcher.
+
+        Args:
+            config (Config): Configuration object containing settings.
+            embedding_model (Optional[EmbeddingModel]): Model to reuse; a new one is built if None.
+            collection: Collection to query; the configured collection is opened if None.
+        """
+        self.config = config
+        self.embedding_model = embedding_model or EmbeddingModel(
+            config.embedding_model_name,
+            batch_size=config.embedding_batch_size,
+            backend=config.embedding_backend,
+            num_workers=config.embedding_workers,
+            torch_threads=config.embedding_torch_threads,
+            export_dir=config.embedding_export_dir
+        )
+        self.collection = collection if collection is not None else get_chroma_collection(config)
+        self.query_cache = QueryEmbeddingCache(config.search_query_cache_size)
+
+    def warm_up(self) -> None:
+        """
+        Load the model now so the first query does not pay for it.
+        """
+        self.embedding_model.load_model()
+
+    def close(self) -> None:
+        """
+        Release the model.
+        """
+        self.embedding_model.close()
+
+    def embed_query(self, query: str) -> list:
+        """
+        Embed a query, reusing the embedding of an identical earlier query.
+
+        Args:
+            query (str): Query text.
+
+        Returns:
+            list: The query embedding.
+        """
+        embedding = self.query_cache.get(query)
+        if embedding is None:
+            embedding = [float(value) for value in self.embedding_model.encode_queries([query])[0]]
+            self.query_cache.put(query, embedding)
+        return embedding
+
+    def search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+        path_prefix: Optional[str] = None,
+        chunk_type: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Return the chunks closest to a query.
+
+        Args:
+            query (str): Query text.
+            k (Optional[int]): Number of results; defaults to `config.search_top_k`.
+            tags (Optional[Iterable[str]]): Tags every result's note must have.
+            path_prefix (Optional[str]): Only return chunks of files under this path;
+                relative paths are taken from the vault directory.
+            chunk_type (Optional[str]): Only return "text" or "code" chunks.
+
+        Returns:
+            List[dict]: Ranked results (see `query_embedding`).
+        """
+        return self.query_embedding(self.embed_query(query), k, tags, path_prefix, chunk_type)
+
+    def query_embedding(
+        self,
+        embedding: list,
+        k: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+        path_prefix: Optional[str] = None,
+        chunk_type: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Return the chunks closest to an already embedded query.
+
+        `chunk_type` is filtered by Chroma. Tags and path prefixes cannot be
+        expressed as Chroma metadata filters, so candidates are over-fetched and
+        filtered here, widening the candidate set until `k` results are found.
+        Requests never ask for more candidates than the collection holds, since
+        Chroma raises instead of returning fewer.
+
+        Args:
+            embedding (list): Query embedding.
+            k (Optional[int]): Number of results; defaults to `config.search_top_k`.
+            tags (Optional[Iterable[str]]): Tags every result's note must have. A deduplicated
+                chunk carries the tags of its primary note only (see `dedup_index`).
+            path_prefix (Optional[str]): Only return chunks of files under this path; any of
+                a deduplicated chunk's source files may match.
+            chunk_type (Optional[str]): Only return "text" or "code" chunks.
+
+        Returns:
+            List[dict]: Up to `k` results ordered by distance, each with "id", "file_path",
+            "source_files", "chunk_type", "start", "end", "heading_path", "distance", "document" and "metadata".
+        """
+        k = k or self.config.search_top_k
+        required_tags = {tag.lstrip("#") for tag in tags or ()}
+        if path_prefix:
+            path_prefix = PurePath(os.path.normpath(os.path.join(str(self.config.vault_directory), path_prefix)))
+        where = {"chunk_type": chunk_type} if chunk_type else None
+        post_filtered = bool(required_tags or path_prefix)
+
+        available = self.collection.count()
+        if available == 0:
+            return []
+        max_candidates = min(self.config.search_max_candidates, available)
+        n_results = min(k * self.config.search_oversample if post_filtered else k, available)
+        while True:
+            try:
+                response = self.collection.query(
+                    query_embeddings=[embedding],
+                    n_results=n_results,
+                    where=where,
+                    include=["documents", "metadatas", "distances"]
+                )
+            except _no_match_errors():
+                return []
+            ids = response["ids"][0]
+            results = []
+            for doc_id, document, metadata, distance in zip(
+                ids, response["documents"][0], response["metadatas"][0], response["distances"][0]
+            ):
+                metadata = metadata or {}
+                # Deduplicated chunks list every file they appear in
+                source_files = [path for path in str(metadata.get("source_files") or "").split(SOURCE_SEPARATOR) if path]
+                source_files = source_files or [metadata.get("file_path")]
+                if path_prefix and not any(_is_under(path, path_prefix) for path in source_files):
+                    continue
+                if required_tags and not required_tags.issubset(_split_tags(metadata.get("tags"))):
+                    continue
+                results.append({
+                    "id": doc_id,
+                    "file_path": metadata.get("file_path"),
+                    "source_files": source_files,
+                    "chunk_type": metadata.get("chunk_type"),
+                    "start": metadata.get("start"),
+                    "end": metadata.get("end"),
+                    "heading_path": metadata.get("heading_path"),
+                    "distance": distance,
+                    "document": document,
+                    "metadata": metadata,
+                })
+                if len(results) == k:
+                    return results
+            # Stop once the collection has no more candidates or the widening limit is reached
+            if not post_filtered or len(ids) < n_results or n_results >= max_candidates:
+                return results
+            n_results = min(n_results * 2, max_candidates)
+
+
+# Searcher shared by `search_notes` calls, so the model stays loaded between queries
+_searcher: Optional[NoteSearcher] = None
+_searcher_lock = threading.Lock()
+
+
+def get_searcher(config=None) -> NoteSearcher:
+    """
+    Return the process-wide searcher, creating it on first use.
+
+    Args:
+        config (Config): Configuration for the first call; later calls reuse the existing searcher.
+
+    Returns:
+        NoteSearcher: The shared searcher.
+    """
+    global _searcher
+    with _searcher_lock:
+        if _searcher is None:
+            _searcher = NoteSearcher(config or Config.load_default())
+        return _searcher
+
+
+def search_notes(query: str, k: Optional[int] = None, config=None, **filters) -> List[dict]:
+    """
+    Search the notes collection with the process-wide searcher.
+
+    Args:
+        query (str): Query text.
+        k (Optional[int]): Number of results.
+        config (Config): Configuration used if the searcher does not exist yet.
+        **filters: `tags`, `path_prefix` and `chunk_type`, as in `NoteSearcher.search`.
+
+    Returns:
+        List[dict]: Ranked results.
+    """
+    return get_searcher(config).search(query, k, **filters)
+
+
+def format_result(rank: int, result: dict) -> str:
+    """
+    Render one result as a single line for the terminal.
+    """
+    snippet = " ".join((result["document"] or "").split())[:120]
+    location = f"{result['file_path']}:{result['start']}-{result['end']}"
+    heading = f" [{result['heading_path']}]" if result.get("heading_path") else ""
+    return f"{rank:>2}. {result['distance']:.4f} {location}{heading}\n    {snippet}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the indexed notes.")
+    parser.add_argument("query", nargs="?", help="Query text; omit to read one query per line from stdin.")
+    parser.add_argument("-k", "--top-k", type=int, default=None, help="Number of results.")
+    parser.add_argument("--tag", action="append", dest="tags", help="Required tag; may be repeated.")
+    parser.add_argument("--path-prefix", help="Only search files under this path (relative to the vault).")
+    parser.add_argument("--chunk-type", choices=["text", "code"], help="Only return chunks of this type.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    config = Config.load_default()
+    setup_logging(config.log_level, config.log_format, config.log_file)
+    searcher = get_searcher(config)
+    searcher.warm_up()
+
+    queries = [args.query] if args.query else (line.strip() for line in sys.stdin)
+    try:
+        for query in queries:
+            if not query:
+                continue
+            results = searcher.search(query, args.top_k, args.tags, args.path_prefix, args.chunk_type)
+            if args.json:
+                print(json.dumps({"query": query, "results": results}, default=str))
+            else:
+                print(f"Query: {query}")
+                for rank, result in enumerate(results, start=1):
+                    print(format_result(rank, result))
+            sys.stdout.flush()
+    finally:
+        searcher.close()
+
+
+if __name__ == "__main__":
+    main()
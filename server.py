@@ -0,0 +1,341 @@
+"""
+Small asyncio HTTP service for note search.
+
+The service keeps the embedding model and the Chroma collection loaded, batches
+the query embeddings of concurrent requests into single encode calls through an
+`EmbeddingBatcher`, and tracks p50/p95 latency per endpoint. It needs nothing
+beyond the standard library and the project's own modules.
+
+Endpoints:
+    GET  /health                     Status, collection size and latency percentiles.
+    GET  /search?q=...&k=5&tag=...&path_prefix=...&chunk_type=...
+    POST /search                     JSON body with the same fields ("tags" as a list).
+    POST /reindex                    Start an incremental re-index in the background.
+
+Run Instructions:
+    python main.py serve [key=value ...]
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from embedding_batcher import EmbeddingBatcher
+from search import NoteSearcher
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+_MAX_BODY_BYTES = 1024 * 1024
+
+
+class LatencyTracker:
+    """
+    Keeps a sliding window of request latencies per endpoint.
+
+    Attributes:
+        window (int): Number of recent samples kept per endpoint.
+    """
+
+    def __init__(self, window: int = 1000):
+        """
+        Initialize an empty tracker.
+
+        Args:
+            window (int): Number of recent samples kept per endpoint.
+        """
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        """
+        Add one latency sample.
+        """
+        self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+        self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    @staticmethod
+    def percentile(samples, fraction: float) -> float:
+        """
+        Nearest-rank percentile of a non-empty collection of samples.
+        """
+        ordered = sorted(samples)
+        return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Return the request count and p50/p95 latency in milliseconds for each endpoint.
+        """
+        return {
+            endpoint: {
+                "count": self._counts[endpoint],
+                "p50_ms": round(self.percentile(samples, 0.50) * 1000, 2),
+                "p95_ms": round(self.percentile(samples, 0.95) * 1000, 2),
+            }
+            for endpoint, samples in self._samples.items() if samples
+        }
+
+
+class _QueryEncoder:
+    """
+    Adapter that lets `EmbeddingBatcher` batch plain query embeddings.
+    """
+
+    def __init__(self, embedding_model):
+        self.embedding_model = embedding_model
+
+    def generate_embeddings(self, texts, metadatas):
+        return self.embedding_model.encode_queries(texts)
+
+
+class SearchServer:
+    """
+    HTTP front end for a `NoteSearcher`.
+
+    Attributes:
+        config (Config): Configuration object containing settings.
+        searcher (NoteSearcher): Warm searcher answering queries.
+        batcher (EmbeddingBatcher): Batches query embeddings of concurrent requests.
+        latency (LatencyTracker): Per-endpoint latency samples.
+    """
+
+    def __init__(
+        self,
+        config,
+        searcher: NoteSearcher,
+        reindex: Optional[Callable[[], Awaitable[dict]]] = None
+    ):
+        """
+        Initialize the server without binding a socket.
+
+        Args:
+            config (Config): Configuration object containing settings.
+            searcher (NoteSearcher): Warm searcher answering queries.
+            reindex (Optional[Callable[[], Awaitable[dict]]]): Coroutine function running one
+                re-index; /reindex is disabled if None.
+        """
+        self.config = config
+        self.searcher = searcher
+        self.reindex = reindex
+        self.batcher = EmbeddingBatcher(
+            _QueryEncoder(searcher.embedding_model),
+            max_batch_size=config.embedding_batch_size,
+            max_latency_ms=config.server_query_max_latency_ms
+        )
+        self.latency = LatencyTracker(config.server_latency_window)
+        self.started = time.time()
+        self._reindex_task: Optional[asyncio.Task] = None
+        self._last_reindex: Optional[dict] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: Optional[str] = None, port: Optional[int] = None) -> Tuple[str, int]:
+        """
+        Load the model and start listening.
+
+        Args:
+            host (Optional[str]): Interface to bind; defaults to `config.server_host`.
+            port (Optional[int]): Port to bind; defaults to `config.server_port` (0 picks a free port).
+
+        Returns:
+            Tuple[str, int]: The bound address.
+
+        Logs:
+            - Info: The address the server listens on.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.searcher.warm_up)
+        self._server = await asyncio.start_server(
+            self._handle_connection,
+            host if host is not None else self.config.server_host,
+            port if port is not None else self.config.server_port
+        )
+        address = self._server.sockets[0].getsockname()[:2]
+        logging.info(f"Search server listening on http://{address[0]}:{address[1]}")
+        return address
+
+    async def serve_forever(self) -> None:
+        """
+        Serve requests until cancelled.
+        """
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """
+        Stop accepting connections, cancel a running re-index and wait for pending query batches.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._reindex_task is not None:
+            self._reindex_task.cancel()
+            await asyncio.gather(self._reindex_task, return_exceptions=True)
+            self._reindex_task = None
+        await self.batcher.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serve HTTP/1.1 requests on one connection, keeping it alive between requests.
+
+        Logs:
+            - Debug: Malformed requests and dropped connections.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", "0"))
+                if length > _MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Request body too large."}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                started = time.perf_counter()
+                path = urlsplit(target).path
+                status, payload = await self._dispatch(method, target, body)
+                self.latency.record(path, time.perf_counter() - started)
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            logging.debug(f"Dropping connection: {e}")
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool) -> None:
+        """
+        Write a JSON response.
+        """
+        body = json.dumps(payload, default=str).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, dict]:
+        """
+        Route a request to its handler.
+
+        Returns:
+            Tuple[int, dict]: HTTP status and JSON payload.
+
+        Logs:
+            - Error: If a handler fails.
+        """
+        url = urlsplit(target)
+        routes = {
+            "/health": ("GET", self._health),
+            "/search": ("GET POST", self._search),
+            "/reindex": ("POST", self._reindex),
+        }
+        route = routes.get(url.path)
+        if route is None:
+            return 404, {"error": f"Unknown path: {url.path}"}
+        if method not in route[0].split():
+            return 405, {"error": f"{method} is not allowed on {url.path}"}
+        try:
+            return await route[1](method, url.query, body)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            logging.error(f"Error handling {method} {url.path}: {e}")
+            return 500, {"error": str(e)}
+
+    async def _health(self, method: str, query: str, body: bytes) -> Tuple[int, dict]:
+        """
+        Report status, collection size, query batching and latency percentiles.
+        """
+        count = await asyncio.get_running_loop().run_in_executor(None, self.searcher.collection.count)
+        return 200, {
+            "status": "ok",
+            "uptime_s": round(time.time() - self.started, 1),
+            "collection_count": count,
+            "query_batches": self.batcher.batches,
+            "queries_encoded": self.batcher.items,
+            "query_cache": {"hits": self.searcher.query_cache.hits, "misses": self.searcher.query_cache.misses},
+            "reindex_running": self._reindex_task is not None and not self._reindex_task.done(),
+            "last_reindex": self._last_reindex,
+            "latency": self.latency.summary(),
+        }
+
+    async def _search(self, method: str, query: str, body: bytes) -> Tuple[int, dict]:
+        """
+        Embed the query through the shared batcher and return the ranked chunks.
+
+        Raises:
+            ValueError: If the body is not a JSON object, the query text is missing or a
+                parameter is malformed.
+        """
+        if method == "POST":
+            params = json.loads(body or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("Request body must be a JSON object.")
+            tags = params.get("tags")
+            if isinstance(tags, str):
+                tags = [tags]
+            elif tags is not None and not (isinstance(tags, list) and all(isinstance(tag, str) for tag in tags)):
+                raise ValueError("'tags' must be a string or a list of strings.")
+        else:
+            values = parse_qs(query)
+            params = {key: value[-1] for key, value in values.items()}
+            tags = values.get("tag")
+        text = (params.get("q") or params.get("query") or "").strip()
+        if not text:
+            raise ValueError("Missing query text ('q').")
+        k = int(params["k"]) if params.get("k") else None
+
+        embedding = self.searcher.query_cache.get(text)
+        if embedding is None:
+            embedding = [float(value) for value in await self.batcher.embed(text, {})]
+            self.searcher.query_cache.put(text, embedding)
+        results = await asyncio.get_running_loop().run_in_executor(
+            None, self.searcher.query_embedding, embedding, k, tags, params.get("path_prefix"), params.get("chunk_type")
+        )
+        return 200, {"query": text, "results": results}
+
+    async def _reindex(self, method: str, query: str, body: bytes) -> Tuple[int, dict]:
+        """
+        Start a background re-index unless one is already running.
+        """
+        if self.reindex is None:
+            return 404, {"error": "Re-indexing is not enabled on this server."}
+        if self._reindex_task is not None and not self._reindex_task.done():
+            return 409, {"error": "A re-index is already running."}
+        self._reindex_task = asyncio.get_running_loop().create_task(self._run_reindex())
+        return 202, {"started": True}
+
+    async def _run_reindex(self) -> None:
+        """
+        Run one re-index and keep its summary for /health.
+
+        Logs:
+            - Error: If the re-index fails.
+        """
+        started = time.perf_counter()
+        try:
+            summary = await self.reindex()
+        except Exception as e:
+            logging.error(f"Re-index failed: {e}")
+            summary = {"error": str(e)}
+        self._last_reindex = {**summary, "seconds": round(time.perf_counter() - started, 2)}
@@ -0,0 +1,218 @@
+"""
+Token-aware chunking aligned with the embedding model's tokenizer.
+
+Text is split on sentence and heading boundaries, every segment of a note is
+tokenized in one batched call with the model's own fast tokenizer, and segments
+are packed greedily into chunks of at most `max_tokens` word-pieces. Each chunk
+keeps its token ids so the encoder can reuse them instead of tokenizing again.
+"""
+
+import logging
+import re
+from typing import Dict, Generator, List, Optional, Tuple
+
+from chunker import _CODE_PATTERN
+from metrics import METRICS
+
+# Sentence ends followed by spaces, or runs of newlines
+_TEXT_BOUNDARY = re.compile(r"(?<=[.!?])[ \t]+|\n+")
+_LINE_BOUNDARY = re.compile(r"\n+")
+_HEADING = re.compile(r"#{1,6}\s")
+
+
+def load_tokenizer(model_name: str):
+    """
+    Load the fast tokenizer that belongs to a SentenceTransformer model.
+
+    Args:
+        model_name (str): SentenceTransformer model name, e.g. "all-MiniLM-L6-v2".
+
+    Returns:
+        transformers.PreTrainedTokenizerFast: The model's tokenizer.
+    """
+    from transformers import AutoTokenizer
+
+    repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    return AutoTokenizer.from_pretrained(repo_id, use_fast=True)
+
+
+def split_segments(
+    content: str,
+    start: int,
+    end: int,
+    boundary: re.Pattern = _TEXT_BOUNDARY,
+    detect_headings: bool = True
+) -> List[Tuple[int, int, bool]]:
+    """
+    Split a span of the content into boundary-delimited segments.
+
+    Args:
+        content (str): The full content.
+        start (int): Start offset of the span.
+        end (int): End offset of the span.
+        boundary (re.Pattern): Pattern matching the separators between segments.
+        detect_headings (bool): Whether to flag segments that are Markdown headings.
+
+    Returns:
+        List[Tuple[int, int, bool]]: (start, end, is_heading) for each non-empty segment.
+    """
+    spans = []
+    position = start
+    for match in boundary.finditer(content, start, end):
+        if match.start() > position:
+            spans.append((position, match.start()))
+        position = match.end()
+    if position < end:
+        spans.append((position, end))
+
+    segments = []
+    for seg_start, seg_end in spans:
+        is_heading = (
+            detect_headings
+            and (seg_start == 0 or content[seg_start - 1] == "\n")
+            and _HEADING.match(content, seg_start) is not None
+        )
+        segments.append((seg_start, seg_end, is_heading))
+    return segments
+
+
+def _pack_segments(
+    segments: List[Tuple[int, int, bool]],
+    token_ids: List[List[int]],
+    offsets: List[List[Tuple[int, int]]],
+    max_tokens: int,
+    overlap_tokens: int
+) -> Generator[Tuple[int, int, List[int]], None, None]:
+    """
+    Greedily pack tokenized segments into chunks of at most `max_tokens` tokens.
+
+    Headings always start a new chunk. Segments longer than `max_tokens` are split
+    at token boundaries. Up to `overlap_tokens` tokens of trailing segments are
+    repeated at the start of the next chunk.
+
+    Yields:
+        Tuple[int, int, List[int]]: Chunk (start, end) offsets and its token ids.
+    """
+    current: List[Tuple[int, int, List[int]]] = []
+    current_tokens = 0
+
+    def emit():
+        ids = [token for _, _, segment_ids in current for token in segment_ids]
+        return current[0][0], current[-1][1], ids
+
+    for (seg_start, seg_end, is_heading), ids, segment_offsets in zip(segments, token_ids, offsets):
+        if len(ids) > max_tokens:
+            if current:
+                yield emit()
+                current, current_tokens = [], 0
+            for window in range(0, len(ids), max_tokens):
+                window_offsets = segment_offsets[window:window + max_tokens]
+                yield seg_start + window_offsets[0][0], seg_start + window_offsets[-1][1], ids[window:window + max_tokens]
+            continue
+
+        if current and (is_heading or current_tokens + len(ids) > max_tokens):
+            yield emit()
+            if is_heading:
+                current, current_tokens = [], 0
+            else:
+                # Carry trailing segments into the next chunk as overlap
+                carried = []
+                carried_tokens = 0
+                for segment in reversed(current):
+                    if carried_tokens + len(segment[2]) > overlap_tokens or carried_tokens + len(segment[2]) + len(ids) > max_tokens:
+                        break
+                    carried.insert(0, segment)
+                    carried_tokens += len(segment[2])
+                current, current_tokens = carried, carried_tokens
+
+        current.append((seg_start, seg_end, ids))
+        current_tokens += len(ids)
+
+    if current:
+        yield emit()
+
+
+def chunk_content_by_tokens(
+    content: str,
+    metadata: dict,
+    tokenizer,
+    max_tokens: int,
+    overlap_tokens: int = 0
+) -> Generator[Dict, None, None]:
+    """
+    Generate chunks measured in the embedding model's tokens, split on sentence and heading boundaries.
+
+    Fenced code blocks are chunked separately (split on lines) and typed "code".
+
+    Args:
+        content (str): The file content to split into chunks.
+        metadata (dict): Metadata extracted from the file.
+        tokenizer: The model's fast tokenizer (see `load_tokenizer`).
+        max_tokens (int): Maximum number of tokens per chunk, excluding special tokens.
+        overlap_tokens (int): Maximum number of tokens repeated between consecutive text chunks.
+
+    Yields:
+        Dict: Chunk data with type, metadata, (start, end) offsets and the chunk's "token_ids".
+
+    Logs:
+        - Debug: Number of chunks generated (logged after yielding all chunks).
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be greater than 0.")
+    if overlap_tokens < 0 or overlap_tokens >= max_tokens:
+        raise ValueError("overlap_tokens must be non-negative and smaller than max_tokens.")
+    if len(content) == 0:
+        raise ValueError("Content cannot be empty.")
+
+    # Collect the segments of each text span and code block, in document order
+    blocks: List[Tuple[str, List[Tuple[int, int, bool]]]] = []
+    position = 0
+    for match in _CODE_PATTERN.finditer(content):
+        blocks.append(("text", split_segments(content, position, match.start())))
+        blocks.append(("code", split_segments(content, match.start(), match.end(), _LINE_BOUNDARY, detect_headings=False)))
+        position = match.end()
+    blocks.append(("text", split_segments(content, position, len(content))))
+    segments = [segment for _, block_segments in blocks for segment in block_segments]
+    if not segments:
+        return
+
+    # Tokenize all segments of the note in one batched call
+    with METRICS.timer("tokenize"):
+        encoded = tokenizer(
+            [content[start:end] for start, end, _ in segments],
+            add_special_tokens=False,
+            return_offsets_mapping=True
+        )
+
+    # Pack each block separately so code never shares a chunk with text
+    counts = {"text": 0, "code": 0}
+    first = 0
+    for chunk_type, block_segments in blocks:
+        run = slice(first, first + len(block_segments))
+        first = run.stop
+        for start, end, ids in _pack_segments(
+            block_segments,
+            encoded["input_ids"][run],
+            encoded["offset_mapping"][run],
+            max_tokens,
+            overlap_tokens if chunk_type == "text" else 0
+        ):
+            counts[chunk_type] += 1
+            yield {"chunk": content[start:end], "type": chunk_type, "metadata": metadata,
+                   "start": start, "end": end, "token_ids": ids}
+
+    logging.debug("Generated %d text chunks and %d code chunks by tokens.", counts["text"], counts["code"])
+
+
+def chunk_token_ids(chunks: List[Tuple[str, dict]]) -> Optional[List[List[int]]]:
+    """
+    Collect the token ids the token-aware chunker attached to each chunk.
+
+    Args:
+        chunks (List[Tuple[str, dict]]): (chunk id, chunk data) pairs from `prepare_chunks`.
+
+    Returns:
+        Optional[List[List[int]]]: Token ids per chunk, or None if the chunks were not tokenized.
+    """
+    token_ids = [chunk_data.get("token_ids") for _, chunk_data in chunks]
+    return token_ids if any(ids is not None for ids in token_ids) else None
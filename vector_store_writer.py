@@ -0,0 +1,231 @@
+"""
+Buffered, columnar writes to the Chroma vector store.
+
+Rows are gathered into parallel id/document/metadata/embedding columns and
+written with one `add` (or `upsert`) call per batch instead of one call per chunk.
+Rows of a failed write stay buffered and are retried by the next flush, and a
+row's `on_written` callback runs only once its batch has been written.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import date, datetime
+from typing import Callable, Iterable, List, Optional
+
+from metrics import METRICS
+
+
+def sanitize_metadata(metadata: dict) -> dict:
+    """
+    Convert metadata values into the scalar types Chroma accepts.
+
+    Args:
+        metadata (dict): Metadata to associate with a document.
+
+    Returns:
+        dict: A copy where lists are joined with ", ", dates are ISO formatted,
+        None becomes an empty string and any other non-scalar value is stringified.
+    """
+    sanitized = {}
+    for key, value in metadata.items():
+        if isinstance(value, (str, int, float, bool)):
+            sanitized[key] = value
+        elif value is None:
+            sanitized[key] = ""
+        elif isinstance(value, (list, tuple, set)):
+            sanitized[key] = ", ".join(str(item) for item in value)
+        elif isinstance(value, (date, datetime)):
+            sanitized[key] = value.isoformat()
+        else:
+            sanitized[key] = str(value)
+    return sanitized
+
+
+class VectorStoreWriter:
+    """
+    Buffers vector-store rows and flushes them in batches.
+
+    Attributes:
+        collection: Chroma collection rows are written to.
+        batch_size (int): Number of buffered rows that triggers a flush.
+        flush_interval (float): Seconds the oldest buffered row may wait before a flush.
+        write_mode (str): Collection method used for writes ("add" or "upsert").
+        rows_written (int): Total rows written so far.
+        flushes (int): Number of successful flushes so far.
+        last_error (Optional[Exception]): Error of the latest failed write, cleared by a successful one.
+    """
+
+    def __init__(
+        self,
+        collection,
+        batch_size: int = 256,
+        flush_interval_ms: float = 500.0,
+        write_mode: str = "add",
+        executor=None
+    ):
+        """
+        Initialize the writer.
+
+        Args:
+            collection: Chroma collection to write to.
+            batch_size (int): Maximum number of rows per write call.
+            flush_interval_ms (float): Maximum time in milliseconds a row stays buffered.
+            write_mode (str): "add" or "upsert".
+            executor: Executor used for the blocking write call. None uses the loop's default executor.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be greater than 0.")
+        if write_mode not in ("add", "upsert"):
+            raise ValueError("write_mode must be 'add' or 'upsert'.")
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.write_mode = write_mode
+        self.executor = executor
+        self.rows_written = 0
+        self.flushes = 0
+        self._ids = []
+        self._documents = []
+        self._metadatas = []
+        self._embeddings = []
+        self._on_written: List[Optional[Callable[[], None]]] = []
+        self._writing_ids: List[str] = []  # Ids of the batch currently being written
+        self.last_error: Optional[Exception] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timed_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def is_pending(self, doc_ids: Iterable[str]) -> bool:
+        """
+        Return True if any of the ids is buffered or being written, i.e. not yet in the collection.
+
+        Args:
+            doc_ids (Iterable[str]): Document identifiers.
+        """
+        if not self._ids and not self._writing_ids:
+            return False
+        pending = set(self._ids)
+        pending.update(self._writing_ids)
+        return any(doc_id in pending for doc_id in doc_ids)
+
+    async def add(
+        self,
+        doc_id: str,
+        document: str,
+        metadata: dict,
+        embedding,
+        on_written: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Buffer one row, flushing if the batch is full.
+
+        Args:
+            doc_id (str): A unique identifier for the document.
+            document (str): The document text.
+            metadata (dict): Metadata to associate with the document.
+            embedding: Embedding vector (list or NumPy array).
+            on_written (Optional[Callable[[], None]]): Called once this row, and every row
+                buffered before it, has been written.
+
+        Raises:
+            Exception: If a flush triggered by a full batch fails; the rows stay buffered.
+        """
+        self._ids.append(doc_id)
+        self._documents.append(document)
+        self._metadatas.append(sanitize_metadata(metadata))
+        self._embeddings.append(embedding.tolist() if hasattr(embedding, "tolist") else list(embedding))
+        self._on_written.append(on_written)
+
+        if len(self._ids) >= self.batch_size:
+            await self.flush()
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.flush_interval, self._start_timed_flush)
+
+    async def flush(self) -> int:
+        """
+        Write all buffered rows with a single collection call.
+
+        Flushes run one at a time, so rows are written in the order they were added.
+        If the write fails the rows are put back at the front of the buffer.
+
+        Returns:
+            int: Number of rows written.
+
+        Raises:
+            Exception: The write error, after the rows have been put back.
+
+        Logs:
+            - Debug: Rows written and time taken by each flush.
+            - Error: If the write fails; the exception is re-raised.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        async with self._lock:
+            if not self._ids:
+                return 0
+            ids, self._ids = self._ids, []
+            documents, self._documents = self._documents, []
+            metadatas, self._metadatas = self._metadatas, []
+            embeddings, self._embeddings = self._embeddings, []
+            callbacks, self._on_written = self._on_written, []
+            self._writing_ids = ids
+
+            write = getattr(self.collection, self.write_mode)
+            started = time.perf_counter()
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    self.executor,
+                    lambda: write(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+                )
+            except Exception as e:
+                logging.error(f"Error flushing {len(ids)} rows to the vector store: {e}")
+                self._ids[:0] = ids
+                self._documents[:0] = documents
+                self._metadatas[:0] = metadatas
+                self._embeddings[:0] = embeddings
+                self._on_written[:0] = callbacks
+                self.last_error = e
+                raise
+            finally:
+                self._writing_ids = []
+            elapsed = time.perf_counter() - started
+            self.last_error = None
+
+        for callback in callbacks:
+            if callback is not None:
+                callback()
+        self.rows_written += len(ids)
+        self.flushes += 1
+        METRICS.observe("vector_store.write", elapsed)
+        METRICS.inc("vector_store.rows", len(ids))
+        logging.debug("Flushed %d rows to the vector store in %.1f ms.", len(ids), elapsed * 1000)
+        return len(ids)
+
+    def _start_timed_flush(self) -> None:
+        """
+        Start the interval flush, keeping a reference to its task until it finishes.
+        """
+        self._timer = None
+        self._timed_task = asyncio.get_running_loop().create_task(self._timed_flush())
+
+    async def _timed_flush(self) -> None:
+        """
+        Flush triggered by the interval timer.
+
+        A failed write is logged by `flush` and its rows stay buffered, so the next
+        flush retries them and raises if the store is still failing.
+        """
+        try:
+            await self.flush()
+        except Exception:
+            pass
+        finally:
+            if self._timed_task is asyncio.current_task():
+                self._timed_task = None
@@ -0,0 +1,599 @@
+"""
+Long-running watch mode: re-index notes seconds after they are saved.
+
+File-system events come from Linux inotify (through ctypes) or, where inotify is
+unavailable, from periodic polling. Events are coalesced per path and debounced
+so a burst of saves becomes one small batch, and each batch is pushed through
+the ingest pipeline without rescanning the vault.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from manifest import NoteManifest
+from pipeline import IngestPipeline
+from scanner import scan_directory_entries
+
+# Event kinds passed to `ChangeCoalescer.add`
+CHANGED = "changed"
+DELETED = "deleted"
+RESCAN = "rescan"
+
+# inotify constants from <sys/inotify.h>
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_CLOSE_WRITE = 0x00000008
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+
+class ChangeCoalescer:
+    """
+    Collects file events, keeping only the latest kind per path, and releases them in debounced batches.
+
+    A batch is released once no new event has arrived for `debounce` seconds, or
+    `max_delay` seconds after its first event, whichever comes first.
+
+    Attributes:
+        debounce (float): Quiet period in seconds that closes a batch.
+        max_delay (float): Longest time in seconds a batch stays open under continuous events.
+    """
+
+    def __init__(self, debounce_ms: float = 500.0, max_delay_ms: float = 5000.0):
+        """
+        Initialize the coalescer.
+
+        Args:
+            debounce_ms (float): Quiet period in milliseconds that closes a batch.
+            max_delay_ms (float): Longest time in milliseconds a batch stays open.
+        """
+        self.debounce = debounce_ms / 1000.0
+        self.max_delay = max(max_delay_ms, debounce_ms) / 1000.0
+        self._pending: Dict[str, str] = {}
+        self._arrived = asyncio.Event()
+
+    def add(self, path: str, kind: str) -> None:
+        """
+        Record an event; a later event on the same path replaces an earlier one.
+
+        Args:
+            path (str): Affected path ("" for a rescan request).
+            kind (str): CHANGED, DELETED or RESCAN.
+        """
+        self._pending.pop(path, None)
+        self._pending[path] = kind
+        self._arrived.set()
+
+    async def next_batch(self) -> Dict[str, str]:
+        """
+        Wait for events and return the next debounced batch.
+
+        Returns:
+            Dict[str, str]: Event kind by path, in order of each path's latest event.
+        """
+        while not self._pending:
+            self._arrived.clear()
+            await self._arrived.wait()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_delay
+        while True:
+            self._arrived.clear()
+            timeout = min(self.debounce, deadline - loop.time())
+            if timeout <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._arrived.wait(), timeout)
+            except asyncio.TimeoutError:
+                break
+
+        batch, self._pending = self._pending, {}
+        self._arrived.clear()
+        return batch
+
+
+class _AnyExtension:
+    """
+    Extension filter that accepts every file.
+    """
+
+    def __contains__(self, extension: str) -> bool:
+        return True
+
+
+def _extension_filter(file_extensions: Optional[Iterable[str]]):
+    """
+    Return a container for `in` checks on file extensions; None accepts every file.
+    """
+    return _AnyExtension() if file_extensions is None else set(file_extensions)
+
+
+def _load_libc():
+    """
+    Load libc with the inotify functions, or return None if they are not available.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class InotifyWatcher:
+    """
+    Watches a directory tree with inotify and reports file changes to a callback.
+
+    inotify is not recursive, so every directory outside the ignored set gets its
+    own watch, and directories created or moved in later are added as they appear.
+
+    Attributes:
+        root (Path): Root directory being watched.
+        ignored_directories (Set[str]): Directory names that are not watched.
+        on_change (Callable[[str, str], None]): Called with (path, kind) for each event.
+        file_extensions: Extensions of the files reported, or every file if None.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        ignored_directories: Iterable[str],
+        on_change: Callable[[str, str], None],
+        file_extensions: Optional[Iterable[str]] = None
+    ):
+        """
+        Initialize the watcher without installing any watches.
+
+        Args:
+            root (Path): Root directory to watch.
+            ignored_directories (Iterable[str]): Directory names to skip.
+            on_change (Callable[[str, str], None]): Called with (path, kind) for each event.
+            file_extensions (Optional[Iterable[str]]): Extensions of the files to report; None reports every file.
+        """
+        self.root = Path(root)
+        self.ignored_directories = set(ignored_directories)
+        self.on_change = on_change
+        self.file_extensions = _extension_filter(file_extensions)
+        self._libc = None
+        self._fd = -1
+        self._paths: Dict[int, str] = {}
+
+    @staticmethod
+    def available() -> bool:
+        """
+        Return True if this platform provides inotify.
+        """
+        return _load_libc() is not None
+
+    def start(self) -> None:
+        """
+        Create the inotify instance, watch the whole tree and start reading events on the running loop.
+
+        Raises:
+            OSError: If inotify is unavailable or the watch limit is reached.
+        """
+        self._libc = _load_libc()
+        if self._libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_init1 failed: {os.strerror(error)}")
+        try:
+            watched = self._watch_tree(str(self.root))
+        except OSError:
+            self.close()
+            raise
+        asyncio.get_running_loop().add_reader(self._fd, self._read_events)
+        logging.info(f"Watching {watched} directories under {self.root} with inotify.")
+
+    def close(self) -> None:
+        """
+        Stop reading events and release the inotify instance.
+        """
+        if self._fd >= 0:
+            try:
+                asyncio.get_running_loop().remove_reader(self._fd)
+            except RuntimeError:
+                pass
+            os.close(self._fd)
+            self._fd = -1
+            self._paths.clear()
+
+    def _add_watch(self, directory: str) -> None:
+        """
+        Watch one directory.
+
+        Raises:
+            OSError: If the watch cannot be added because of the per-user limit.
+
+        Logs:
+            - Warning: If the directory vanished or cannot be watched for another reason.
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                raise OSError(error, "inotify watch limit reached; raise fs.inotify.max_user_watches")
+            logging.warning(f"Could not watch {directory}: {os.strerror(error)}")
+            return
+        self._paths[wd] = directory
+
+    def _watch_tree(self, directory: str) -> int:
+        """
+        Watch a directory and every non-ignored directory below it.
+
+        Returns:
+            int: Number of directories watched.
+        """
+        count = 0
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            self._add_watch(current)
+            count += 1
+            _, subdirectories = scan_directory_entries(current, set(), self.ignored_directories)
+            pending.extend(subdirectories)
+        return count
+
+    def _unwatch_tree(self, directory: str) -> None:
+        """
+        Remove the watches of a directory that was moved away, and of everything below it.
+        """
+        prefix = directory + os.sep
+        for wd, path in list(self._paths.items()):
+            if path == directory or path.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                self._paths.pop(wd, None)
+
+    def _report_tree(self, directory: str) -> None:
+        """
+        Report every file under a directory that appeared after the watches were installed.
+        """
+        pending = [directory]
+        while pending:
+            files, subdirectories = scan_directory_entries(pending.pop(), self.file_extensions, self.ignored_directories)
+            for file_path in files:
+                self.on_change(str(file_path), CHANGED)
+            pending.extend(subdirectories)
+
+    def _read_events(self) -> None:
+        """
+        Drain the inotify descriptor and translate each event into a change notification.
+
+        Logs:
+            - Warning: If the kernel event queue overflowed; a rescan is requested.
+        """
+        while True:
+            try:
+                data = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                logging.error(f"Error reading inotify events: {e}")
+                return
+            if not data:
+                return
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+                name = os.fsdecode(data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + name_length].rstrip(b"\0"))
+                offset += _EVENT_HEADER.size + name_length
+                self._handle_event(wd, mask, name)
+
+    def _handle_event(self, wd: int, mask: int, name: str) -> None:
+        """
+        Translate one inotify event.
+
+        Args:
+            wd (int): Watch descriptor the event belongs to.
+            mask (int): Event mask.
+            name (str): Name of the affected entry inside the watched directory.
+        """
+        if mask & IN_Q_OVERFLOW:
+            logging.warning("inotify event queue overflowed; scheduling a full rescan.")
+            self.on_change("", RESCAN)
+            return
+        if mask & IN_IGNORED:
+            self._paths.pop(wd, None)
+            return
+        directory = self._paths.get(wd)
+        if directory is None or not name:
+            return
+        path = os.path.join(directory, name)
+
+        if mask & IN_ISDIR:
+            if name in self.ignored_directories:
+                return
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                try:
+                    self._watch_tree(path)
+                except OSError as e:
+                    logging.error(f"Could not watch new directory {path}: {e}")
+                    self.on_change("", RESCAN)
+                    return
+                self._report_tree(path)
+            elif mask & (IN_MOVED_FROM | IN_DELETE):
+                self._unwatch_tree(path)
+                self.on_change(path, DELETED)
+            return
+
+        if os.path.splitext(name)[1] not in self.file_extensions:
+            return
+        if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+            self.on_change(path, CHANGED)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            self.on_change(path, DELETED)
+
+
+def snapshot_tree(root: Path, ignored_directories: Set[str], file_extensions=None) -> Dict[str, Tuple[int, int]]:
+    """
+    Record the (mtime_ns, size) of every matching file under a directory.
+
+    Args:
+        root (Path): Root directory.
+        ignored_directories (Set[str]): Directory names to skip.
+        file_extensions: Extensions of the files to record, or every file if None.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: File stat signature by path.
+    """
+    file_extensions = _extension_filter(file_extensions)
+    snapshot = {}
+    pending = [str(root)]
+    while pending:
+        files, subdirectories = scan_directory_entries(pending.pop(), file_extensions, ignored_directories)
+        for file_path in files:
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            snapshot[str(file_path)] = (stat.st_mtime_ns, stat.st_size)
+        pending.extend(subdirectories)
+    return snapshot
+
+
+class PollingWatcher:
+    """
+    Fallback watcher that compares periodic snapshots of the tree.
+
+    Attributes:
+        root (Path): Root directory being watched.
+        ignored_directories (Set[str]): Directory names that are not scanned.
+        on_change (Callable[[str, str], None]): Called with (path, kind) for each difference.
+        interval (float): Seconds between snapshots.
+        file_extensions: Extensions of the files reported, or every file if None.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        ignored_directories: Iterable[str],
+        on_change: Callable[[str, str], None],
+        interval: float = 2.0,
+        file_extensions: Optional[Iterable[str]] = None
+    ):
+        """
+        Initialize the watcher without taking a snapshot.
+
+        Args:
+            root (Path): Root directory to watch.
+            ignored_directories (Iterable[str]): Directory names to skip.
+            on_change (Callable[[str, str], None]): Called with (path, kind) for each difference.
+            interval (float): Seconds between snapshots.
+            file_extensions (Optional[Iterable[str]]): Extensions of the files to report; None reports every file.
+        """
+        self.root = Path(root)
+        self.ignored_directories = set(ignored_directories)
+        self.on_change = on_change
+        self.interval = interval
+        self.file_extensions = file_extensions
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Take the initial snapshot and start polling on the running loop.
+        """
+        self._snapshot = snapshot_tree(self.root, self.ignored_directories, self.file_extensions)
+        self._task = asyncio.get_running_loop().create_task(self._poll())
+        logging.info(f"Polling {len(self._snapshot)} files under {self.root} every {self.interval}s.")
+
+    def close(self) -> None:
+        """
+        Stop polling.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _poll(self) -> None:
+        """
+        Take a snapshot every interval and report files that appeared, changed or disappeared.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            snapshot = await loop.run_in_executor(
+                None, snapshot_tree, self.root, self.ignored_directories, self.file_extensions
+            )
+            for path, signature in snapshot.items():
+                if self._snapshot.get(path) != signature:
+                    self.on_change(path, CHANGED)
+            for path in self._snapshot.keys() - snapshot.keys():
+                self.on_change(path, DELETED)
+            self._snapshot = snapshot
+
+
+def create_watcher(
+    backend: str,
+    root: Path,
+    ignored_directories: Iterable[str],
+    on_change: Callable[[str, str], None],
+    poll_interval: float = 2.0,
+    file_extensions: Optional[Iterable[str]] = None
+):
+    """
+    Build the watcher selected in the configuration.
+
+    Args:
+        backend (str): "inotify", "poll", or "auto" to use inotify where available.
+        root (Path): Root directory to watch.
+        ignored_directories (Iterable[str]): Directory names to skip.
+        on_change (Callable[[str, str], None]): Called with (path, kind) for each event.
+        poll_interval (float): Seconds between snapshots for the polling watcher.
+        file_extensions (Optional[Iterable[str]]): Extensions of the files to report; None reports every file.
+
+    Returns:
+        An object exposing `start` and `close`.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if backend == "poll" or (backend == "auto" and not InotifyWatcher.available()):
+        return PollingWatcher(root, ignored_directories, on_change, poll_interval, file_extensions)
+    if backend in ("inotify", "auto"):
+        return InotifyWatcher(root, ignored_directories, on_change, file_extensions)
+    raise ValueError(f"Unknown watch backend: {backend}")
+
+
+class _PathSource:
+    """
+    Scanner stand-in that feeds a fixed batch of paths into the pipeline.
+    """
+
+    def __init__(self, paths: List[Path]):
+        self.paths = paths
+
+    async def iter_files(self, max_workers: int = 8) -> AsyncIterator[Path]:
+        for file_path in self.paths:
+            yield file_path
+
+
+class VaultWatcher:
+    """
+    Keeps the index in sync with the vault by re-indexing changed notes as they are saved.
+
+    Attributes:
+        config (Config): Configuration object containing settings.
+        scanner (DirectoryScanner): Full-vault scanner, used for the initial catch-up and rescans.
+        processor (FileProcessor): Chunking, embedding and storage operations.
+        manifest (NoteManifest): Index state shared with the pipeline.
+        coalescer (ChangeCoalescer): Pending events.
+    """
+
+    def __init__(self, config, scanner, processor, manifest: NoteManifest):
+        """
+        Initialize the watcher.
+
+        Args:
+            config (Config): Configuration object containing settings.
+            scanner (DirectoryScanner): Full-vault scanner.
+            processor (FileProcessor): Chunking, embedding and storage operations.
+            manifest (NoteManifest): Index state shared with the pipeline.
+        """
+        self.config = config
+        self.scanner = scanner
+        self.processor = processor
+        self.manifest = manifest
+        self.coalescer = ChangeCoalescer(config.watch_debounce_ms, config.watch_max_delay_ms)
+
+    async def run(self) -> None:
+        """
+        Catch up on changes made while not running, then process change batches until cancelled.
+
+        The watcher starts before the catch-up run, so saves made during it are not missed.
+
+        Logs:
+            - Warning: If inotify cannot be used and polling is used instead.
+        """
+        watcher = create_watcher(
+            self.config.watch_backend, self.config.vault_directory, self.config.ignored_directories,
+            self.coalescer.add, self.config.watch_poll_interval, self.config.allowed_extensions
+        )
+        try:
+            watcher.start()
+        except OSError as e:
+            logging.warning(f"Falling back to polling: {e}")
+            watcher = PollingWatcher(
+                self.config.vault_directory, self.config.ignored_directories,
+                self.coalescer.add, self.config.watch_poll_interval, self.config.allowed_extensions
+            )
+            watcher.start()
+
+        try:
+            await IngestPipeline(self.config, self.scanner, self.processor, self.manifest).run()
+            while True:
+                batch = await self.coalescer.next_batch()
+                try:
+                    await self.process_batch(batch)
+                except Exception as e:
+                    logging.error(f"Error processing {len(batch)} watched changes: {e}")
+        finally:
+            watcher.close()
+
+    async def process_batch(self, batch: Dict[str, str]) -> dict:
+        """
+        Re-index changed files and delete removed ones.
+
+        Args:
+            batch (Dict[str, str]): Event kind by path from the coalescer.
+
+        Returns:
+            dict: Counts of indexed, unchanged, failed and removed files.
+
+        Logs:
+            - Info: Size and result of each batch.
+        """
+        if RESCAN in batch.values():
+            return await IngestPipeline(self.config, self.scanner, self.processor, self.manifest).run()
+
+        changed = []
+        removed_ids = []
+        removed = 0
+        for path, kind in batch.items():
+            if kind == CHANGED and os.path.isfile(path):
+                changed.append(Path(path))
+                continue
+            # Deleted files and directories: drop the file itself and anything recorded below it
+            prefix = path + os.sep
+            for recorded in [entry for entry in self.manifest.entries if entry == path or entry.startswith(prefix)]:
+                removed_ids.extend(self.manifest.remove(recorded))
+                removed += 1
+
+        if removed_ids:
+            await self.processor.delete_chunks(removed_ids)
+        if changed:
+            summary = await IngestPipeline(self.config, _PathSource(changed), self.processor, self.manifest).run(
+                remove_missing=False
+            )
+        else:
+            self.manifest.save()
+            summary = {"indexed": 0, "unchanged": 0, "failed": 0}
+        summary["removed"] = removed
+        logging.info(f"Processed {len(batch)} watched changes: {summary}")
+        return summary
@@ -3,55 +3,154 @@ Handles detection and processing of YAML metadata in files.
 """
 
 from pathlib import Path
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Optional, Union
+import re
 import yaml
+from metrics import METRICS
 
+# A closing frontmatter delimiter: a line containing only "---"
+_CLOSING_DELIMITER = re.compile(r"^---[ \t]*\r?$", re.MULTILINE)
+_CLOSING_DELIMITER_BYTES = re.compile(rb"\n---[ \t]*\r?(?:\n|$)")
 
-def extract_yaml_metadata(file_path: Path) -> Tuple[bool, Dict]:
+# Default upper bound on how much of a file is read to find its frontmatter
+DEFAULT_MAX_HEADER_BYTES = 64 * 1024
+_SNIFF_BLOCK_SIZE = 4096
+
+
+def parse_frontmatter(content: str) -> Tuple[bool, Dict, str, Optional[str]]:
+    """
+    Split content into its YAML frontmatter and body, parsing the frontmatter once.
+
+    Args:
+        content (str): The content of the file.
+
+    Returns:
+        Tuple[bool, Dict, str, Optional[str]]: Whether a frontmatter block is present, the parsed
+        metadata, the body after the block (stripped), and an error message if parsing failed.
+
+    Notes:
+        - Frontmatter must open with a "---" line and close with a "---" line.
+        - An unclosed block is treated as ordinary content.
+        - Content that starts with "---" on a longer first line reports an error and no frontmatter.
+    """
+    if not content.startswith("---"):
+        return False, {}, content.strip(), None
+
+    first_newline = content.find("\n")
+    opening = content if first_newline == -1 else content[:first_newline]
+    if opening.strip() != "---":
+        return False, {}, content.strip(), "Malformed YAML frontmatter: opening line must be '---'."
+
+    closing = _CLOSING_DELIMITER.search(content, first_newline + 1)
+    if closing is None:
+        return False, {}, content.strip(), None
+
+    body = content[closing.end():].strip()
+    try:
+        with METRICS.timer("yaml_parse"):
+            parsed = yaml.safe_load(content[first_newline + 1:closing.start()])
+    except yaml.YAMLError as e:
+        return True, {}, body, f"Failed to parse YAML metadata: {e}"
+    if parsed is None:
+        parsed = {}
+    if not isinstance(parsed, dict):
+        return True, {}, body, "YAML metadata is not a valid dictionary."
+    return True, parsed, body, None
+
+
+def sniff_frontmatter(file_path: Path, max_header_bytes: int = DEFAULT_MAX_HEADER_BYTES) -> Tuple[bool, Dict]:
+    """
+    Detect and parse YAML frontmatter by reading only the start of a file.
+
+    The first block is read; if it does not start with "---" the file is classified
+    immediately. Otherwise further blocks are read only until the closing "---" line
+    is found or `max_header_bytes` have been read.
+
+    Args:
+        file_path (Path): Path to the file to check.
+        max_header_bytes (int): Maximum number of bytes read while looking for the closing delimiter.
+
+    Returns:
+        Tuple[bool, Dict]: A tuple indicating YAML presence and the extracted metadata (if any).
+
+    Notes:
+        - Frontmatter larger than `max_header_bytes` is reported as absent.
+    """
+    with open(file_path, "rb") as file:
+        request = min(_SNIFF_BLOCK_SIZE, max_header_bytes)
+        header = file.read(request)
+        if not header.startswith(b"---"):
+            return False, {}
+        at_eof = len(header) < request
+
+        search_from = 0
+        while True:
+            closing = _CLOSING_DELIMITER_BYTES.search(header, search_from)
+            # A delimiter at the very end of the buffer is only complete at end of file
+            if closing is not None and (closing.group().endswith(b"\n") or at_eof):
+                break
+            if at_eof or len(header) >= max_header_bytes:
+                return False, {}
+            request = min(_SNIFF_BLOCK_SIZE, max_header_bytes - len(header))
+            block = file.read(request)
+            at_eof = len(block) < request
+            # Re-scan the tail in case the delimiter straddles two blocks
+            search_from = closing.start() if closing is not None else max(0, len(header) - 8)
+            header += block
+
+    has_yaml, metadata, _, _ = parse_frontmatter(header[:closing.end()].decode("utf-8"))
+    return has_yaml, metadata
+
+
+def extract_yaml_metadata(file_path: Path, max_header_bytes: int = DEFAULT_MAX_HEADER_BYTES) -> Tuple[bool, Dict]:
     """
     Extract YAML metadata from a file.
 
     Args:
         file_path (Path): Path to the file to check.
+        max_header_bytes (int): Maximum number of bytes read while looking for the frontmatter.
 
     Returns:
         Tuple[bool, Dict]: A tuple indicating YAML presence and the extracted metadata (if any).
 
     Notes:
         - YAML metadata must start with "---" and end with "---".
+        - Only the frontmatter prefix of the file is read; see `sniff_frontmatter`.
         - Returns an empty dictionary if metadata extraction fails or if no YAML block is found.
     """
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            lines = file.readlines()
-        if lines and lines[0].strip() == "---":
-            end_idx = next(i for i, line in enumerate(lines[1:], 1) if line.strip() == "---")
-            yaml_content = "\n".join(lines[1:end_idx])
-            return True, yaml.safe_load(yaml_content)
-    except Exception as e:
+        return sniff_frontmatter(file_path, max_header_bytes)
+    except Exception:
         return False, {}
-    return False, {}
 
 
-def split_yaml_files(files: List[Path]) -> Tuple[List[Path], List[Path]]:
+def split_yaml_files(
+    files: List[Union[Path, "NoteRecord"]],
+    max_header_bytes: int = DEFAULT_MAX_HEADER_BYTES
+) -> Tuple[list, list]:
     """
     Split files into those with and without YAML metadata.
 
     Args:
-        files (List[Path]): List of file paths to process.
+        files (List[Union[Path, NoteRecord]]): File paths, or already loaded note records.
+        max_header_bytes (int): Maximum number of bytes read per path while looking for frontmatter.
 
     Returns:
-        Tuple[List[Path], List[Path]]: A tuple of two lists:
+        Tuple[list, list]: A tuple of two lists, holding the same kind of items that were passed in:
             - Files with YAML metadata.
             - Files without YAML metadata.
 
     Notes:
-        - Uses `extract_yaml_metadata` to check and extract metadata for each file.
+        - Note records are classified from their already parsed frontmatter without touching the disk.
+        - Paths are checked with `extract_yaml_metadata`, which reads only the frontmatter prefix.
     """
     yaml_files = []
     non_yaml_files = []
     for file_path in files:
-        has_yaml, _ = extract_yaml_metadata(file_path)
+        if hasattr(file_path, "has_frontmatter"):
+            has_yaml = file_path.has_frontmatter
+        else:
+            has_yaml, _ = extract_yaml_metadata(file_path, max_header_bytes)
         if has_yaml:
             yaml_files.append(file_path)
         else: